@@ -1,8 +1,79 @@
+import functools
+import json
+import threading
+import numpy as np
 import streamlit as st
 import requests
+from collections import OrderedDict
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from requests.adapters import HTTPAdapter
+from api.throttle import PRIORITY_HISTORY, PRIORITY_LATEST, UpstreamUnavailable, get_budget
+from store.ring import shared_latest
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATASTREAM_PAGE_SIZE = 100
+MAX_STALE_ENTRIES = 1024
+
+_stale_lock = threading.Lock()
+_stale_results = OrderedDict()
+
+@st.cache_resource
+def _get_session():
+    """Shared HTTP session so upstream calls reuse pooled connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _checked(response):
+    """Report the response to the budget; 429 and 5xx raise UpstreamUnavailable so they're never cached"""
+    budget = get_budget()
+    budget.record_response(response.status_code, response.headers)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise UpstreamUnavailable(f"Campbell Cloud returned {response.status_code}", budget.stats()["backoff_s"])
+    return response
+
+def _get(url, headers, params=None, priority=PRIORITY_LATEST):
+    """GET through the shared session under the process-wide request budget"""
+    with get_budget().request(priority):
+        response = _get_session().get(url, headers=headers, params=params)
+    return _checked(response)
+
+def _serve_stale(default=None, unkeyed=(1,)):
+    """Fall back to the last good result (or default) when the upstream is unavailable.
+    Goes above @st.cache_data so fallbacks aren't cached and the next rerun tries again.
+    Positional arguments in unkeyed (the token) are left out of the key so a new token finds old results."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__, tuple(a for i, a in enumerate(args) if i not in unkeyed), tuple(sorted(kwargs.items())))
+            try:
+                result = func(*args, **kwargs)
+            except UpstreamUnavailable:
+                with _stale_lock:
+                    if key in _stale_results:
+                        return _stale_results[key]
+                if default is UpstreamUnavailable:
+                    raise
+                return default
+            with _stale_lock:
+                _stale_results[key] = result
+                _stale_results.move_to_end(key)
+                while len(_stale_results) > MAX_STALE_ENTRIES:
+                    _stale_results.popitem(last=False)
+            return result
+        
+        wrapper.clear = func.clear
+        return wrapper
+    return decorator
+
+@_serve_stale(default=UpstreamUnavailable, unkeyed=(2,))
 @st.cache_data(ttl=3000)
 def get_access_token(base_url, username, password):
     """Authenticate and get access token"""
@@ -14,12 +85,14 @@ def get_access_token(base_url, username, password):
         "grant_type": "password"
     }
     
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
+    with get_budget().request(PRIORITY_LATEST):
+        response = _get_session().post(url, json=payload)
+    _checked(response).raise_for_status()
     return response.json()["access_token"]
 
 def _handle_auth_error(func):
     """Decorator to handle 401 errors by clearing token cache and auto-retrying"""
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
@@ -31,6 +104,7 @@ def _handle_auth_error(func):
             raise
     return wrapper
 
+@_serve_stale(default=UpstreamUnavailable)
 @st.cache_data(ttl=300)
 @_handle_auth_error
 def get_datastreams(base_url, token, organization_id):
@@ -38,11 +112,81 @@ def get_datastreams(base_url, token, organization_id):
     url = f"{base_url}/api/v1/organizations/{organization_id}/datastreams"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
+    datastreams = []
+    offset = 0
+    while True:
+        response = _get(url, headers, {"limit": DATASTREAM_PAGE_SIZE, "offset": offset})
+        response.raise_for_status()
+        page = response.json()
+        datastreams.extend(page)
+        if len(page) < DATASTREAM_PAGE_SIZE:
+            break
+        offset += DATASTREAM_PAGE_SIZE
     fetch_time = datetime.now(ZoneInfo("America/Denver")).strftime('%I:%M:%S %p')
-    return {"data": response.json(), "fetched_at": fetch_time}
+    return {"data": datastreams, "fetched_at": fetch_time}
+
+@_serve_stale(default=[])
+@st.cache_data(ttl=3600)
+@_handle_auth_error
+def get_stations(base_url, token, organization_id):
+    """Get all stations for the organization"""
+    url = f"{base_url}/api/v1/organizations/{organization_id}/stations"
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    response = _get(url, headers)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+@_serve_stale(default=[])
+@st.cache_data(ttl=3600)
+@_handle_auth_error
+def get_station_groups(base_url, token, organization_id):
+    """Get all station groups for the organization"""
+    url = f"{base_url}/api/v1/organizations/{organization_id}/station-groups"
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    response = _get(url, headers)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+@_serve_stale(default=[])
+@st.cache_data(ttl=300)
+@_handle_auth_error
+def get_alert_configurations(base_url, token, organization_id):
+    """Get the alert configurations set up in Campbell Cloud"""
+    url = f"{base_url}/api/v1/organizations/{organization_id}/alert-configurations"
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    response = _get(url, headers, priority=PRIORITY_HISTORY)
+    if response.status_code == 200:
+        return response.json()
+    return []
 
+@_serve_stale(default=[])
+@st.cache_data(ttl=300)
+@_handle_auth_error
+def get_alert_events(base_url, token, organization_id, start_epoch):
+    """Get Campbell Cloud alert events since start_epoch"""
+    url = f"{base_url}/api/v1/organizations/{organization_id}/alert-events"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"startEpoch": start_epoch, "limit": 100}
+    
+    response = _get(url, headers, params, PRIORITY_HISTORY)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+def _prefer_shared_ring(func):
+    """Serve the latest point from the ingestion daemon's ring while it's fresh, skipping the cache and the upstream"""
+    @functools.wraps(func)
+    def wrapper(base_url, token, organization_id, datastream_id):
+        return shared_latest(datastream_id) or func(base_url, token, organization_id, datastream_id)
+    return wrapper
+
+@_prefer_shared_ring
+@_serve_stale(default=None)
 @st.cache_data(ttl=300)
 @_handle_auth_error
 def get_latest_datapoint(base_url, token, organization_id, datastream_id):
@@ -51,15 +195,31 @@ def get_latest_datapoint(base_url, token, organization_id, datastream_id):
     headers = {"Authorization": f"Bearer {token}"}
     params = {"brief": "true"}
     
-    response = requests.get(url, headers=headers, params=params)
+    response = _get(url, headers, params)
     if response.status_code == 200:
         return response.json()
     return None
 
-@st.cache_data(ttl=300)
-@_handle_auth_error
-def get_historical_datapoints(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit=15000):
-    """Get historical datapoints for a specific datastream"""
+def _loads(content):
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def points_to_arrays(points):
+    """(ts, values) arrays from a list of brief datapoint dicts, one point at a time; null values become NaN"""
+    return (np.fromiter((p["ts"] for p in points), dtype=np.int64, count=len(points)),
+            np.fromiter((np.nan if p["value"] is None else p["value"] for p in points), dtype=np.float64, count=len(points)))
+
+def decode_datapoints(content):
+    """(ts, values) arrays from a brief datapoints response body.
+    Parsed with orjson when it's installed and converted column-wise, falling back to the per-point path for odd payloads."""
+    points = _loads(content).get("data") or []
+    try:
+        # np.array turns None into NaN for a float dtype
+        return np.array([p["ts"] for p in points], dtype=np.int64), np.array([p["value"] for p in points], dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        return points_to_arrays(points)
+
+def _datapoints_response(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit, priority):
+    """One page of historical datapoints as a 200 response, or None if it failed or was deferred"""
     url = f"{base_url}/api/v1/organizations/{organization_id}/datastreams/{datastream_id}/datapoints"
     headers = {"Authorization": f"Bearer {token}"}
     params = {
@@ -69,7 +229,26 @@ def get_historical_datapoints(base_url, token, organization_id, datastream_id, s
         "limit": limit
     }
     
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    return None
+    try:
+        response = _get(url, headers, params, priority)
+    except UpstreamUnavailable:
+        return None
+    return response if response.status_code == 200 else None
+
+def fetch_datapoints(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit=15000,
+                     priority=PRIORITY_HISTORY):
+    """Fetch one page of historical datapoints without caching; None if it failed or was deferred"""
+    response = _datapoints_response(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit, priority)
+    return None if response is None else _loads(response.content)
+
+def fetch_datapoint_arrays(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit=15000,
+                           priority=PRIORITY_HISTORY):
+    """Like fetch_datapoints, but decoded straight into (ts, values) arrays"""
+    response = _datapoints_response(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit, priority)
+    return None if response is None else decode_datapoints(response.content)
+
+@st.cache_data(ttl=300)
+@_handle_auth_error
+def get_historical_datapoints(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit=15000):
+    """Get historical datapoints for a specific datastream"""
+    return fetch_datapoints(base_url, token, organization_id, datastream_id, start_epoch, end_epoch, limit)
@@ -0,0 +1,77 @@
+"""Streamed downloads for the sidebar's Export Data panel.
+
+Served next to the dashboard by server.py:
+
+    streamlit run server.py
+
+The panel registers each export under an unguessable ticket and links to /export/<ticket>. The route builds
+the file a month at a time while it's being sent, so memory stays flat whether the export covers a day or a year.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from api.campbell_client import get_access_token
+from api.throttle import UpstreamUnavailable
+from config.settings import load_config
+from store.export import EXPORT_FORMATS, iter_export
+
+# How long an export link works after the panel made it
+EXPORT_TICKET_S = 15 * 60
+MAX_TICKETS = 64
+
+_tickets = OrderedDict()
+_lock = threading.Lock()
+_mounted = False
+
+def export_routes_mounted():
+    """Whether this process serves /export, i.e. was started with server.py"""
+    return _mounted
+
+def register_export(datastreams, start_ts, end_ts, export_format, file_name):
+    """URL path that streams this export for the next EXPORT_TICKET_S"""
+    ticket = secrets.token_urlsafe(16)
+    with _lock:
+        now = time.monotonic()
+        for expired in [t for t, entry in _tickets.items() if now - entry["created"] >= EXPORT_TICKET_S]:
+            del _tickets[expired]
+        _tickets[ticket] = {
+            "created": now,
+            "datastreams": datastreams,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "format": export_format,
+            "file_name": file_name
+        }
+        while len(_tickets) > MAX_TICKETS:
+            _tickets.popitem(last=False)
+    return f"/export/{ticket}"
+
+async def download(request):
+    with _lock:
+        entry = _tickets.get(request.path_params["ticket"])
+    if entry is None or time.monotonic() - entry["created"] >= EXPORT_TICKET_S:
+        return JSONResponse({"error": "Export link expired; make a new one from the dashboard"}, status_code=404)
+
+    config = load_config()
+    try:
+        token = await run_in_threadpool(get_access_token, config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
+    except UpstreamUnavailable as e:
+        retry = str(int(e.retry_after or 60))
+        return JSONResponse({"error": "Campbell Cloud is unavailable"}, status_code=503, headers={"Retry-After": retry})
+    _, mime = EXPORT_FORMATS[entry["format"]]
+    # Starlette runs the synchronous generator in its threadpool, one chunk per iteration
+    return StreamingResponse(
+        iter_export(config, token, entry["datastreams"], entry["start_ts"], entry["end_ts"], entry["format"]),
+        media_type=mime,
+        headers={"Content-Disposition": f'attachment; filename="{entry["file_name"]}"', "Cache-Control": "no-store"}
+    )
+
+def export_routes():
+    """Routes to mount alongside the dashboard"""
+    global _mounted
+    _mounted = True
+    return [Route("/export/{ticket}", download, methods=["GET"])]
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from api.campbell_client import get_latest_datapoint
+from api.throttle import get_budget
+from utils.profiling import tag_pool_thread
+
+def _executor(max_workers):
+    """Thread pool whose workers share the calling script's run context"""
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def attach_ctx():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+            tag_pool_thread(ctx)
+
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=attach_ctx)
+
+def fan_out(calls):
+    """Run zero-argument callables in parallel, bounded by the request budget, preserving order"""
+    calls = list(calls)
+    if not calls:
+        return []
+    max_workers = min(len(calls), get_budget().max_concurrent)
+    with _executor(max_workers) as pool:
+        return list(pool.map(lambda call: call(), calls))
+
+def fetch_latest_values(base_url, token, organization_id, datastream_ids):
+    """Fetch the latest datapoint for many datastreams in parallel"""
+    ids = list(dict.fromkeys(datastream_ids))
+    results = fan_out(
+        (lambda ds_id=ds_id: get_latest_datapoint(base_url, token, organization_id, ds_id)) for ds_id in ids
+    )
+    return dict(zip(ids, results))
+
+def start_all(calls):
+    """Start zero-argument callables in parallel, bounded by the request budget, and return their futures without waiting"""
+    calls = list(calls)
+    if not calls:
+        return []
+    pool = _executor(min(len(calls), get_budget().max_concurrent))
+    futures = [pool.submit(call) for call in calls]
+    # Queued calls still run; the pool's threads exit once they're done
+    pool.shutdown(wait=False)
+    return futures
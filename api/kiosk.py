@@ -0,0 +1,248 @@
+"""Read-only JSON and SVG snapshots of current conditions for kiosks and embeds.
+
+Served next to the dashboard by server.py:
+
+    streamlit run server.py
+    curl http://localhost:8501/kiosk/current.json?hours=24
+    <img src="http://localhost:8501/kiosk/charts.svg">
+
+Each (station, hours) snapshot is built at most once per KIOSK_REFRESH_S from the shared series cache
+and local store, then served as the same bytes with an ETag to every viewer until it's rebuilt.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from html import escape
+from zoneinfo import ZoneInfo
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from api.campbell_client import get_access_token, get_datastreams, get_stations
+from api.throttle import UpstreamUnavailable
+from config.settings import load_config
+from store.ingest import load_window
+from store.sensor_health import get_sensor_health, suspect_masks
+from store.series_cache import get_series
+from utils.cards import CARD_SPECS, CARDS_BY_KEY, card_fields, evaluate_cards, latest_point
+
+HOUR_MS = 60 * 60 * 1000
+MAX_HOURS = 720
+SERIES_POINTS = 300
+# Snapshots kept across stations and hour windows; the least recently served go first
+MAX_SNAPSHOTS = 32
+# Current values and extremes come from the dashboard's card spec, so both always agree
+KIOSK_CARDS = [spec for spec in CARD_SPECS if spec.get("kiosk")]
+# Series key -> (card key, rollup column)
+SERIES_FIELDS = {
+    "wind_speed_mph": ("wind_speed_mph", "mean"),
+    "wind_gust_mph": ("wind_gust_mph", "max"),
+    "temperature_f": ("temperature_f", "mean")
+}
+
+_snapshots = OrderedDict()
+_build_lock = threading.Lock()
+
+class UnknownStation(LookupError):
+    """The requested station isn't one of the organization's"""
+
+def _rounded(point):
+    if point is None:
+        return None
+    rounded = {"value": round(point["value"], 2), "ts": point["ts"]}
+    if "direction" in point:
+        rounded["direction"] = None if point["direction"] is None else round(point["direction"], 1)
+    return rounded
+
+def build_snapshot(config, station_id=None, hours=24):
+    """Current values, rolling extremes and a downsampled series for one station, as a JSON-ready dict"""
+    token = get_access_token(config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
+    datastreams = get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"])["data"]
+    stations = get_stations(config["BASE_URL"], token, config["ORGANIZATION_ID"])
+    if station_id is not None and station_id not in {s.get("id") for s in stations} | {ds.get("station_id") for ds in datastreams}:
+        raise UnknownStation(station_id)
+    station_id = station_id or config["STATION_ID"] or next((ds.get("station_id") for ds in datastreams), None)
+    station = next((s for s in stations if s.get("id") == station_id), {"id": station_id})
+    station_streams = [ds for ds in datastreams if ds.get("station_id") == station_id]
+    by_field = {(ds.get("metadata", {}).get("table"), ds.get("metadata", {}).get("field")): ds for ds in station_streams}
+    # Checked before the series are read so the fetched points reach the tracker, as on the dashboard
+    get_sensor_health().watch(station_streams)
+    now = int(time.time() * 1000)
+
+    # 72 hours of raw points from the shared cache covers the latest values and every extreme window
+    raw = {}
+    for table_field in card_fields(KIOSK_CARDS):
+        if table_field in by_field:
+            raw[table_field] = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                          by_field[table_field]["id"], now - 72 * HOUR_MS, now)
+
+    latest = {table_field: latest_point(series) for table_field, series in raw.items()}
+    readings = evaluate_cards(KIOSK_CARDS, now, {key: point for key, point in latest.items() if point}, raw,
+                              suspect=suspect_masks(raw, station_streams))
+    current = {spec["key"]: _rounded(readings[spec["key"]])
+               for spec in KIOSK_CARDS if spec["kiosk"] == "current" and spec["key"] in readings}
+    extremes = {spec["key"]: _rounded(readings.get(spec["key"])) for spec in KIOSK_CARDS if spec["kiosk"] == "extremes"}
+
+    series = {}
+    for key, (field_key, column) in SERIES_FIELDS.items():
+        table_field = CARDS_BY_KEY[field_key]["field"]
+        if table_field in by_field:
+            ts, values = load_window(config, token, by_field[table_field], now - hours * HOUR_MS, now, column, SERIES_POINTS)
+            series[key] = {"ts": ts.tolist(), "values": np.round(values, 2).tolist()}
+
+    return {
+        "station": {"id": station_id, "name": station.get("metadata", {}).get("name") or station_id},
+        "generated_at": now,
+        "observed_at": max((point["ts"] for point in current.values()), default=None),
+        "current": current,
+        "extremes": extremes,
+        "hours": hours,
+        "series": series
+    }
+
+def _svg_panel(lines, top, width, height, unit):
+    """Polylines for one chart panel with light gridlines; lines are (ts, values, color, label)"""
+    points = [(np.asarray(ts), np.asarray(values)) for ts, values, _, _ in lines if len(ts)]
+    if not points:
+        return ""
+    t0 = min(int(ts[0]) for ts, _ in points)
+    t1 = max(int(ts[-1]) for ts, _ in points)
+    v0 = min(float(np.nanmin(values)) for _, values in points)
+    v1 = max(float(np.nanmax(values)) for _, values in points)
+    step = max(1, round((v1 - v0) / 4 / 5) * 5) if v1 - v0 > 10 else 1 if v1 - v0 > 2 else 0.5
+    v0, v1 = np.floor(v0 / step) * step, np.ceil(v1 / step) * step + (0 if v1 > v0 else step)
+    left, plot_width = 48, width - 64
+
+    def x(ts):
+        return left + (ts - t0) / max(t1 - t0, 1) * plot_width
+
+    def y(values):
+        return top + height - (values - v0) / (v1 - v0) * height
+
+    parts = []
+    for tick in np.arange(v0, v1 + step / 2, step):
+        parts.append(f'<line x1="{left}" x2="{left + plot_width}" y1="{y(tick):.1f}" y2="{y(tick):.1f}" stroke="#334155"/>'
+                     f'<text x="{left - 6}" y="{y(tick) + 4:.1f}" text-anchor="end">{tick:g}</text>')
+    parts.append(f'<text x="{left}" y="{top - 8}">{escape(unit)}</text>')
+    legend_x = left + plot_width
+    for ts, values, color, label in reversed(lines):
+        if not len(ts):
+            continue
+        coords = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(x(np.asarray(ts)), y(np.asarray(values))))
+        parts.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="2"/>')
+        parts.append(f'<text x="{legend_x}" y="{top - 8}" text-anchor="end" fill="{color}">{escape(label)}</text>')
+        legend_x -= 8 * len(label) + 16
+    return "".join(parts)
+
+def render_svg(snapshot, width=800):
+    """Static wind and temperature chart for a snapshot, for viewers that can't run the dashboard"""
+    series = snapshot["series"]
+
+    def line(key, color, label):
+        data = series.get(key, {"ts": [], "values": []})
+        return data["ts"], data["values"], color, label
+
+    panel_height = 150
+    wind = _svg_panel([line("wind_speed_mph", "#38bdf8", "Wind"), line("wind_gust_mph", "#f97316", "Gust")],
+                      40, width, panel_height, "mph")
+    temperature = _svg_panel([line("temperature_f", "#f87171", "Temperature")], 40 + panel_height + 50, width, panel_height, "°F")
+    observed = snapshot["observed_at"]
+    caption = "No recent data"
+    if observed:
+        observed_local = datetime.fromtimestamp(observed / 1000, tz=ZoneInfo("America/Denver"))
+        caption = f"{snapshot['station']['name']} • last {snapshot['hours']} hours • updated {observed_local:%b %d %I:%M %p}"
+    height = 40 + 2 * panel_height + 80
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+            f'font-family="sans-serif" font-size="12" fill="#cbd5e1">'
+            f'<rect width="100%" height="100%" fill="#0f172a"/>{wind}{temperature}'
+            f'<text x="{width / 2}" y="{height - 12}" text-anchor="middle">{escape(caption)}</text></svg>')
+
+def _cached_snapshot(config, station_id, hours):
+    """The shared snapshot entry for (station, hours), rebuilding it once per refresh interval.
+    Expired entries are dropped and at most MAX_SNAPSHOTS are kept, so odd query strings can't grow the cache."""
+    key = (station_id, hours)
+    entry = _snapshots.get(key)
+    if entry is not None and time.monotonic() - entry["built"] < config["KIOSK_REFRESH_S"]:
+        return entry
+    with _build_lock:
+        entry = _snapshots.get(key)
+        if entry is not None and time.monotonic() - entry["built"] < config["KIOSK_REFRESH_S"]:
+            _snapshots.move_to_end(key)
+            return entry
+        for expired in [k for k, e in _snapshots.items() if time.monotonic() - e["built"] >= config["KIOSK_REFRESH_S"]]:
+            del _snapshots[expired]
+        snapshot = build_snapshot(config, station_id, hours)
+        body = json.dumps(snapshot, separators=(",", ":")).encode()
+        modified = (snapshot["observed_at"] or snapshot["generated_at"]) / 1000
+        entry = {
+            "built": time.monotonic(),
+            "snapshot": snapshot,
+            "json": body,
+            "svg": None,
+            "etag": '"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+            "modified": modified,
+            "last_modified": format_datetime(datetime.fromtimestamp(modified, tz=timezone.utc), usegmt=True)
+        }
+        _snapshots[key] = entry
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+        return entry
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return entry["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    try:
+        return parsedate_to_datetime(request.headers["if-modified-since"]).timestamp() >= int(entry["modified"])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+async def _serve(request, kind):
+    config = load_config()
+    if config["KIOSK_KEY"] and not hmac.compare_digest(request.query_params.get("key", ""), config["KIOSK_KEY"]):
+        return JSONResponse({"error": "Invalid or missing key"}, status_code=403)
+    try:
+        hours = min(max(int(request.query_params.get("hours", 24)), 1), MAX_HOURS)
+    except ValueError:
+        return JSONResponse({"error": "hours must be a whole number"}, status_code=400)
+
+    try:
+        entry = await run_in_threadpool(_cached_snapshot, config, request.query_params.get("station"), hours)
+    except UnknownStation:
+        return JSONResponse({"error": "Unknown station"}, status_code=404)
+    except UpstreamUnavailable as e:
+        retry = str(int(e.retry_after or config["KIOSK_REFRESH_S"]))
+        return JSONResponse({"error": "Campbell Cloud is unavailable"}, status_code=503, headers={"Retry-After": retry})
+
+    age = time.monotonic() - entry["built"]
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": entry["last_modified"],
+        "Cache-Control": f"public, max-age={max(0, int(config['KIOSK_REFRESH_S'] - age))}",
+        "Access-Control-Allow-Origin": "*"
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    if kind == "svg":
+        if entry["svg"] is None:
+            entry["svg"] = render_svg(entry["snapshot"]).encode()
+        return Response(entry["svg"], media_type="image/svg+xml", headers=headers)
+    return Response(entry["json"], media_type="application/json", headers=headers)
+
+async def current_json(request):
+    return await _serve(request, "json")
+
+async def charts_svg(request):
+    return await _serve(request, "svg")
+
+def kiosk_routes():
+    """Routes to mount alongside the dashboard"""
+    return [
+        Route("/kiosk/current.json", current_json, methods=["GET"]),
+        Route("/kiosk/charts.svg", charts_svg, methods=["GET"])
+    ]
@@ -0,0 +1,262 @@
+"""Replay recorded exports through a local stand-in for the Campbell Cloud API.
+
+    python -m api.replay serve tests/2025-10-14T19-44_export.csv --speed 100 --port 8800
+    python -m api.replay bench tests/2025-10-14T19-44_export.csv --speed max
+
+Point CAMPBELL_BASE_URL at http://127.0.0.1:8800 to run the dashboard against a replay.
+"""
+import argparse
+import json
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+REPLAY_STATION_ID = "replay-station"
+EXPORT_COLUMN_FIELDS = {
+    "Wind Speed (mph)": ("Five_Min", "WS_mph_S_WVT"),
+    "Wind Gust (mph)": ("Five_Min", "WS_mph_Max"),
+    "Wind Direction (°)": ("Five_Min", "WindDir_D1_WVT"),
+    "Temperature (°F)": ("Five_Min", "AirTF_Avg"),
+    "Humidity (%)": ("Five_Min", "RH")
+}
+_EXPORT_LABEL = re.compile(r"^(?P<field>\S+) \((?P<table>[^)]+)\)$")
+
+def load_recording(path):
+    """Read a raw-data or Export Data recording (CSV or Parquet) into {(table, field): (ts, values)}"""
+    if str(path).endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    ts = pd.to_datetime(df["Time"], utc=True).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    order = np.argsort(ts, kind="stable")
+
+    streams = {}
+    for column in df.columns:
+        match = _EXPORT_LABEL.match(str(column))
+        key = EXPORT_COLUMN_FIELDS.get(column) or (match and (match["table"], match["field"]))
+        if not key or key[0] == "Derived":
+            continue
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)[order]
+        present = ~np.isnan(values)
+        streams[key] = (ts[order][present], values[present])
+    return streams
+
+class ReplayClock:
+    """Maps wall-clock time onto recorded time at a given speed.
+
+    speed=None replays as fast as possible: everything is available at once and the recording is shifted
+    to end now. Otherwise recorded time advances `speed` times faster than the wall clock, and served
+    timestamps are compressed by the same factor so the newest replayed point is always "now".
+    Calling advance_to() switches to manual stepping."""
+
+    def __init__(self, start_ts, end_ts, speed=None):
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.speed = speed
+        self.started_ms = int(time.time() * 1000)
+        self.manual_ts = None
+
+    def recorded_now(self):
+        if self.manual_ts is not None:
+            return self.manual_ts
+        if not self.speed:
+            return self.end_ts
+        return self.start_ts + (time.time() * 1000 - self.started_ms) * self.speed
+
+    def advance_to(self, recorded_ts):
+        self.manual_ts = recorded_ts
+
+    def to_served(self, ts):
+        if not self.speed or self.manual_ts is not None:
+            return ts + (self.started_ms - self.end_ts)
+        return (self.started_ms + (np.asarray(ts) - self.start_ts) / self.speed).astype(np.int64)
+
+class ReplaySource:
+    """Recorded streams exposed as Campbell Cloud datastreams, gated by a replay clock"""
+
+    def __init__(self, streams, speed=None):
+        self.streams = {f"replay-{table}-{field}": {"table": table, "field": field, "ts": ts, "values": values}
+                        for (table, field), (ts, values) in streams.items()}
+        self.clock = ReplayClock(min(int(s["ts"][0]) for s in self.streams.values()),
+                                 max(int(s["ts"][-1]) for s in self.streams.values()), speed)
+        self.requests = 0
+
+    def datastreams(self):
+        return [{"id": ds_id, "station_id": REPLAY_STATION_ID,
+                 "metadata": {"table": stream["table"], "field": stream["field"]}}
+                for ds_id, stream in self.streams.items()]
+
+    def datapoints(self, datastream_id, start_epoch, end_epoch, limit):
+        """Points in [start_epoch, end_epoch] (served time) that the clock has reached"""
+        stream = self.streams[datastream_id]
+        available = np.searchsorted(stream["ts"], self.clock.recorded_now(), side="right")
+        served = self.clock.to_served(stream["ts"][:available])
+        lo = np.searchsorted(served, start_epoch, side="left")
+        hi = min(np.searchsorted(served, end_epoch, side="right"), lo + limit)
+        return [{"ts": int(ts), "value": float(value)} for ts, value in zip(served[lo:hi], stream["values"][lo:hi])]
+
+    def latest(self, datastream_id):
+        stream = self.streams[datastream_id]
+        available = np.searchsorted(stream["ts"], self.clock.recorded_now(), side="right")
+        if not available:
+            return []
+        return [{"ts": int(self.clock.to_served(stream["ts"][available - 1])), "value": float(stream["values"][available - 1])}]
+
+def _handler(source):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            source.requests += 1
+            self._send(200, {"access_token": "replay", "expires_in": 3600})
+
+        def do_GET(self):
+            source.requests += 1
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            path = url.path.rstrip("/")
+            match = re.search(r"/datastreams/([^/]+)/datapoints(/last)?$", path)
+            if match:
+                if match[1] not in source.streams:
+                    return self._send(404, {"message": "No matching item could be found."})
+                if match[2]:
+                    return self._send(200, {"data": source.latest(match[1])})
+                now = int(time.time() * 1000)
+                points = source.datapoints(match[1], int(query.get("startEpoch", 0)),
+                                           min(int(query.get("endEpoch", now)), now), int(query.get("limit", 15000)))
+                return self._send(200, {"data": points})
+            if path.endswith("/datastreams"):
+                offset, limit = int(query.get("offset", 0)), int(query.get("limit", 100))
+                return self._send(200, source.datastreams()[offset:offset + limit])
+            if path.endswith("/stations"):
+                return self._send(200, [{"id": REPLAY_STATION_ID, "metadata": {"name": "Replay"}}])
+            if path.endswith(("/station-groups", "/alert-events", "/alert-configurations")):
+                return self._send(200, [])
+            self._send(404, {"message": "No matching item could be found."})
+
+    return ReplayHandler
+
+def serve_replay(source, host="127.0.0.1", port=0):
+    """Start serving a replay source in a background thread; returns the server (server_address has the port)"""
+    server = ThreadingHTTPServer((host, port), _handler(source))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_benchmark(source, speed=None, window_hours=24):
+    """Step through the recording one arrival at a time, timing ingestion, aggregation and rendering"""
+    import plotly.io as pio
+    from api.throttle import configure_budget
+    from components.wind_chart import build_wind_figure
+    from store.derived import compute_derived
+    from store.ingest import fetch_range, ingest_points
+    from store.rollups import query_series
+    from utils.formatters import to_local_times
+
+    configure_budget(8, 1e6)
+    server = serve_replay(source)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    data_dir = tempfile.mkdtemp(prefix="replay-")
+    datastreams = {ds["metadata"]["field"]: ds for ds in source.datastreams()}
+    wind_fields = ("WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT")
+    arrivals = np.unique(np.concatenate([s["ts"] for s in source.streams.values()]))
+
+    timings = {"ingest": 0.0, "aggregate": 0.0, "render": 0.0}
+    points = 0
+    last_fetched = {ds_id: None for ds_id in source.streams}
+    replay_started = time.perf_counter()
+    for step, recorded_ts in enumerate(arrivals.tolist()):
+        if speed:
+            due = replay_started + (recorded_ts - arrivals[0]) / 1000 / speed
+            time.sleep(max(0.0, due - time.perf_counter()))
+        source.clock.advance_to(recorded_ts)
+        served_now = int(source.clock.to_served(recorded_ts))
+
+        started = time.perf_counter()
+        for ds in datastreams.values():
+            start = 0 if last_fetched[ds["id"]] is None else last_fetched[ds["id"]] + 1
+            for page in fetch_range(base_url, "replay", "replay", ds["id"], start, served_now):
+                if page is None:
+                    raise RuntimeError(f"Replay request failed for {ds['id']}")
+                ingest_points(data_dir, ds, *page)
+                points += page[0].size
+                last_fetched[ds["id"]] = int(page[0][-1])
+        timings["ingest"] += time.perf_counter() - started
+
+        if not all(field in datastreams for field in wind_fields):
+            continue
+        started = time.perf_counter()
+        window_start = served_now - window_hours * 60 * 60 * 1000
+        series = {field: query_series(data_dir, datastreams[field]["id"], window_start, served_now, 2500,
+                                      circular=field == "WindDir_D1_WVT") for field in wind_fields}
+        raw = {field: (s["ts"], s["direction"] if "direction" in s else s["mean"]) for field, s in series.items()}
+        compute_derived("vector_wind_speed", [raw["WS_mph_S_WVT"], raw["WindDir_D1_WVT"]])
+        timings["aggregate"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        (speed_ts, speed_values), (gust_ts, gust_values), (dir_ts, dir_values) = (raw[field] for field in wind_fields)
+        if speed_ts.size and gust_ts.size:
+            fig = build_wind_figure(to_local_times(speed_ts), speed_values, to_local_times(gust_ts), gust_values,
+                                    to_local_times(dir_ts), dir_values, window_hours, False, "mph")
+            pio.to_json(fig, validate=False)
+        timings["render"] += time.perf_counter() - started
+
+    elapsed = time.perf_counter() - replay_started
+    server.shutdown()
+    steps = len(arrivals)
+    return {
+        "steps": steps,
+        "points": points,
+        "elapsed_s": elapsed,
+        "requests": source.requests,
+        "ingest_points_per_s": points / timings["ingest"] if timings["ingest"] else None,
+        "ms_per_step": {stage: total / steps * 1000 for stage, total in timings.items()},
+        "steps_per_s": {stage: steps / total if total else None for stage, total in timings.items()}
+    }
+
+def _parse_speed(value):
+    return None if value in ("max", "0") else float(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded exports through a local Campbell Cloud stand-in")
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("recording", help="CSV or Parquet export")
+    parser.add_argument("--speed", default="max", help="1 for real time, 100 for 100x, max for as fast as possible")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--window-hours", type=int, default=24, help="Chart window rendered at each bench step")
+    args = parser.parse_args()
+
+    speed = _parse_speed(args.speed)
+    source = ReplaySource(load_recording(args.recording), speed if args.command == "serve" else None)
+    if args.command == "serve":
+        server = serve_replay(source, port=args.port)
+        print(f"Replaying {len(source.streams)} datastreams at http://127.0.0.1:{server.server_address[1]} (speed {args.speed})")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    report = run_benchmark(source, speed, args.window_hours)
+    print(f"Replayed {report['steps']} arrivals, {report['points']} points in {report['elapsed_s']:.2f}s "
+          f"({report['requests']} API requests)")
+    print(f"Ingestion: {report['ingest_points_per_s']:,.0f} points/s")
+    for stage, ms in report["ms_per_step"].items():
+        print(f"{stage:>10}: {ms:8.2f} ms/step  {report['steps_per_s'][stage] or 0:10,.1f} steps/s")
+
+if __name__ == "__main__":
+    main()
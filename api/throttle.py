@@ -0,0 +1,160 @@
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10
+DEFAULT_BURST = 20
+
+# Priority classes, most important first
+PRIORITY_LATEST = 0
+PRIORITY_HISTORY = 1
+PRIORITY_BACKFILL = 2
+PRIORITY_NAMES = ("latest", "history", "backfill")
+# Share of the token bucket and of the hourly quota each class must leave for the classes above it
+BUCKET_RESERVE = (0.0, 0.25, 0.5)
+QUOTA_RESERVE = (0.0, 0.1, 0.5)
+# Longest a request waits for the budget before giving up so the caller can serve cached data
+MAX_WAIT_S = (5.0, 2.0, 0.5)
+BASE_BACKOFF_S = 2.0
+MAX_BACKOFF_S = 300.0
+
+class UpstreamUnavailable(Exception):
+    """Raised when the request budget, a backoff or an upstream 429/5xx keeps a request from being served"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _header_float(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+def _retry_after_s(value):
+    """Seconds from a Retry-After header, given as delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RequestBudget:
+    """Process-wide cap on concurrent upstream requests plus a prioritized token bucket on their start rate.
+    Also tracks the upstream hourly quota and backs off after 429/5xx responses."""
+
+    def __init__(self, max_concurrent, per_second, burst=DEFAULT_BURST):
+        self.max_concurrent = max_concurrent
+        self.per_second = per_second
+        self.burst = burst
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = [0] * len(PRIORITY_NAMES)
+        self._failures = 0
+        self.backoff_until = 0.0
+        self.quota_limit = None
+        self.quota_remaining = None
+        self.quota_reset_at = None
+        self.denied = [0] * len(PRIORITY_NAMES)
+
+    def _refill(self, now):
+        if self.per_second:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def _wait_for(self, priority, now):
+        """Seconds until a request of this class may start"""
+        wait = max(0.0, self.backoff_until - now)
+        if self.quota_reset_at is not None and now >= self.quota_reset_at:
+            self.quota_remaining = self.quota_reset_at = None
+        if self.quota_remaining is not None and self.quota_remaining <= (self.quota_limit or 0) * QUOTA_RESERVE[priority]:
+            wait = max(wait, self.quota_reset_at - now)
+        if self.per_second:
+            needed = 1 + self.burst * BUCKET_RESERVE[priority]
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) / self.per_second)
+            if any(self._waiting[:priority]):
+                # Let the higher classes go first
+                wait = max(wait, 1 / self.per_second)
+        return wait
+
+    @contextmanager
+    def request(self, priority=PRIORITY_LATEST):
+        """Hold a slot for one upstream request, waiting for the budget or raising UpstreamUnavailable"""
+        deadline = time.monotonic() + MAX_WAIT_S[priority]
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_for(priority, now)
+                    if wait <= 0:
+                        break
+                    if now + wait > deadline:
+                        self.denied[priority] += 1
+                        raise UpstreamUnavailable(f"Upstream budget exhausted for {PRIORITY_NAMES[priority]} requests", wait)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+            self._tokens -= 1
+            if self.quota_remaining is not None:
+                self.quota_remaining -= 1
+
+        with self._slots:
+            yield self
+
+    def record_response(self, status_code, headers):
+        """Learn the hourly quota from ratelimit-* headers and back off after 429/5xx"""
+        now = time.monotonic()
+        with self._cond:
+            remaining = _header_float(headers, "ratelimit-remaining")
+            if remaining is not None:
+                self.quota_limit = _header_float(headers, "ratelimit-limit") or self.quota_limit or remaining
+                self.quota_remaining = remaining
+                self.quota_reset_at = now + (_header_float(headers, "ratelimit-reset") or 3600)
+
+            if status_code == 429 or status_code >= 500:
+                self._failures += 1
+                delay = _retry_after_s(headers.get("Retry-After"))
+                if delay is None:
+                    delay = min(MAX_BACKOFF_S, BASE_BACKOFF_S * 2 ** (self._failures - 1))
+                self.backoff_until = max(self.backoff_until, now + delay)
+            else:
+                self._failures = 0
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "backoff_s": max(0.0, self.backoff_until - now),
+                "quota_limit": self.quota_limit,
+                "quota_remaining": self.quota_remaining,
+                "denied": dict(zip(PRIORITY_NAMES, self.denied))
+            }
+
+_budget = RequestBudget(DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_REQUESTS_PER_SECOND)
+_budget_lock = threading.Lock()
+
+def get_budget():
+    """Return the shared request budget"""
+    return _budget
+
+def configure_budget(max_concurrent, per_second):
+    """Replace the shared request budget if its limits changed"""
+    global _budget
+    with _budget_lock:
+        if _budget.max_concurrent != max_concurrent or _budget.per_second != per_second:
+            _budget = RequestBudget(max_concurrent, per_second)
+    return _budget
@@ -5,13 +5,28 @@ from zoneinfo import ZoneInfo
 
 from config.settings import load_config
 from auth.authentication import check_password
-from api.campbell_client import get_access_token, get_datastreams
+from api.campbell_client import get_access_token, get_datastreams, get_stations
+from api.fanout import fan_out
+from api.throttle import UpstreamUnavailable, configure_budget, get_budget
+from store.alerts import configure_alerts, get_alert_engine
+from store.sensor_health import get_sensor_health
+from store.ring import configure_shared_ring
+from store.series_cache import configure_series_cache, get_series_cache
+from utils.figure_cache import figure_cache_stats
+from utils.profiling import start_rerun_profile
 from utils.styles import apply_custom_css
-from components.current_metrics import display_current_metrics
-from components.wind_rose import display_wind_rose
-from components.wind_chart import display_wind_chart
-from components.temp_humidity import display_temp_humidity_chart
-from components.system_status import display_system_status
+from utils.units import UNIT_SYSTEMS
+from components.current_metrics import current_metrics_requests, display_current_metrics
+from components.wind_rose import display_wind_rose, wind_rose_requests
+from components.wind_chart import display_wind_chart, wind_chart_requests
+from components.temp_humidity import display_temp_humidity_chart, temp_humidity_requests
+from components.system_status import display_system_status, system_status_requests
+from components.station_overview import (OVERVIEW, select_station, station_name, display_station_overview,
+                                         station_overview_requests)
+from components.progressive import render_sections
+from components.export_panel import display_export_panel
+from components.alerts_panel import display_alerts
+from components.profiling_panel import display_profiling_panel
 
 st.set_page_config(
     page_title="Silverton Mountain Weather Station",
@@ -24,17 +39,36 @@ st.set_page_config(
 )
 
 config = load_config()
+configure_budget(config["MAX_CONCURRENT_REQUESTS"], config["MAX_REQUESTS_PER_SECOND"])
+configure_series_cache(config["SERIES_CACHE_MB"])
+configure_shared_ring(config["DATA_DIR"])
+configure_alerts(config)
 
 if not check_password(config["APP_PASSWORD"]):
     st.stop()
 
+# Only sessions past the password check can ask for a profile, and only for one rerun
+if st.session_state.pop("profile_next_rerun", False) or "profile" in st.query_params:
+    st.query_params.pop("profile", None)
+    start_rerun_profile(config, label="Rerun")
+
 with st.sidebar:
     st.header("⚙️ Menu")
     
+    station_picker = st.container()
+    
     if st.button("🔄 Refresh & Clear Cache", width="stretch"):
         st.cache_data.clear()
+        get_series_cache().clear()
         st.rerun()
     
+    st.checkbox("📡 Streaming chart updates", key="streaming_charts",
+                help="Keep charts in the browser and only send new points on refresh")
+    
+    st.selectbox("📏 Units", list(UNIT_SYSTEMS), format_func=UNIT_SYSTEMS.get, key="unit_system",
+                 index=list(UNIT_SYSTEMS).index(config["UNIT_SYSTEM"]),
+                 help="Converted from the cached data at render time, without refetching")
+    
     if st.button("🚪 Logout", width="stretch"):
         st.session_state.authenticated = False
         st.query_params.clear()
@@ -49,12 +83,29 @@ with st.sidebar:
     st.markdown("- [Windy.com](https://windy.com)")
     
     st.markdown("### Data & Reports")
-    st.markdown("- [Export Data](#)")
-    st.markdown("- [Historical Reports](#)")
+    export_slot = st.container()
+    st.page_link("pages/Climatology.py", label="Historical Reports", icon="📊")
+    st.page_link("pages/Events.py", label="Wind Events", icon="🌪️")
+    
+    with st.expander("🧠 Cache Stats"):
+        series_stats = get_series_cache().stats()
+        st.caption(f"Series: {series_stats['entries']} streams, {series_stats['points']:,} points, "
+                   f"{series_stats['bytes'] / 1024:.0f} / {series_stats['budget_bytes'] / 1024 / 1024:.0f} MB budget")
+        st.caption(f"Hits {series_stats['hits']:,} • Misses {series_stats['misses']:,} • Evictions {series_stats['evictions']:,}")
+        st.caption(f"Figures: {figure_cache_stats()['entries']} cached")
+        budget_stats = get_budget().stats()
+        if budget_stats["quota_remaining"] is not None:
+            st.caption(f"Upstream quota: {budget_stats['quota_remaining']:.0f} / {budget_stats['quota_limit']:.0f} this hour")
+        deferred = ", ".join(f"{name} {count}" for name, count in budget_stats["denied"].items() if count)
+        if budget_stats["backoff_s"] or deferred:
+            st.caption(f"Backing off {budget_stats['backoff_s']:.0f}s • Deferred: {deferred or 'none'}")
+    
+    display_profiling_panel(config)
 
 apply_custom_css()
 
-st.title("Silverton Mountain Weather Station (12,280')")
+title_slot = st.empty()
+title_slot.title("Silverton Mountain Weather Station (12,280')")
 
 if 'auto_refresh_enabled' not in st.session_state:
     st.session_state.auto_refresh_enabled = False
@@ -77,6 +128,7 @@ col1, col2, col3 = st.columns([0.15, 0.15, 0.7])
 with col1:
     if st.button("🔄 Refresh & Clear Cache", width="stretch"):
         st.cache_data.clear()
+        get_series_cache().clear()
         st.rerun()
 with col2:
     button_label = "✅ Auto-refresh (ON)" if st.session_state.auto_refresh_enabled else "🔄 Auto-refresh every 5 min"
@@ -90,39 +142,76 @@ if st.session_state.auto_refresh_enabled:
         st.session_state.auto_refresh_enabled = False
         st.rerun()
 
-with st.spinner("Fetching data from Campbell Cloud..."):
-    try:
+try:
+    with st.spinner("Fetching data from Campbell Cloud..."):
         token = get_access_token(config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
-        
-        datastreams_response = get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"])
-        datastreams = datastreams_response["data"]
-        fetch_time = datastreams_response["fetched_at"]
-        
-        current_time = datetime.now(ZoneInfo("America/Denver"))
-        try:
-            fetch_dt = datetime.strptime(fetch_time, '%I:%M:%S %p').replace(
-                year=current_time.year, 
-                month=current_time.month, 
-                day=current_time.day,
-                tzinfo=ZoneInfo("America/Denver")
-            )
-            age_seconds = (current_time - fetch_dt).total_seconds()
-            if age_seconds < 10:
-                st.info(f"🆕 Data fetched fresh from API at {fetch_time}")
-            else:
-                st.success(f"⚡ Using cached data (fetched at {fetch_time})")
-        except:
-            st.info(f"📊 Data timestamp: {fetch_time}")
-        
-        display_current_metrics(config, token, datastreams)
-        display_wind_rose(config, token, datastreams)
-        display_wind_chart(config, token, datastreams)
-        display_temp_humidity_chart(config, token, datastreams)
-        display_system_status(config, token, datastreams)
-    
-    except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        st.exception(e)
+        # The catalog and station list only need the token, so they're fetched together
+        datastreams_response, _ = fan_out([
+            lambda: get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"]),
+            lambda: get_stations(config["BASE_URL"], token, config["ORGANIZATION_ID"])
+        ])
+    datastreams = datastreams_response["data"]
+    fetch_time = datastreams_response["fetched_at"]
+    get_alert_engine().watch(datastreams)
+    get_sensor_health().watch(datastreams)
+    
+    current_time = datetime.now(ZoneInfo("America/Denver"))
+    try:
+        fetch_dt = datetime.strptime(fetch_time, '%I:%M:%S %p').replace(
+            year=current_time.year, 
+            month=current_time.month, 
+            day=current_time.day,
+            tzinfo=ZoneInfo("America/Denver")
+        )
+        age_seconds = (current_time - fetch_dt).total_seconds()
+        if age_seconds < 10:
+            st.info(f"🆕 Data fetched fresh from API at {fetch_time}")
+        else:
+            st.success(f"⚡ Using cached data (fetched at {fetch_time})")
+    except:
+        st.info(f"📊 Data timestamp: {fetch_time}")
+    
+    with station_picker:
+        station, stations, datastreams = select_station(config, token, datastreams)
+    
+    with export_slot:
+        display_export_panel(config, token, datastreams)
+    
+    alerts_slot = st.container()
+    
+    # Every section's requests start at once and each section renders as soon as its own data is in
+    if station == OVERVIEW:
+        title_slot.title("Weather Stations")
+        render_sections([
+            ("all stations", station_overview_requests(config, token, datastreams),
+             lambda: display_station_overview(config, token, stations, datastreams))
+        ])
+    else:
+        if station and len(stations) > 1:
+            title_slot.title(station_name(station))
+        render_sections([
+            ("current measurements", current_metrics_requests(config, token, datastreams),
+             lambda: display_current_metrics(config, token, datastreams)),
+            ("wind rose", wind_rose_requests(config, token, datastreams),
+             lambda: display_wind_rose(config, token, datastreams)),
+            ("wind history", wind_chart_requests(config, token, datastreams),
+             lambda: display_wind_chart(config, token, datastreams)),
+            ("temperature & humidity history", temp_humidity_requests(config, token, datastreams),
+             lambda: display_temp_humidity_chart(config, token, datastreams)),
+            ("system status", system_status_requests(config, token, datastreams),
+             lambda: display_system_status(config, token, datastreams))
+        ])
+    
+    with alerts_slot:
+        display_alerts(config, token, datastreams)
+
+except UpstreamUnavailable as e:
+    retry = f" Retrying in about {e.retry_after:.0f}s." if e.retry_after else ""
+    st.warning(f"⏳ Campbell Cloud is limiting requests right now, so there's nothing cached to show yet.{retry}")
+
+except Exception as e:
+    st.error(f"Error fetching data: {str(e)}")
+    st.exception(e)
 
 st.markdown("---")
 st.caption("Data from Campbell Cloud API • <a href='https://animasdigital.com' target='_blank'>Built by Chauncey</a> • v1.2.1", unsafe_allow_html=True)
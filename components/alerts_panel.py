@@ -0,0 +1,74 @@
+import time
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from api.campbell_client import get_alert_configurations, get_alert_events
+from store.alerts import get_alert_engine
+
+CLOUD_LOOKBACK_S = 24 * 60 * 60
+CLOUD_STATUS_BITS = {1: "active", 2: "triggered", 4: "acknowledged", 8: "snoozed"}
+
+def _local_time(ts):
+    return datetime.fromtimestamp(ts / 1000, tz=ZoneInfo("America/Denver")).strftime("%b %d %I:%M %p")
+
+def _cloud_status(status):
+    return ", ".join(name for bit, name in CLOUD_STATUS_BITS.items() if (status or 0) & bit) or "cleared"
+
+def display_alerts(config, token, datastreams):
+    """Announce new alerts as toasts and list recent alerts for the selected station"""
+    engine = get_alert_engine()
+    engine.check_stale()
+    station_ids = {ds.get("id") for ds in datastreams}
+    
+    cloud_events = []
+    if config["ALERTS_SYNC_CLOUD"]:
+        # Rounded to 5 minutes so the cached request is reused across reruns
+        since = (int(time.time()) // 300 * 300 - CLOUD_LOOKBACK_S) * 1000
+        all_cloud_events = get_alert_events(config["BASE_URL"], token, config["ORGANIZATION_ID"], since)
+        engine.sync_external(all_cloud_events)
+        cloud_events = [e for e in all_cloud_events
+                        if (e.get("context", {}).get("datastream_id") or e.get("entity_id")) in station_ids]
+    
+    events = [e for e in engine.events() if e["datastream_id"] in station_ids]
+    active = set(engine.active())
+    
+    first_visit = "alerts_seen_seq" not in st.session_state
+    seen = st.session_state.get("alerts_seen_seq", 0)
+    for event in events:
+        if event["seq"] <= seen:
+            continue
+        if first_visit and (event["status"] != "triggered" or (event["rule"], event["datastream_id"]) not in active):
+            continue
+        icon = "🚨" if event["status"] == "triggered" else "✅"
+        st.toast(f"{event['label']} ({event['field']})" + (" cleared" if event["status"] == "cleared" else ""), icon=icon)
+    st.session_state.alerts_seen_seq = max([seen] + [e["seq"] for e in engine.events()])
+    
+    if not events and not cloud_events:
+        return
+    
+    active_here = [key for key in active if key[1] in station_ids]
+    with st.expander(f"🚨 Alerts ({len(active_here)} active)", expanded=bool(active_here)):
+        if events:
+            df = pd.DataFrame([{
+                'Time': _local_time(e["ts"]),
+                'Alert': e["label"],
+                'Status': e["status"].title(),
+                'Field': e["field"],
+                'Value': e["value"]
+            } for e in reversed(events)])
+            st.dataframe(df, width="stretch", hide_index=True)
+        
+        if cloud_events:
+            configurations = get_alert_configurations(config["BASE_URL"], token, config["ORGANIZATION_ID"])
+            st.caption(f"Campbell Cloud alert events ({len(configurations)} alert configurations)")
+            df = pd.DataFrame([{
+                'Time': _local_time(e.get("triggered_ts") or e.get("created_ts") or 0),
+                'Field': e.get("context", {}).get("datastream_field", ""),
+                'Value': e.get("context", {}).get("datapoint_value"),
+                'Status': _cloud_status(e.get("status"))
+            } for e in cloud_events])
+            st.dataframe(df, width="stretch", hide_index=True)
+        
+        if engine.suppressed:
+            st.caption(f"{engine.suppressed} repeat or historical alert(s) not announced")
@@ -0,0 +1,137 @@
+import time
+import streamlit as st
+import numpy as np
+import plotly.graph_objects as go
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from components.wind_rose import _build_wind_rose_figure
+from store.climatology import GROUPS, MONTH_NAMES, grouped_percentiles, histogram, history_extent, hours_above, paired_values
+from store.export import column_label
+from store.gaps import gap_summary, slot_interval
+from store.ingest import is_circular, sync_datastream
+from store.rollups import DAY_MS, HOUR_MS
+
+QUERIES = ["Percentiles", "Hours above", "Histogram", "Wind rose"]
+DEFAULT_FIELD = ("Five_Min", "WS_mph_Max")
+MAX_HISTORY_YEARS = 10
+
+def _local_date(ts):
+    return datetime.fromtimestamp(ts / 1000, tz=ZoneInfo("America/Denver")).strftime("%b %d, %Y")
+
+def _find(datastreams, table, field):
+    return next((ds for ds in datastreams if ds.get("metadata", {}).get("table") == table
+                 and ds.get("metadata", {}).get("field") == field), None)
+
+def display_history(config, token, datastreams):
+    """Local history extent for the datastreams in use, with a button to backfill more years"""
+    extents = {ds["id"]: history_extent(config["DATA_DIR"], ds["id"]) for ds in datastreams}
+    first = [extent[0] for extent in extents.values() if extent[0] is not None]
+    points = sum(extent[2] for extent in extents.values())
+    gaps = [gap_summary(config["DATA_DIR"], ds["id"]) for ds in datastreams if slot_interval(ds)]
+    gap_count = sum(summary["gaps"] for summary in gaps)
+    
+    col1, col2 = st.columns([0.7, 0.3])
+    with col1:
+        if first:
+            st.caption(f"Local history from {_local_date(min(first))} • {points:,} points")
+            if gap_count:
+                missing_h = sum(summary["missing_ms"] for summary in gaps) / HOUR_MS
+                st.caption(f"{gap_count:,} gaps, {missing_h:,.1f} hours missing • syncing re-requests them as the logger catches up")
+        else:
+            st.caption("No local history yet, sync some to start.")
+    with col2:
+        years = st.number_input("Years of history", min_value=1, max_value=MAX_HISTORY_YEARS, value=1, key="clim_years")
+        if st.button("⬇️ Sync history", width="stretch", key="clim_sync"):
+            with st.spinner(f"Backfilling {years} year(s)..."):
+                for ds in datastreams:
+                    sync_datastream(config["BASE_URL"], token, config["ORGANIZATION_ID"], config["DATA_DIR"], ds, years * 365)
+            wanted = int(time.time() * 1000) - years * 365 * DAY_MS
+            synced = [history_extent(config["DATA_DIR"], ds["id"])[0] for ds in datastreams]
+            if any(ts is None or ts > wanted + DAY_MS for ts in synced):
+                st.info("Part of the backfill was deferred to stay within the API budget. Sync again later to continue.")
+            st.rerun()
+
+def _bar_chart(frame, columns, y_title):
+    fig = go.Figure()
+    for column in columns:
+        fig.add_trace(go.Bar(x=[str(i) for i in frame.index], y=frame[column], name=str(column)))
+    fig.update_layout(barmode="group", yaxis_title=y_title, xaxis_title=frame.index.name,
+                      legend=dict(orientation="h", y=-0.2), margin=dict(t=30, b=60, l=40, r=20))
+    return fig
+
+def display_climatology(config, token, datastreams):
+    """Grouped percentile, threshold, histogram and wind rose queries over the local multi-year history"""
+    numeric = [ds for ds in datastreams if not is_circular(ds)]
+    if not numeric:
+        st.info("No datastreams for this station.")
+        return
+    
+    default = _find(numeric, *DEFAULT_FIELD) or numeric[0]
+    query = st.radio("Query", QUERIES, horizontal=True, key="clim_query")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if query == "Wind rose":
+            speed_ds = _find(datastreams, "Five_Min", "WS_mph_S_WVT")
+            dir_ds = _find(datastreams, "Five_Min", "WindDir_D1_WVT")
+            selected = [ds for ds in (speed_ds, dir_ds) if ds]
+            st.caption("Five-minute wind speed and direction")
+        else:
+            ds = st.selectbox("Datastream", numeric, index=numeric.index(default), format_func=column_label, key="clim_datastream")
+            selected = [ds]
+    with col2:
+        group = None
+        if query != "Wind rose":
+            group = st.selectbox("Group by", list(GROUPS), format_func=GROUPS.get, key="clim_group")
+    with col3:
+        month_names = st.multiselect("Months", MONTH_NAMES, key="clim_months", placeholder="All months")
+        months = [MONTH_NAMES.index(name) + 1 for name in month_names] or None
+    
+    display_history(config, token, selected)
+    data_dir = config["DATA_DIR"]
+    
+    if query == "Percentiles":
+        frame = grouped_percentiles(data_dir, ds["id"], group, months=months)
+        if frame.empty:
+            st.info("No local history matches.")
+            return
+        fig = go.Figure()
+        for column in ["p50", "p90", "p95", "p99", "max"]:
+            fig.add_trace(go.Scatter(x=[str(i) for i in frame.index], y=frame[column], mode="lines+markers", name=column))
+        fig.update_layout(yaxis_title=column_label(ds), xaxis_title=frame.index.name,
+                          legend=dict(orientation="h", y=-0.2), margin=dict(t=30, b=60, l=40, r=20))
+        st.plotly_chart(fig, config={'responsive': True})
+        st.dataframe(frame.round(2), width="stretch")
+    
+    elif query == "Hours above":
+        threshold = st.number_input("Threshold", value=40.0, step=5.0, key="clim_threshold")
+        frame = hours_above(data_dir, ds["id"], threshold, group, months=months)
+        if frame.empty:
+            st.info("No local history matches.")
+            return
+        st.plotly_chart(_bar_chart(frame, ["hours_above"], f"Hours ≥ {threshold:g}"), config={'responsive': True})
+        st.dataframe(frame.round({"hours_above": 1, "hours_observed": 1, "share": 3}), width="stretch")
+    
+    elif query == "Histogram":
+        bin_width = st.number_input("Bin width", min_value=0.1, value=5.0, step=1.0, key="clim_bin_width")
+        frame = grouped_percentiles(data_dir, ds["id"], group, percentiles=(0,), months=months)
+        if frame.empty:
+            st.info("No local history matches.")
+            return
+        low = np.floor(frame["p0"].min() / bin_width) * bin_width
+        edges = np.arange(low, frame["max"].max() + bin_width, bin_width)
+        counts = histogram(data_dir, ds["id"], edges, group, months=months)
+        shares = counts / counts.sum() * 100
+        st.plotly_chart(_bar_chart(shares, list(shares.columns), "% of observations"), config={'responsive': True})
+        st.dataframe(counts, width="stretch")
+    
+    else:
+        if len(selected) < 2:
+            st.info("This station has no five-minute wind speed and direction.")
+            return
+        speeds, directions = paired_values(data_dir, speed_ds["id"], dir_ds["id"], months=months)
+        if not speeds.size:
+            st.info("No local history matches.")
+            return
+        st.plotly_chart(_build_wind_rose_figure(speeds, directions), config={'responsive': True})
+        st.caption(f"{speeds.size:,} paired observations" + (f" in {', '.join(month_names)}" if month_names else ""))
@@ -1,171 +1,106 @@
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from utils.formatters import degrees_to_cardinal
 from utils.styles import get_metric_card_css
-from api.campbell_client import get_latest_datapoint, get_historical_datapoints
+from utils.cards import CARD_SPECS, CARDS_BY_KEY, card_fields, evaluate_cards
+from utils.units import to_display, unit_for, unit_system
+from api.campbell_client import get_latest_datapoint
+from store.derived import DERIVED_SERIES, derived_datastreams, get_derived_series
+from store.series_cache import RETENTION_MS, get_series
+from store.sensor_health import get_sensor_health, sensor_ids, suspect_masks
+from components.progressive import recent_series_request
+
+def current_metrics_requests(config, token, datastreams):
+    """Latest values plus the recent series behind the peaks, highs and lows and the derived cards"""
+    specs = [spec for spec in CARD_SPECS if spec.get("card", True)]
+    by_field = _by_field(datastreams)
+    requests = [
+        lambda ds_id=by_field[table_field]["id"]: get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds_id)
+        for table_field in card_fields(specs, ("latest",)) if table_field in by_field
+    ]
+    series_fields = card_fields(specs, ("max", "min"))
+    for spec in specs:
+        if spec["stat"] == "derived":
+            series_fields += [("Five_Min", field) for field in DERIVED_SERIES[spec["derived"]]["inputs"]
+                              if ("Five_Min", field) not in series_fields]
+    requests += [recent_series_request(config, token, by_field[table_field]["id"])
+                 for table_field in series_fields if table_field in by_field]
+    return requests
+
+def _by_field(datastreams):
+    return {(ds.get("metadata", {}).get("table", ""), ds.get("metadata", {}).get("field", "")): ds for ds in datastreams}
+
+def _suspect_note(reasons, color):
+    """Card line marking a reading taken while its sensor looked faulty"""
+    if not reasons:
+        return ""
+    return f'<p style="color: {color}; font-size: 11px; font-weight: bold; margin: 4px 0 0 0;">⚠️ Suspect: {"; ".join(reasons)}</p>'
+
+@lru_cache(maxsize=512)
+def _card_html(key, value, ts, direction, suspect, units):
+    """One card's HTML in the given unit system, memoized on its reading so unchanged cards cost a cache lookup on reruns"""
+    spec = CARDS_BY_KEY[key]
+    start_color, end_color, text_color = spec["colors"]
+    if spec["format"] == "speed":
+        value_text = f'{to_display(value, "speed", units):.1f} {unit_for("speed", units)}'
+    elif spec["format"] == "temperature":
+        value_text = f'{to_display(value, "temperature", units):.1f}{unit_for("temperature", units)}'
+    elif spec["format"] == "direction":
+        value_text = f'{value:.0f}° ({degrees_to_cardinal(value)})'
+    else:
+        value_text = f'{value:.0f}%'
+    direction_text = ""
+    if direction is not None:
+        direction_text = f'<p style="color: {text_color}; font-size: 16px; font-weight: bold; margin: 4px 0 0 0;">{direction:.0f}° ({degrees_to_cardinal(direction)})</p>'
+    timestamp = datetime.fromtimestamp(ts / 1000, tz=ZoneInfo("America/Denver")).strftime("%b %d %I:%M %p")
+    return f'<div class="metric-card" style="background: linear-gradient(135deg, {start_color} 0%, {end_color} 100%);"><p class="metric-label" style="color: {text_color};">{spec["label"]}</p><h2 class="metric-value">{value_text}</h2>{direction_text}{_suspect_note(suspect, text_color)}<p style="color: {text_color}; font-size: 11px; margin: 8px 0 0 0;">{timestamp}</p></div>'
+
+@lru_cache(maxsize=32)
+def _grid_html(cards):
+    """The grid around a tuple of card HTML strings, rebuilt only when a card changed"""
+    return '<div class="metrics-grid">' + "".join(cards) + '</div>'
 
 def display_current_metrics(config, token, datastreams):
     """Display current weather measurements"""
     st.subheader("🌤️ Current Measurements")
     
-    current_measurements = {}
-    gust_datastream_id = None
-    wind_dir_datastream_id = None
-    temp_datastream_id = None
-    
-    for ds in datastreams:
-        metadata = ds.get("metadata", {})
-        table_name = metadata.get("table", "")
-        field_name = metadata.get("field", "")
-        
-        if table_name == "Five_Min" and field_name in ["WS_mph_Max", "WS_mph_S_WVT", "WindDir_D1_WVT", "AirTF_Avg", "RH"]:
-            latest = get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds.get("id"))
-            if latest and latest.get("data"):
-                current_measurements[field_name] = {
-                    "value": latest["data"][0]["value"],
-                    "timestamp": datetime.fromtimestamp(latest["data"][0]["ts"] / 1000, tz=ZoneInfo("America/Denver"))
-                }
-                
-                if field_name == "WS_mph_Max":
-                    gust_datastream_id = ds.get("id")
-                elif field_name == "WindDir_D1_WVT":
-                    wind_dir_datastream_id = ds.get("id")
-                elif field_name == "AirTF_Avg":
-                    temp_datastream_id = ds.get("id")
-    
-    peak_gust_1h = None
-    peak_gust_24h = None
-    peak_gust_72h = None
-    temp_high_24h = None
-    temp_low_24h = None
-    
-    if temp_datastream_id:
-        end_time = int(datetime.now().timestamp() * 1000)
-        start_time_24h = end_time - (24 * 60 * 60 * 1000)
-        temp_history_24h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                      temp_datastream_id, start_time_24h, end_time)
-        if temp_history_24h and temp_history_24h.get("data"):
-            temp_points = temp_history_24h["data"]
-            if temp_points:
-                max_point = max(temp_points, key=lambda x: x["value"])
-                min_point = min(temp_points, key=lambda x: x["value"])
-                temp_high_24h = {
-                    "value": max_point["value"],
-                    "timestamp": datetime.fromtimestamp(max_point["ts"] / 1000, tz=ZoneInfo("America/Denver"))
-                }
-                temp_low_24h = {
-                    "value": min_point["value"],
-                    "timestamp": datetime.fromtimestamp(min_point["ts"] / 1000, tz=ZoneInfo("America/Denver"))
-                }
-    
-    if gust_datastream_id and wind_dir_datastream_id:
-        end_time = int(datetime.now().timestamp() * 1000)
-        
-        start_time_1h = end_time - (2 * 60 * 60 * 1000)
-        gust_history_1h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                     gust_datastream_id, start_time_1h, end_time, limit=12)
-        dir_history_1h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                    wind_dir_datastream_id, start_time_1h, end_time, limit=12)
-        if gust_history_1h and gust_history_1h.get("data") and dir_history_1h and dir_history_1h.get("data"):
-            gust_points = gust_history_1h["data"]
-            dir_points = dir_history_1h["data"]
-            if gust_points and dir_points:
-                max_point = max(gust_points, key=lambda x: x["value"])
-                dir_lookup = {p["ts"]: p["value"] for p in dir_points}
-                peak_gust_1h = {
-                    "value": max_point["value"],
-                    "timestamp": datetime.fromtimestamp(max_point["ts"] / 1000, tz=ZoneInfo("America/Denver")),
-                    "direction": dir_lookup.get(max_point["ts"])
-                }
-        
-        start_time_24h = end_time - (24 * 60 * 60 * 1000)
-        gust_history_24h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                      gust_datastream_id, start_time_24h, end_time)
-        dir_history_24h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                     wind_dir_datastream_id, start_time_24h, end_time)
-        if gust_history_24h and gust_history_24h.get("data") and dir_history_24h and dir_history_24h.get("data"):
-            gust_points = gust_history_24h["data"]
-            dir_points = dir_history_24h["data"]
-            if gust_points and dir_points:
-                max_point = max(gust_points, key=lambda x: x["value"])
-                dir_lookup = {p["ts"]: p["value"] for p in dir_points}
-                peak_gust_24h = {
-                    "value": max_point["value"],
-                    "timestamp": datetime.fromtimestamp(max_point["ts"] / 1000, tz=ZoneInfo("America/Denver")),
-                    "direction": dir_lookup.get(max_point["ts"])
-                }
-        
-        start_time_72h = end_time - (72 * 60 * 60 * 1000)
-        gust_history_72h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                      gust_datastream_id, start_time_72h, end_time)
-        dir_history_72h = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"], 
-                                                     wind_dir_datastream_id, start_time_72h, end_time)
-        if gust_history_72h and gust_history_72h.get("data") and dir_history_72h and dir_history_72h.get("data"):
-            gust_points = gust_history_72h["data"]
-            dir_points = dir_history_72h["data"]
-            if gust_points and dir_points:
-                max_point = max(gust_points, key=lambda x: x["value"])
-                dir_lookup = {p["ts"]: p["value"] for p in dir_points}
-                peak_gust_72h = {
-                    "value": max_point["value"],
-                    "timestamp": datetime.fromtimestamp(max_point["ts"] / 1000, tz=ZoneInfo("America/Denver")),
-                    "direction": dir_lookup.get(max_point["ts"])
-                }
+    specs = [spec for spec in CARD_SPECS if spec.get("card", True)]
+    by_field = _by_field(datastreams)
+    health = get_sensor_health()
+    
+    latest = {}
+    for table_field in card_fields(specs, ("latest",)):
+        if table_field in by_field:
+            response = get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], by_field[table_field].get("id"))
+            if response and response.get("data"):
+                latest[table_field] = {"value": response["data"][0]["value"], "ts": response["data"][0]["ts"]}
+    
+    # One 72h series per stream; every card's window is a view into the same cached buffers.
+    # Readings logged while a sensor looked iced or stuck don't count toward the peaks, highs and lows.
+    end_time = int(datetime.now().timestamp() * 1000)
+    series = {}
+    for table_field in card_fields(specs, ("max", "min")):
+        if table_field in by_field:
+            series[table_field] = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"], by_field[table_field].get("id"),
+                                             end_time - RETENTION_MS, end_time)
+    
+    wanted = {name for spec in specs if spec["stat"] == "derived" for name in (spec["derived"], spec.get("direction")) if name}
+    derived = {}
+    for derived_ds in derived_datastreams(datastreams):
+        if derived_ds["derived"] in wanted:
+            derived[derived_ds["derived"]] = get_derived_series(config, token, derived_ds, end_time - (24 * 60 * 60 * 1000), end_time)
+    
+    values = evaluate_cards(specs, end_time, latest, series, derived, suspect_masks(series, datastreams))
+    units = unit_system()
+    cards = []
+    for spec in specs:
+        point = values.get(spec["key"])
+        if point is None:
+            continue
+        suspect = health.suspect_at(sensor_ids(datastreams, spec["field"]), point["ts"]) if spec["stat"] == "latest" else []
+        cards.append(_card_html(spec["key"], point["value"], point["ts"], point.get("direction"), tuple(suspect), units))
     
     st.markdown(get_metric_card_css(), unsafe_allow_html=True)
-    
-    grid_html = '<div class="metrics-grid">'
-    
-    if "WS_mph_S_WVT" in current_measurements:
-        data = current_measurements["WS_mph_S_WVT"]
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #475569 0%, #334155 100%);"><p class="metric-label" style="color: #cbd5e1;">Wind Speed</p><h2 class="metric-value">{data["value"]:.1f} mph</h2><p style="color: #cbd5e1; font-size: 11px; margin: 8px 0 0 0;">{data["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if "WS_mph_Max" in current_measurements:
-        data = current_measurements["WS_mph_Max"]
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #0369a1 0%, #075985 100%);"><p class="metric-label" style="color: #bae6fd;">Gust</p><h2 class="metric-value">{data["value"]:.1f} mph</h2><p style="color: #bae6fd; font-size: 11px; margin: 8px 0 0 0;">{data["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if "WindDir_D1_WVT" in current_measurements:
-        data = current_measurements["WindDir_D1_WVT"]
-        direction = data['value']
-        cardinal = degrees_to_cardinal(direction)
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #1e40af 0%, #1e3a8a 100%);"><p class="metric-label" style="color: #93c5fd;">Wind Direction</p><h2 class="metric-value">{direction:.0f}° ({cardinal})</h2><p style="color: #93c5fd; font-size: 11px; margin: 8px 0 0 0;">{data["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if peak_gust_1h:
-        direction_text = ""
-        if peak_gust_1h.get("direction") is not None:
-            cardinal = degrees_to_cardinal(peak_gust_1h["direction"])
-            direction_text = f'<p style="color: #422006; font-size: 16px; font-weight: bold; margin: 4px 0 0 0;">{peak_gust_1h["direction"]:.0f}° ({cardinal})</p>'
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #facc15 0%, #eab308 100%);"><p class="metric-label" style="color: #422006;">1-Hour Peak Gust</p><h2 class="metric-value">{peak_gust_1h["value"]:.1f} mph</h2>{direction_text}<p style="color: #422006; font-size: 11px; margin: 8px 0 0 0;">{peak_gust_1h["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if peak_gust_24h:
-        direction_text = ""
-        if peak_gust_24h.get("direction") is not None:
-            cardinal = degrees_to_cardinal(peak_gust_24h["direction"])
-            direction_text = f'<p style="color: #fed7aa; font-size: 16px; font-weight: bold; margin: 4px 0 0 0;">{peak_gust_24h["direction"]:.0f}° ({cardinal})</p>'
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #ea580c 0%, #c2410c 100%);"><p class="metric-label" style="color: #fed7aa;">24-Hour Peak Gust</p><h2 class="metric-value">{peak_gust_24h["value"]:.1f} mph</h2>{direction_text}<p style="color: #fed7aa; font-size: 11px; margin: 8px 0 0 0;">{peak_gust_24h["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if peak_gust_72h:
-        direction_text = ""
-        if peak_gust_72h.get("direction") is not None:
-            cardinal = degrees_to_cardinal(peak_gust_72h["direction"])
-            direction_text = f'<p style="color: #fecaca; font-size: 16px; font-weight: bold; margin: 4px 0 0 0;">{peak_gust_72h["direction"]:.0f}° ({cardinal})</p>'
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #dc2626 0%, #991b1b 100%);"><p class="metric-label" style="color: #fecaca;">72-Hour Peak Gust</p><h2 class="metric-value">{peak_gust_72h["value"]:.1f} mph</h2>{direction_text}<p style="color: #fecaca; font-size: 11px; margin: 8px 0 0 0;">{peak_gust_72h["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if "RH" in current_measurements:
-        data = current_measurements["RH"]
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #0891b2 0%, #0e7490 100%);"><p class="metric-label" style="color: #a5f3fc;">Humidity</p><h2 class="metric-value">{data["value"]:.0f}%</h2><p style="color: #a5f3fc; font-size: 11px; margin: 8px 0 0 0;">{data["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if "AirTF_Avg" in current_measurements:
-        data = current_measurements["AirTF_Avg"]
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #7c3aed 0%, #6d28d9 100%);"><p class="metric-label" style="color: #e9d5ff;">Temperature</p><h2 class="metric-value">{data["value"]:.1f}°F</h2><p style="color: #e9d5ff; font-size: 11px; margin: 8px 0 0 0;">{data["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if temp_low_24h:
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #0ea5e9 0%, #0284c7 100%);"><p class="metric-label" style="color: #e0f2fe;">24-Hour Low</p><h2 class="metric-value">{temp_low_24h["value"]:.1f}°F</h2><p style="color: #e0f2fe; font-size: 11px; margin: 8px 0 0 0;">{temp_low_24h["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    if temp_high_24h:
-        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #ec4899 0%, #db2777 100%);"><p class="metric-label" style="color: #fce7f3;">24-Hour High</p><h2 class="metric-value">{temp_high_24h["value"]:.1f}°F</h2><p style="color: #fce7f3; font-size: 11px; margin: 8px 0 0 0;">{temp_high_24h["timestamp"].strftime("%b %d %I:%M %p")}</p></div>'
-    
-    grid_html += '</div>'
-    
-    st.html(grid_html)
+    st.html(_grid_html(tuple(cards)))
@@ -0,0 +1,100 @@
+import time
+import streamlit as st
+import numpy as np
+import pandas as pd
+from components.climatology import display_history
+from components.wind_chart import build_wind_figure
+from store.events import EVENT_KINDS, SECTORS, event_streams, query_events, update_events
+from store.history import read_range
+from store.rollups import HOUR_MS
+from utils.formatters import degrees_to_cardinal, to_local_times
+from utils.units import QUANTITY_UNITS, convert, to_display, unit_for
+
+EVENT_LIMITS = [10, 25, 100, 1000]
+# History shown either side of an event on its chart
+CHART_PAD_MS = 3 * HOUR_MS
+
+def _duration(ms):
+    minutes = int(ms // 60000)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+def _direction(degrees):
+    return "" if np.isnan(degrees) else f"{degrees:.0f}° ({degrees_to_cardinal(degrees)})"
+
+def _trigger_name(spec):
+    return "the gust" if spec["field"] == "WS_mph_Max" else "the average speed"
+
+def _events_frame(found):
+    """Table of events in the session's units"""
+    unit = unit_for("speed")
+    starts = to_local_times(found["start"])
+    return pd.DataFrame({
+        "Start": starts.strftime("%b %d, %Y %I:%M %p"),
+        "Duration": [_duration(ms) for ms in (found["end"] - found["start"]).tolist()],
+        f"Peak Gust ({unit})": np.round(to_display(found["peak_gust"], "speed"), 1),
+        "Peak Gust At": to_local_times(found["peak_gust_ts"]).strftime("%I:%M %p"),
+        f"Peak Speed ({unit})": np.round(to_display(found["peak_speed"], "speed"), 1),
+        f"Mean Speed ({unit})": np.round(to_display(found["mean_speed"], "speed"), 1),
+        "Direction": [_direction(degrees) for degrees in found["direction"].tolist()]
+    })
+
+def _display_event_chart(config, streams, start, end):
+    """Wind chart zoomed to one event, with the event shaded"""
+    lo, hi = start - CHART_PAD_MS, end + CHART_PAD_MS
+    speed_ts, speed_values = read_range(config["DATA_DIR"], streams["WS_mph_S_WVT"]["id"], lo, hi)
+    gust_ts, gust_values = read_range(config["DATA_DIR"], streams["WS_mph_Max"]["id"], lo, hi)
+    dir_ts, dir_values = (read_range(config["DATA_DIR"], streams["WindDir_D1_WVT"]["id"], lo, hi)
+                          if "WindDir_D1_WVT" in streams else (np.empty(0, dtype=np.int64), np.empty(0)))
+    if not speed_ts.size or not gust_ts.size:
+        st.info("No stored wind data around this event.")
+        return
+    hours = int(-(-(hi - lo) // HOUR_MS))
+    fig = build_wind_figure(to_local_times(speed_ts), to_display(speed_values, "speed"),
+                            to_local_times(gust_ts), to_display(gust_values, "speed"),
+                            to_local_times(dir_ts), dir_values, hours, False, unit_for("speed"))
+    event_start, event_end = to_local_times(np.array([start, end]))
+    fig.add_vrect(x0=event_start, x1=event_end, fillcolor="rgba(250, 204, 21, 0.15)", line_width=0)
+    fig.update_layout(xaxis_title=f"{event_start.strftime('%b %d, %Y %I:%M %p')} - {event_end.strftime('%b %d %I:%M %p')}")
+    st.plotly_chart(fig, config={'responsive': True})
+
+def display_events(config, token, datastreams):
+    """Wind events found in the local history, filtered by peak gust and direction, with a zoomed chart of the selected one"""
+    streams = event_streams(datastreams)
+    if "WS_mph_S_WVT" not in streams or "WS_mph_Max" not in streams:
+        st.info("This station has no five-minute wind speed and gusts.")
+        return
+
+    unit = unit_for("speed")
+    col1, col2, col3, col4 = st.columns([0.3, 0.2, 0.3, 0.2])
+    with col1:
+        kind = st.radio("Events", list(EVENT_KINDS), format_func=lambda k: EVENT_KINDS[k]["label"], horizontal=True,
+                        key="events_kind")
+    with col2:
+        min_gust = st.number_input(f"Peak gust at least ({unit})", min_value=0.0, value=0.0, step=5.0, key="events_min_gust")
+    with col3:
+        sectors = st.multiselect("Direction", SECTORS, key="events_sectors", placeholder="Any direction")
+    with col4:
+        limit = st.selectbox("Show", EVENT_LIMITS, index=1, format_func=lambda n: f"Latest {n}", key="events_limit")
+    spec = EVENT_KINDS[kind]
+    st.caption(f"{spec['label']} start when {_trigger_name(spec)} reaches {to_display(spec['on'], 'speed'):.0f} {unit} "
+               f"and end once it stays below {to_display(spec['off'], 'speed'):.0f} {unit} for an hour.")
+
+    display_history(config, token, list(streams.values()))
+    events = update_events(config["DATA_DIR"], datastreams)
+
+    started = time.perf_counter()
+    found = query_events(events, kind, convert(min_gust, unit, QUANTITY_UNITS["speed"]["imperial"]) if min_gust else None,
+                         sectors, limit=limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{found['start'].size} of {events[kind]['start'].size:,} {spec['label'].lower()} • query {elapsed_ms:.1f} ms")
+    if not found["start"].size:
+        st.info("No events match. Sync more history or loosen the filters.")
+        return
+
+    selection = st.dataframe(_events_frame(found), hide_index=True, width="stretch", on_select="rerun",
+                             selection_mode="single-row", key="events_table")
+    rows = selection.selection.rows
+    if rows and rows[0] < found["start"].size:
+        _display_event_chart(config, streams, int(found["start"][rows[0]]), int(found["end"][rows[0]]))
+    else:
+        st.caption("Select an event to open its charts.")
@@ -0,0 +1,73 @@
+import streamlit as st
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from store.derived import derived_datastreams
+from api.export import EXPORT_TICKET_S, export_routes_mounted, register_export
+from store.export import EXPORT_FORMATS, column_label, iter_export
+
+DEFAULT_EXPORT_FIELDS = {"WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT"}
+DEFAULT_EXPORT_DAYS = 7
+
+def _local_epoch_ms(day, at=time.min):
+    """Epoch ms for a station-local date and time of day"""
+    return int(datetime.combine(day, at, tzinfo=ZoneInfo("America/Denver")).timestamp() * 1000)
+
+def display_export_panel(config, token, datastreams):
+    """Sidebar panel to export any datastreams over any date range as CSV or Parquet"""
+    with st.expander("📤 Export Data"):
+        ds_by_id = {ds.get("id"): ds for ds in datastreams + derived_datastreams(datastreams)}
+        default_ids = [ds_id for ds_id, ds in ds_by_id.items()
+                       if ds.get("metadata", {}).get("table") == "Five_Min"
+                       and ds.get("metadata", {}).get("field") in DEFAULT_EXPORT_FIELDS]
+        
+        selected_ids = st.multiselect(
+            "Datastreams",
+            list(ds_by_id),
+            default=default_ids,
+            format_func=lambda ds_id: column_label(ds_by_id[ds_id]),
+            key="export_datastreams"
+        )
+        
+        today = datetime.now(ZoneInfo("America/Denver")).date()
+        date_range = st.date_input(
+            "Date range",
+            value=(today - timedelta(days=DEFAULT_EXPORT_DAYS), today),
+            max_value=today,
+            key="export_range"
+        )
+        
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+        
+        if not selected_ids or len(date_range) != 2:
+            st.caption("Pick at least one datastream and a start and end date.")
+            return
+        
+        start_day, end_day = date_range
+        start_ts = _local_epoch_ms(start_day)
+        end_ts = _local_epoch_ms(end_day, time.max)
+        extension, mime = EXPORT_FORMATS[export_format]
+        selected = [ds_by_id[ds_id] for ds_id in selected_ids]
+        file_name = f"campbell_export_{start_day:%Y%m%d}-{end_day:%Y%m%d}.{extension}"
+        
+        if export_routes_mounted():
+            # Streamed by the /export route while it's built, so the file is never held in memory
+            ticket_key = (tuple(selected_ids), start_ts, end_ts, export_format)
+            ticket = st.session_state.get("export_ticket")
+            if ticket is None or ticket["key"] != ticket_key or datetime.now() >= ticket["renew_at"]:
+                ticket = {"key": ticket_key, "url": register_export(selected, start_ts, end_ts, export_format, file_name),
+                          "renew_at": datetime.now() + timedelta(seconds=EXPORT_TICKET_S / 2)}
+                st.session_state["export_ticket"] = ticket
+            st.link_button("⬇️ Download", ticket["url"], width="stretch")
+            st.caption("The file is built while it downloads, a month at a time.")
+        else:
+            st.download_button(
+                "⬇️ Download",
+                data=lambda: b"".join(iter_export(config, token, selected, start_ts, end_ts, export_format)),
+                file_name=file_name,
+                mime=mime,
+                on_click="ignore",
+                width="stretch",
+                key="export_download"
+            )
+            st.caption("The file is built when you click, a month at a time. Start with `streamlit run server.py` "
+                       "to stream long ranges instead of buffering them.")
@@ -0,0 +1,35 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from store.rollups import DAY_MS, HOUR_MS
+
+COMPARE_OPTIONS = ["Off", "Previous period", "Yesterday", "Last week", "Custom start"]
+OVERLAY_COLOR = "rgba(203, 213, 225, 0.8)"
+
+def comparison_offset(key, hours):
+    """Compare-with picker for a chart; returns (offset_ms, label) or (None, None) when off"""
+    choice = st.selectbox(
+        "Compare with",
+        COMPARE_OPTIONS,
+        key=f"{key}_compare",
+        help="Overlay an earlier period lined up on relative time, served from the local store and cache only"
+    )
+    if choice == "Off":
+        return None, None
+    if choice == "Previous period":
+        return hours * HOUR_MS, "previous period"
+    if choice == "Yesterday":
+        return DAY_MS, "yesterday"
+    if choice == "Last week":
+        return 7 * DAY_MS, "last week"
+    
+    start_local = datetime.now(ZoneInfo("America/Denver")) - timedelta(hours=hours)
+    day = st.date_input(
+        "Comparison starts",
+        value=(start_local - timedelta(days=7)).date(),
+        max_value=start_local.date(),
+        key=f"{key}_compare_date"
+    )
+    # Same time of day as the current window, so the offset stays put as the window slides
+    compare_start = datetime.combine(day, start_local.timetz())
+    return int((start_local - compare_start).total_seconds() * 1000), f"{day:%b %d}"
@@ -0,0 +1,35 @@
+import os
+import streamlit as st
+from utils.profiling import PROFILE_SUFFIX, list_profiles, profile_dir
+
+def _request_profile():
+    st.session_state.profile_next_rerun = True
+
+def _read_profile(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def display_profiling_panel(config):
+    """Sidebar panel to profile the next rerun and download recent captures"""
+    with st.expander("⏱️ Profiling"):
+        st.button("Profile this rerun", on_click=_request_profile, width="stretch", key="profile_rerun_btn",
+                  help="Sample the whole script run and save a speedscope profile (also ?profile=1)")
+        
+        out_dir = profile_dir(config)
+        profiles = list_profiles(out_dir)
+        if not profiles:
+            st.caption("No captures yet.")
+            return
+        
+        st.caption(f"Last {len(profiles)} capture(s), open with speedscope.app")
+        for name in profiles:
+            path = os.path.join(out_dir, name)
+            st.download_button(
+                name.removesuffix(PROFILE_SUFFIX),
+                data=lambda path=path: _read_profile(path),
+                file_name=name,
+                mime="application/json",
+                on_click="ignore",
+                width="stretch",
+                key=f"profile_download_{name}"
+            )
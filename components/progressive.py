@@ -0,0 +1,73 @@
+import time
+import streamlit as st
+from concurrent.futures import FIRST_COMPLETED, wait
+from api.fanout import start_all
+from api.throttle import UpstreamUnavailable
+from store.ingest import MAX_API_WINDOW_HOURS, RANGE_HOURS, load_window
+from store.series_cache import RETENTION_MS, get_series
+
+def fields_by_name(datastreams, table, fields):
+    """{field: datastream} for the given fields of one table"""
+    found = {}
+    for ds in datastreams:
+        metadata = ds.get("metadata", {})
+        if metadata.get("table", "") == table and metadata.get("field", "") in fields:
+            found[metadata.get("field")] = ds
+    return found
+
+def recent_series_request(config, token, datastream_id):
+    """Request for a datastream's full cached window, which every shorter recent view is served from"""
+    def request():
+        end_time = int(time.time() * 1000)
+        return get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"], datastream_id, end_time - RETENTION_MS, end_time)
+    return request
+
+def range_requests(config, token, datastreams, range_key):
+    """Requests for a chart's selected range: the cached recent window, or a local-history sync for long ranges"""
+    hours = RANGE_HOURS[st.session_state.get(range_key, "24 Hours")]
+    if hours <= MAX_API_WINDOW_HOURS:
+        return [recent_series_request(config, token, ds["id"]) for ds in datastreams]
+
+    def request(ds):
+        end_time = int(time.time() * 1000)
+        return load_window(config, token, ds, end_time - hours * 60 * 60 * 1000, end_time)
+    return [lambda ds=ds: request(ds) for ds in datastreams]
+
+def _render(slot, placeholder, render):
+    placeholder.empty()
+    with slot:
+        try:
+            render()
+        except UpstreamUnavailable as e:
+            retry = f" Retrying in about {e.retry_after:.0f}s." if e.retry_after else ""
+            st.warning(f"⏳ Campbell Cloud is limiting requests right now, so this section has nothing cached to show yet.{retry}")
+        except Exception as e:
+            st.error(f"Error loading this section: {str(e)}")
+            st.exception(e)
+
+def render_sections(sections):
+    """Start every section's data requests at once, then render each section in its place on the page as soon as
+    its own requests resolve, with a placeholder until then.
+    sections are (label, requests, render) in page order; requests are zero-argument callables that warm the
+    caches render reads from, so a failed or mispredicted request just means render fetches for itself."""
+    slots = []
+    for label, _, _ in sections:
+        slot = st.container()
+        placeholder = slot.empty()
+        placeholder.caption(f"⏳ Loading {label}...")
+        slots.append((slot, placeholder))
+
+    futures = start_all(call for _, requests, _ in sections for call in requests)
+    pending = {}
+    offset = 0
+    for index, (_, requests, _) in enumerate(sections):
+        pending[index] = set(futures[offset:offset + len(requests)])
+        offset += len(requests)
+
+    not_done = set(futures)
+    while pending:
+        for index in [i for i in sorted(pending) if not pending[i] & not_done]:
+            _render(*slots[index], sections[index][2])
+            del pending[index]
+        if pending:
+            _, not_done = wait(not_done, return_when=FIRST_COMPLETED)
@@ -0,0 +1,99 @@
+import streamlit as st
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from html import escape
+from utils.formatters import degrees_to_cardinal
+from utils.styles import get_metric_card_css
+from utils.units import to_display, unit_for
+from api.campbell_client import get_latest_datapoint, get_stations, get_station_groups
+from api.fanout import fetch_latest_values
+
+OVERVIEW = "__overview__"
+OVERVIEW_FIELDS = ["WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT", "AirTF_Avg", "RH"]
+
+def station_name(station):
+    """Display name for a station"""
+    metadata = station.get("metadata", {})
+    return metadata.get("name") or metadata.get("description") or station.get("id", "")[:8]
+
+def station_overview_requests(config, token, datastreams):
+    """Latest values for every station's overview fields"""
+    ids = [ds.get("id") for ds in datastreams
+           if ds.get("metadata", {}).get("table", "") == "Five_Min" and ds.get("metadata", {}).get("field", "") in OVERVIEW_FIELDS]
+    return [lambda ds_id=ds_id: get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds_id) for ds_id in ids]
+
+def display_station_overview(config, token, stations, datastreams):
+    """Display latest conditions for every station in one grid"""
+    st.subheader("🗺️ All Stations")
+
+    wanted = {}
+    for ds in datastreams:
+        metadata = ds.get("metadata", {})
+        if metadata.get("table", "") == "Five_Min" and metadata.get("field", "") in OVERVIEW_FIELDS:
+            wanted[ds.get("id")] = (ds.get("station_id"), metadata.get("field"))
+
+    with st.spinner(f"Loading latest values for {len(stations)} stations..."):
+        latest = fetch_latest_values(config["BASE_URL"], token, config["ORGANIZATION_ID"], list(wanted))
+
+    by_station = {}
+    for ds_id, (station_id, field_name) in wanted.items():
+        point = latest.get(ds_id)
+        if point and point.get("data"):
+            by_station.setdefault(station_id, {})[field_name] = point["data"][0]
+
+    st.markdown(get_metric_card_css(), unsafe_allow_html=True)
+
+    grid_html = '<div class="metrics-grid">'
+    for station in stations:
+        values = by_station.get(station.get("id"), {})
+        lines = []
+        if "WS_mph_S_WVT" in values:
+            wind = f'{to_display(values["WS_mph_S_WVT"]["value"], "speed"):.0f}'
+            if "WS_mph_Max" in values:
+                wind += f'G{to_display(values["WS_mph_Max"]["value"], "speed"):.0f}'
+            if "WindDir_D1_WVT" in values:
+                wind = f'{degrees_to_cardinal(values["WindDir_D1_WVT"]["value"])} {wind}'
+            lines.append(f'<h2 class="metric-value">{wind} {unit_for("speed")}</h2>')
+        if "AirTF_Avg" in values:
+            line = f'{to_display(values["AirTF_Avg"]["value"], "temperature"):.1f}{unit_for("temperature")}'
+            if "RH" in values:
+                line += f' • {values["RH"]["value"]:.0f}%'
+            lines.append(f'<p style="color: #e2e8f0; font-size: 16px; font-weight: bold; margin: 4px 0 0 0;">{line}</p>')
+        if values:
+            newest = max(point["ts"] for point in values.values())
+            updated = datetime.fromtimestamp(newest / 1000, tz=ZoneInfo("America/Denver")).strftime("%b %d %I:%M %p")
+            lines.append(f'<p style="color: #cbd5e1; font-size: 11px; margin: 8px 0 0 0;">{updated}</p>')
+        else:
+            lines.append('<p style="color: #cbd5e1; font-size: 13px; margin: 8px 0 0 0;">No recent data</p>')
+        grid_html += f'<div class="metric-card" style="background: linear-gradient(135deg, #475569 0%, #334155 100%);"><p class="metric-label" style="color: #cbd5e1;">{escape(station_name(station))}</p>{"".join(lines)}</div>'
+    grid_html += '</div>'
+
+    st.html(grid_html)
+
+def select_station(config, token, datastreams):
+    """Sidebar station picker; returns (selected station or OVERVIEW, stations, station datastreams)"""
+    station_ids = {ds.get("station_id") for ds in datastreams}
+    stations = [s for s in get_stations(config["BASE_URL"], token, config["ORGANIZATION_ID"]) if s.get("id") in station_ids]
+    if len(stations) < 2:
+        return (stations[0] if stations else None), stations, datastreams
+
+    groups = get_station_groups(config["BASE_URL"], token, config["ORGANIZATION_ID"])
+    if groups:
+        group_names = {g.get("id"): g.get("metadata", {}).get("name") or g.get("id", "")[:8] for g in groups}
+        group_id = st.selectbox("Station group", [None] + list(group_names), key="station_group",
+                                format_func=lambda gid: "All stations" if gid is None else group_names[gid])
+        if group_id is not None:
+            group = next(g for g in groups if g.get("id") == group_id)
+            members = set(group.get("metadata", {}).get("stations", []))
+            stations = [s for s in stations if s.get("id") in members] or stations
+
+    names = {s.get("id"): station_name(s) for s in stations}
+    options = [OVERVIEW] + list(names)
+    default_id = config.get("STATION_ID")
+    index = options.index(default_id) if default_id in options else 0
+    selected = st.selectbox("Station", options, index=index, key="station_id",
+                            format_func=lambda sid: "🗺️ All stations overview" if sid == OVERVIEW else names[sid])
+    if selected == OVERVIEW:
+        return OVERVIEW, stations, datastreams
+    station = next(s for s in stations if s.get("id") == selected)
+    return station, stations, [ds for ds in datastreams if ds.get("station_id") == selected]
@@ -0,0 +1,104 @@
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+from bisect import bisect_left
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+FULL_RESEND_EVERY = 12
+DEFAULT_HEIGHT = 450
+
+_component = components.declare_component(
+    "streaming_chart",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "streaming_chart")
+)
+
+def _iso(ts):
+    """Format an epoch-ms timestamp the same way Plotly serializes the chart's datetimes"""
+    return datetime.fromtimestamp(ts / 1000, tz=ZoneInfo("America/Denver")).isoformat()
+
+def _json_values(values):
+    """Values with NaN and infinities as None, since the component args must be strict JSON for the browser"""
+    return [value if value == value and value not in (float("inf"), float("-inf")) else None for value in values]
+
+def _full_message(state, spec, series, config, height):
+    """Build a message that replaces the browser's chart with the full cached spec.
+    The spec comes from pio.to_json, which already writes missing values as null."""
+    state["revision"] += 1
+    state["sent_ts"] = [list(ts_list) for ts_list, _ in series]
+    state["extends"] = 0
+    state["message"] = {
+        "kind": "full",
+        "revision": state["revision"],
+        "spec": spec,
+        "config": config,
+        "height": height
+    }
+    return state["message"]
+
+def _extend_message(state, series):
+    """Build a message with only the appended points, a no-op if there are none, or None if the browser can't be patched"""
+    traces, xs, ys, drops = [], [], [], []
+    for trace_index, (ts_list, values) in enumerate(series):
+        sent = state["sent_ts"][trace_index]
+        last_sent = sent[-1] if sent else None
+        drop = bisect_left(sent, ts_list[0]) if ts_list else len(sent)
+        start = 0 if last_sent is None else bisect_left(ts_list, last_sent + 1)
+
+        # Anything other than "old points fell off, new points appended" needs a full render
+        if ts_list[:start] != sent[drop:]:
+            return None
+
+        traces.append(trace_index)
+        xs.append([_iso(ts) for ts in ts_list[start:]])
+        ys.append(_json_values(values[start:]))
+        drops.append(drop)
+
+    if not any(xs) and not any(drops):
+        # Nothing to push; re-sending the last message could mean re-sending the whole spec
+        return {"kind": "noop", "revision": state["revision"]}
+
+    all_ts = [ts for ts_list, _ in series for ts in ts_list[:1] + ts_list[-1:]]
+    state["revision"] += 1
+    state["extends"] += 1
+    for trace_index, (ts_list, _) in enumerate(series):
+        state["sent_ts"][trace_index] = list(ts_list)
+    state["message"] = {
+        "kind": "extend",
+        "revision": state["revision"],
+        "base": state["revision"] - 1,
+        "traces": traces,
+        "x": xs,
+        "y": ys,
+        "drop": drops,
+        "range": [_iso(min(all_ts)), _iso(max(all_ts))]
+    }
+    return state["message"]
+
+def streaming_plotly_chart(key, spec, series, reset_key, config=None, height=None):
+    """Render a chart that, after its first full render, only pushes newly appended points"""
+    state_key = f"_streaming_chart_{key}"
+    state = st.session_state.get(state_key)
+    ack = st.session_state.get(f"{state_key}_ack")
+    height = height or DEFAULT_HEIGHT
+
+    if state is None:
+        state = {"revision": 0, "reset_key": None, "handled_ack": None, "sent_ts": [], "extends": 0, "message": None}
+        st.session_state[state_key] = state
+
+    needs_full = (
+        state["message"] is None
+        or state["reset_key"] != reset_key
+        or (ack is not None and ack.get("need_full") != state["handled_ack"])
+        or state["extends"] >= FULL_RESEND_EVERY
+        or len(state["sent_ts"]) != len(series)
+    )
+    if ack is not None:
+        state["handled_ack"] = ack.get("need_full")
+    state["reset_key"] = reset_key
+
+    message = None if needs_full else _extend_message(state, series)
+    if message is None:
+        message = _full_message(state, spec, series, config or {}, height)
+
+    _component(**message, key=f"{state_key}_ack", default=None)
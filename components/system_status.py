@@ -2,7 +2,91 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from zoneinfo import ZoneInfo
+import numpy as np
+from plotly.subplots import make_subplots
 from api.campbell_client import get_latest_datapoint
+from components.progressive import fields_by_name
+from store.diagnostics import HISTORY_DAYS, daily_trend, days_until, diagnostic_datastreams, diagnostic_history, sync_diagnostic
+from store.ingest import publish_points
+from utils.figure_cache import data_version, get_cached_figure, scatter_trace
+from utils.formatters import to_local_times
+from utils.units import convert, unit_for
+
+DIAGNOSTIC_RANGES = {"30 Days": 30, "60 Days": 60, "90 Days": HISTORY_DAYS}
+DIAGNOSTIC_COLORS = ["#facc15", "#f97316", "#38bdf8"]
+STATUS_FIELDS = {"Hourly": ["BattV_Min"], "Twelve_Hours": ["PTemp_C_Max"], "RadioDiagnostics": ["RadioStrength"]}
+
+def _build_diagnostics_figure(histories):
+    """One row per diagnostic field, sharing the time axis"""
+    fig = make_subplots(rows=len(histories), cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                        subplot_titles=[spec["label"] for _, spec, _ in histories])
+    for row, (_, spec, (ts, values)) in enumerate(histories, start=1):
+        fig.add_trace(scatter_trace(
+            len(ts),
+            x=to_local_times(ts),
+            y=values,
+            mode='lines',
+            line=dict(color=DIAGNOSTIC_COLORS[(row - 1) % len(DIAGNOSTIC_COLORS)], width=1.5),
+            name=spec["label"],
+            hovertemplate=f'%{{y:.2f}} {spec["unit"]}<extra></extra>'
+        ), row=row, col=1)
+        fig.update_yaxes(title_text=spec["unit"] or None, row=row, col=1)
+    fig.update_layout(height=180 * len(histories) + 60, showlegend=False, hovermode='x unified',
+                      margin=dict(l=60, r=20, t=40, b=40))
+    return fig
+
+def display_diagnostics_history(config, token, datastreams):
+    """Battery, panel temperature and radio trends from local history, synced only when a new record is due"""
+    diagnostics = diagnostic_datastreams(datastreams)
+    if not diagnostics:
+        return
+    
+    with st.expander("📈 Diagnostics History"):
+        days = DIAGNOSTIC_RANGES[st.radio("History", list(DIAGNOSTIC_RANGES), horizontal=True, index=2, key="diag_range")]
+        
+        histories = []
+        for ds, spec in diagnostics:
+            sync_diagnostic(config, token, ds, spec)
+            series = diagnostic_history(config["DATA_DIR"], ds, spec, days)
+            if series[0].size:
+                histories.append((ds, spec, series))
+        if not histories:
+            st.caption("No diagnostic history stored yet.")
+            return
+        
+        battery = next(((ds, series) for ds, spec, series in histories if spec["unit"] == "V"), None)
+        if battery:
+            ds, (_, values) = battery
+            slope_7d = daily_trend(config["DATA_DIR"], ds["id"], 7)
+            slope_30d = daily_trend(config["DATA_DIR"], ds["id"], 30)
+            remaining = days_until(float(values[-1]), slope_7d, config["ALERT_BATTERY_V"])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("7-Day Battery Trend", "—" if slope_7d is None else f"{slope_7d * 1000:+.0f} mV/day",
+                          help="Slope of the daily minimum voltage")
+            with col2:
+                st.metric("30-Day Battery Trend", "—" if slope_30d is None else f"{slope_30d * 1000:+.0f} mV/day")
+            with col3:
+                st.metric(f"Days to {config['ALERT_BATTERY_V']:g} V", "—" if remaining is None else f"{remaining:.0f}",
+                          help="At the 7-day discharge rate")
+                if remaining is not None and remaining < 14:
+                    st.caption("⚠️ Battery is trending toward discharge.")
+        
+        version = data_version(*[series for _, _, series in histories])
+        cached = get_cached_figure(
+            "diagnostics", version, days, tuple(spec["label"] for _, spec, _ in histories),
+            lambda: _build_diagnostics_figure(histories)
+        )
+        st.plotly_chart(cached["figure"], config={'responsive': True})
+
+def system_status_requests(config, token, datastreams):
+    """Latest diagnostic values plus the diagnostics history sync, which only fetches once a record is due"""
+    requests = [
+        lambda ds_id=ds["id"]: get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds_id)
+        for table, fields in STATUS_FIELDS.items() for ds in fields_by_name(datastreams, table, fields).values()
+    ]
+    requests += [lambda ds=ds, spec=spec: sync_diagnostic(config, token, ds, spec) for ds, spec in diagnostic_datastreams(datastreams)]
+    return requests
 
 def display_system_status(config, token, datastreams):
     """Display battery and system status"""
@@ -32,6 +116,8 @@ def display_system_status(config, token, datastreams):
                 })
                 battery_voltage = value
                 battery_timestamp = timestamp
+                publish_points(ds.get("id"), np.array([latest["data"][0]["ts"]], dtype=np.int64),
+                               np.array([np.nan if value is None else value], dtype=np.float64))
         
         elif table_name == "Twelve_Hours" and field_name == "PTemp_C_Max":
             latest = get_latest_datapoint(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds.get("id"))
@@ -113,8 +199,8 @@ def display_system_status(config, token, datastreams):
                     value=f"{panel_temp:.1f} °C",
                     help=f"Updated: {temp_timestamp.strftime('%I:%M:%S %p')}"
                 )
-                temp_f = (panel_temp * 9/5) + 32
-                st.caption(f"= {temp_f:.1f} °F")
+                if unit_for("temperature") != "°C":
+                    st.caption(f"= {convert(panel_temp, '°C', unit_for('temperature')):.1f} {unit_for('temperature')}")
         
         with col3:
             if radio_strength is not None:
@@ -150,6 +236,8 @@ def display_system_status(config, token, datastreams):
                 radio_age_text = f"{radio_age_hours:.1f} hours old"
             st.caption(f"📡 Radio updated: {radio_timestamp.strftime('%Y-%m-%d %I:%M:%S %p')} ({radio_age_text}) - RadioDiagnostics table")
         
+        display_diagnostics_history(config, token, datastreams)
+        
         if all_status_data:
             with st.expander("📊 View All System Data"):
                 df = pd.DataFrame(all_status_data)
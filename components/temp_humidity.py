@@ -1,12 +1,139 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
 from plotly.subplots import make_subplots
 from datetime import datetime
-from zoneinfo import ZoneInfo
-from api.campbell_client import get_historical_datapoints
+from components.period_overlay import OVERLAY_COLOR, comparison_offset
+from components.progressive import fields_by_name, range_requests
+from components.streaming_chart import streaming_plotly_chart
+from store.derived import derived_datastreams, get_derived_series, load_derived_window
+from store.ingest import MAX_API_WINDOW_HOURS, RANGE_HOURS, load_window, with_breaks
+from store.overlay import overlay_series
+from store.series_cache import get_series
+from utils.formatters import to_local_times
+from utils.figure_cache import data_version, figure_spec, get_cached_figure, scatter_trace
+from utils.units import convert, to_display, unit_for, unit_system
 from browser_detection import browser_detection_engine
 
+DERIVED_TRACES = {
+    "dew_point": {"name": "Dew Point", "color": "#22c55e", "dash": "dot"},
+    "wind_chill": {"name": "Wind Chill", "color": "#a78bfa", "dash": "dash"}
+}
+
+def _build_temp_humidity_figure(temp_times, temp_values, humidity_times, humidity_values, temp_hours, is_mobile, unit,
+                                derived_traces=(), overlays=()):
+    """Build the temperature and humidity figure in the given temperature unit, with optional derived temperature traces
+    and comparison overlays"""
+    hover = f'%{{y:.1f}} {unit}<extra></extra>'
+    overlay_temps = [values for kind, _, _, values in overlays if kind == "temperature"]
+    temp_low = float(np.nanmin([np.nanmin(temp_values)] + [np.nanmin(values) for _, _, values in derived_traces]
+                               + [np.nanmin(values) for values in overlay_temps]))
+    temp_high = float(np.nanmax([np.nanmax(temp_values)] + [np.nanmax(values) for values in overlay_temps]))
+    temp_padding = (temp_high - temp_low) * 4
+    temp_min = temp_low - temp_padding
+    temp_max = temp_high + temp_padding
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    fig.add_trace(
+        scatter_trace(
+            len(temp_times),
+            x=temp_times,
+            y=temp_values,
+            mode='lines',
+            name='Temperature',
+            line=dict(color='#FF0000', width=2, shape='spline'),
+            hovertemplate=hover
+        ),
+        secondary_y=False
+    )
+    
+    fig.add_trace(
+        scatter_trace(
+            len(humidity_times),
+            x=humidity_times,
+            y=humidity_values,
+            mode='lines',
+            name='Humidity',
+            line=dict(color='#87CEEB', width=2, shape='spline'),
+            hovertemplate='%{y:.0f}%<extra></extra>'
+        ),
+        secondary_y=True
+    )
+    
+    for name, times, values in derived_traces:
+        style = DERIVED_TRACES[name]
+        fig.add_trace(
+            scatter_trace(
+                len(times),
+                x=times,
+                y=values,
+                mode='lines',
+                name=style["name"],
+                line=dict(color=style["color"], width=1.5, dash=style["dash"]),
+                hovertemplate=hover
+            ),
+            secondary_y=False
+        )
+    
+    for kind, name, times, values in overlays:
+        humidity = kind == "humidity"
+        fig.add_trace(
+            scatter_trace(
+                len(times),
+                x=times,
+                y=values,
+                mode='lines',
+                name=name,
+                line=dict(color=OVERLAY_COLOR, width=1.5, dash='dot' if humidity else 'dash'),
+                hovertemplate='%{y:.0f}%<extra></extra>' if humidity else hover
+            ),
+            secondary_y=humidity
+        )
+    
+    fig.add_hline(
+        y=convert(32, "°F", unit),
+        line_dash="dash",
+        line_color="#60a5fa",
+        line_width=2,
+        secondary_y=False
+    )
+    
+    layout_config = {
+        'xaxis_title': f"Previous {temp_hours} Hours" if temp_hours <= MAX_API_WINDOW_HOURS else f"Previous {temp_hours // 24} Days",
+        'hovermode': 'x unified',
+        'showlegend': True,
+        'legend': dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="left",
+            x=0
+        ),
+        'margin': dict(l=60, r=20, t=50, b=80),
+        'xaxis': dict(
+            tickformat='%b %d %I%p',
+            tickangle=-45,
+            range=[min(temp_times), max(temp_times)],
+            nticks=10
+        )
+    }
+    
+    if is_mobile:
+        layout_config['height'] = 350
+    
+    fig.update_layout(**layout_config)
+    
+    fig.update_yaxes(title_text=f"Temperature ({unit})", range=[temp_min, temp_max], secondary_y=False)
+    fig.update_yaxes(title_text="Humidity (%)", range=[0, 100], secondary_y=True)
+    
+    return fig
+
+def temp_humidity_requests(config, token, datastreams):
+    """Temperature and humidity for the selected range"""
+    found = fields_by_name(datastreams, "Five_Min", ["AirTF_Avg", "RH"])
+    return range_requests(config, token, list(found.values()), "temp_time_range")
+
 def display_temp_humidity_chart(config, token, datastreams):
     """Display temperature and humidity history chart"""
     if 'browser_info' not in st.session_state:
@@ -22,13 +149,14 @@ def display_temp_humidity_chart(config, token, datastreams):
     
     temp_time_range = st.radio(
         "Select time range:",
-        ["12 Hours", "24 Hours", "72 Hours"],
+        list(RANGE_HOURS),
         horizontal=True,
         index=1,
         key="temp_time_range"
     )
     
-    temp_hours = 12 if temp_time_range == "12 Hours" else 24 if temp_time_range == "24 Hours" else 72
+    temp_hours = RANGE_HOURS[temp_time_range]
+    compare_offset, compare_label = comparison_offset("temp", temp_hours)
     
     temp_id = None
     humidity_id = None
@@ -45,104 +173,100 @@ def display_temp_humidity_chart(config, token, datastreams):
                 humidity_id = ds.get("id")
     
     if temp_id and humidity_id:
-        with st.spinner(f"Loading {temp_hours} hours of temperature & humidity data..."):
+        with st.spinner(f"Loading {temp_time_range.lower()} of temperature & humidity data..."):
             end_time = int(datetime.now().timestamp() * 1000)
             start_time = end_time - (temp_hours * 60 * 60 * 1000)
+            ds_by_id = {ds.get("id"): ds for ds in datastreams}
             
-            temp_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                 temp_id, start_time, end_time)
-            humidity_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                     humidity_id, start_time, end_time)
+            if temp_hours <= MAX_API_WINDOW_HOURS:
+                temp_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                       temp_id, start_time, end_time)
+                humidity_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                           humidity_id, start_time, end_time)
+                if temp_data is not None and humidity_data is not None:
+                    # Break the lines at indexed gaps instead of drawing across them
+                    temp_data = with_breaks(config["DATA_DIR"], ds_by_id[temp_id], *temp_data)
+                    humidity_data = with_breaks(config["DATA_DIR"], ds_by_id[humidity_id], *humidity_data)
+            else:
+                temp_data = load_window(config, token, ds_by_id[temp_id], start_time, end_time, breaks=True)
+                humidity_data = load_window(config, token, ds_by_id[humidity_id], start_time, end_time, breaks=True)
             
-            if temp_data and humidity_data:
-                temp_points = temp_data.get("data", [])
-                humidity_points = humidity_data.get("data", [])
+            if temp_data is not None and humidity_data is not None:
+                temp_ts, temp_values = temp_data
+                humidity_ts, humidity_values = humidity_data
+                # Converted copy for display; the cached series stay in station units
+                temp_values = to_display(temp_values, "temperature")
                 
-                if temp_points and humidity_points:
-                    temp_times = [datetime.fromtimestamp(p['ts']/1000, tz=ZoneInfo("America/Denver")) for p in temp_points]
-                    temp_values = [p['value'] for p in temp_points]
-                    
-                    humidity_times = [datetime.fromtimestamp(p['ts']/1000, tz=ZoneInfo("America/Denver")) for p in humidity_points]
-                    humidity_values = [p['value'] for p in humidity_points]
-                    
-                    temp_range = max(temp_values) - min(temp_values)
-                    temp_padding = temp_range * 4
-                    temp_min = min(temp_values) - temp_padding
-                    temp_max = max(temp_values) + temp_padding
-                    
-                    fig = make_subplots(specs=[[{"secondary_y": True}]])
-                    
-                    fig.add_trace(
-                        go.Scatter(
-                            x=temp_times,
-                            y=temp_values,
-                            mode='lines',
-                            name='Temperature',
-                            line=dict(color='#FF0000', width=2, shape='spline'),
-                            hovertemplate='%{y:.1f} °F<extra></extra>'
-                        ),
-                        secondary_y=False
-                    )
-                    
-                    fig.add_trace(
-                        go.Scatter(
-                            x=humidity_times,
-                            y=humidity_values,
-                            mode='lines',
-                            name='Humidity',
-                            line=dict(color='#87CEEB', width=2, shape='spline'),
-                            hovertemplate='%{y:.0f}%<extra></extra>'
-                        ),
-                        secondary_y=True
-                    )
-                    
-                    fig.add_hline(
-                        y=32,
-                        line_dash="dash",
-                        line_color="#60a5fa",
-                        line_width=2,
-                        secondary_y=False
-                    )
+                if temp_ts.size and humidity_ts.size:
+                    temp_times = to_local_times(temp_ts)
+                    humidity_times = to_local_times(humidity_ts)
                     
                     is_mobile = st.checkbox("Enable touch-friendly mode", value=is_mobile_device, key="temp_mobile_mode", 
                                            help="Enable for better experience on mobile devices")
                     
-                    layout_config = {
-                        'xaxis_title': f"Previous {temp_hours} Hours",
-                        'hovermode': 'x unified',
-                        'showlegend': True,
-                        'legend': dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="left",
-                            x=0
-                        ),
-                        'margin': dict(l=60, r=20, t=50, b=80),
-                        'xaxis': dict(
-                            tickformat='%b %d %I%p',
-                            tickangle=-45,
-                            range=[min(temp_times), max(temp_times)],
-                            nticks=10
-                        )
-                    }
+                    derived_sources = [ds for ds in derived_datastreams(datastreams) if ds["derived"] in DERIVED_TRACES]
+                    show_derived = bool(derived_sources) and st.checkbox(
+                        "Show dew point & wind chill", key="temp_show_derived",
+                        help="Computed from temperature, humidity and wind speed without extra requests"
+                    )
                     
-                    if is_mobile:
-                        layout_config['height'] = 350
+                    derived_data = []
+                    if show_derived:
+                        for derived_ds in derived_sources:
+                            if temp_hours <= MAX_API_WINDOW_HOURS:
+                                series = get_derived_series(config, token, derived_ds, start_time, end_time)
+                            else:
+                                series = load_derived_window(config, token, derived_ds, start_time, end_time)
+                            if series is not None and series[0].size:
+                                derived_data.append((derived_ds["derived"], (series[0], to_display(series[1], "temperature"))))
+                    derived_traces = [(name, to_local_times(ts), values) for name, (ts, values) in derived_data]
                     
-                    fig.update_layout(**layout_config)
+                    overlay_data = []
+                    if compare_offset:
+                        # Same point budget as the current period's traces, and never an upstream request
+                        for kind, ds_id, current_ts in (("temperature", temp_id, temp_ts), ("humidity", humidity_id, humidity_ts)):
+                            series = overlay_series(config, ds_by_id[ds_id], start_time, end_time, compare_offset,
+                                                    "mean", current_ts.size)
+                            if series is not None and series[0].size:
+                                values = series[1] if kind == "humidity" else to_display(series[1], "temperature")
+                                overlay_data.append((kind, (series[0], values)))
+                        if not overlay_data:
+                            st.caption(f"No stored data for {compare_label} yet. Longer ranges and the Climatology page fill the local history.")
+                    overlay_names = {"temperature": f"Temperature ({compare_label})", "humidity": f"Humidity ({compare_label})"}
+                    overlays = [(kind, overlay_names[kind], to_local_times(ts), values) for kind, (ts, values) in overlay_data]
+                    overlay_mode = (compare_offset, tuple(kind for kind, _ in overlay_data))
                     
-                    fig.update_yaxes(title_text="Temperature (°F)", range=[temp_min, temp_max], secondary_y=False)
-                    fig.update_yaxes(title_text="Humidity (%)", range=[0, 100], secondary_y=True)
+                    version = data_version(temp_data, humidity_data, *[series for _, series in derived_data],
+                                           *[series for _, series in overlay_data])
+                    cached = get_cached_figure(
+                        "temp_humidity", version, temp_hours, (is_mobile, show_derived, overlay_mode, unit_system()),
+                        lambda: _build_temp_humidity_figure(temp_times, temp_values, humidity_times, humidity_values,
+                                                            temp_hours, is_mobile, unit_for("temperature"), derived_traces,
+                                                            overlays)
+                    )
                     
-                    st.plotly_chart(fig, config={'staticPlot': is_mobile, 'responsive': True})
+                    if st.session_state.get("streaming_charts") and temp_hours <= MAX_API_WINDOW_HOURS:
+                        streaming_plotly_chart(
+                            "temp_humidity", figure_spec(cached),
+                            [(temp_ts.tolist(), temp_values.tolist()), (humidity_ts.tolist(), humidity_values.tolist())]
+                            + [(ts.tolist(), values.tolist()) for _, (ts, values) in derived_data]
+                            + [(ts.tolist(), values.tolist()) for _, (ts, values) in overlay_data],
+                            (temp_hours, is_mobile, tuple(name for name, _ in derived_data), overlay_mode, unit_system()),
+                            config={'staticPlot': is_mobile, 'responsive': True},
+                            height=350 if is_mobile else None
+                        )
+                    else:
+                        st.plotly_chart(cached["figure"], config={'staticPlot': is_mobile, 'responsive': True})
                     
                     with st.expander("📊 View Raw Data"):
+                        unit = unit_for("temperature")
                         df = pd.DataFrame({
-                            'Time': [t.strftime('%Y-%m-%d %I:%M %p') for t in temp_times],
-                            'Temperature (°F)': temp_values,
-                            'Humidity (%)': [humidity_values[humidity_times.index(t)] if t in humidity_times else None for t in temp_times]
+                            'Time': temp_times.strftime('%Y-%m-%d %I:%M %p'),
+                            f'Temperature ({unit})': temp_values,
+                            'Humidity (%)': pd.Series(humidity_values, index=humidity_ts).reindex(temp_ts).to_numpy()
                         })
+                        for name, (ts, values) in derived_data:
+                            df[f"{DERIVED_TRACES[name]['name']} ({unit})"] = pd.Series(values, index=ts).reindex(temp_ts).to_numpy()
                         df = df.iloc[::-1].reset_index(drop=True)
                         st.dataframe(df, width="stretch", height=400)
                 else:
@@ -3,10 +3,146 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
-from zoneinfo import ZoneInfo
-from api.campbell_client import get_historical_datapoints
+from components.period_overlay import OVERLAY_COLOR, comparison_offset
+from components.progressive import fields_by_name, range_requests
+from components.streaming_chart import streaming_plotly_chart
+from store.derived import derived_datastreams, get_derived_series, load_derived_window
+from store.ingest import MAX_API_WINDOW_HOURS, RANGE_HOURS, load_window, with_breaks
+from store.overlay import overlay_series
+from store.series_cache import get_series
+from utils.formatters import to_local_times
+from utils.figure_cache import data_version, figure_spec, get_cached_figure, scatter_trace
+from utils.units import convert, to_display, unit_for, unit_system
 from browser_detection import browser_detection_engine
 
+def build_wind_figure(speed_times, speed_values, gust_times, gust_values, dir_times, dir_values, hours, is_mobile, unit,
+                      vector_mean=None, overlays=()):
+    """Build the wind speed and gust figure in the given speed unit, with an optional vector-mean speed trace and comparison overlays"""
+    fig = go.Figure()
+    hover = f'%{{y:.1f}} {unit}<extra></extra>'
+    
+    avg_wind_speed = float(np.nanmean(speed_values))
+    
+    fig.add_trace(scatter_trace(
+        len(speed_times),
+        x=speed_times,
+        y=speed_values,
+        fill='tozeroy',
+        fillcolor='rgba(76, 175, 80, 0.7)',
+        line=dict(color='rgba(76, 175, 80, 1)', width=2, shape='spline'),
+        name='Wind Speed',
+        hovertemplate=hover
+    ))
+    
+    fig.add_trace(scatter_trace(
+        len(gust_times),
+        x=gust_times,
+        y=gust_values,
+        mode='markers',
+        marker=dict(color='orange', size=4),
+        name='Wind Gusts',
+        hovertemplate=hover
+    ))
+    
+    if vector_mean is not None:
+        vector_times, vector_values = vector_mean
+        fig.add_trace(scatter_trace(
+            len(vector_times),
+            x=vector_times,
+            y=vector_values,
+            mode='lines',
+            line=dict(color='#00CED1', width=2, dash='dot'),
+            name='1-Hour Vector Mean',
+            hovertemplate=hover
+        ))
+    
+    for kind, name, times, values in overlays:
+        if kind == "speed":
+            style = dict(mode='lines', line=dict(color=OVERLAY_COLOR, width=2, dash='dash'))
+        else:
+            style = dict(mode='markers', marker=dict(color=OVERLAY_COLOR, size=5, symbol='circle-open'))
+        fig.add_trace(scatter_trace(len(times), x=times, y=values, name=name,
+                                    hovertemplate=hover, **style))
+    
+    fig.add_hline(
+        y=avg_wind_speed,
+        line_dash="dash",
+        line_color="rgba(255, 255, 255, 0.5)",
+        line_width=2,
+        annotation_text=f"Avg {avg_wind_speed:.0f}{unit}",
+        annotation_position="right"
+    )
+    
+    dir_lookup_for_arrows = dict(zip(dir_times, dir_values.tolist()))
+    max_gust = float(np.nanmax([np.nanmax(gust_values)] + [np.nanmax(values) for _, _, _, values in overlays]))
+    y_max = max(max_gust + convert(10, "mph", unit), convert(55, "mph", unit))
+    
+    arrow_interval = max(1, len(speed_times) // 30)
+    for i in range(0, len(speed_times), arrow_interval):
+        time_val = speed_times[i]
+        
+        if time_val in dir_lookup_for_arrows:
+            direction = dir_lookup_for_arrows[time_val]
+            arrow_angle = (direction + 180) % 360
+            arrow_length = 25
+            
+            angle_rad = np.radians(arrow_angle)
+            dx = -arrow_length * np.sin(angle_rad)
+            dy = arrow_length * np.cos(angle_rad)
+            
+            fig.add_annotation(
+                x=time_val,
+                y=y_max * 0.95,
+                ax=dx,
+                ay=dy,
+                xref='x',
+                yref='y',
+                axref='pixel',
+                ayref='pixel',
+                showarrow=True,
+                arrowhead=2,
+                arrowsize=1,
+                arrowwidth=2,
+                arrowcolor='#00CED1',
+                standoff=0
+            )
+    
+    layout_config = {
+        'xaxis_title': f"Previous {hours} Hours" if hours <= MAX_API_WINDOW_HOURS else f"Previous {hours // 24} Days",
+        'yaxis_title': f"Wind Speed ({unit})",
+        'hovermode': 'x unified',
+        'showlegend': True,
+        'legend': dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="left",
+            x=0
+        ),
+        'margin': dict(l=60, r=20, t=50, b=80),
+        'xaxis': dict(
+            tickformat='%b %d %I%p',
+            tickangle=-45,
+            range=[min(speed_times), max(speed_times)],
+            nticks=10
+        ),
+        'yaxis': dict(
+            range=[0, y_max]
+        )
+    }
+    
+    if is_mobile:
+        layout_config['height'] = 350
+    
+    fig.update_layout(**layout_config)
+    
+    return fig
+
+def wind_chart_requests(config, token, datastreams):
+    """Speed, gust and direction for the selected range"""
+    found = fields_by_name(datastreams, "Five_Min", ["WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT"])
+    return range_requests(config, token, list(found.values()), "wind_time_range")
+
 def display_wind_chart(config, token, datastreams):
     """Display wind speed and gust history chart"""
     if 'browser_info' not in st.session_state:
@@ -22,7 +158,7 @@ def display_wind_chart(config, token, datastreams):
     
     time_range = st.radio(
         "Select time range:",
-        ["12 Hours", "24 Hours", "72 Hours"],
+        list(RANGE_HOURS),
         horizontal=True,
         index=1,
         key="wind_time_range"
@@ -31,7 +167,14 @@ def display_wind_chart(config, token, datastreams):
     is_mobile = st.checkbox("Enable touch-friendly mode", value=is_mobile_device, key="wind_chart_mobile_mode", 
                            help="Enable for better experience on mobile devices")
     
-    hours = 12 if time_range == "12 Hours" else 24 if time_range == "24 Hours" else 72
+    vector_mean_ds = next((ds for ds in derived_datastreams(datastreams) if ds["derived"] == "vector_wind_speed"), None)
+    show_vector_mean = vector_mean_ds is not None and st.checkbox(
+        "Show 1-hour vector mean", key="wind_show_vector_mean",
+        help="Vector-averaged wind speed computed from speed and direction without extra requests"
+    )
+    
+    hours = RANGE_HOURS[time_range]
+    compare_offset, compare_label = comparison_offset("wind", hours)
     
     wind_speed_id = None
     wind_gust_id = None
@@ -51,138 +194,99 @@ def display_wind_chart(config, token, datastreams):
                 wind_dir_id = ds.get("id")
     
     if wind_speed_id and wind_gust_id and wind_dir_id:
-        with st.spinner(f"Loading {hours} hours of wind data..."):
+        with st.spinner(f"Loading {time_range.lower()} of wind data..."):
             end_time = int(datetime.now().timestamp() * 1000)
             start_time = end_time - (hours * 60 * 60 * 1000)
             
-            speed_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                  wind_speed_id, start_time, end_time)
-            gust_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                 wind_gust_id, start_time, end_time)
-            dir_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                wind_dir_id, start_time, end_time)
+            ds_by_id = {ds.get("id"): ds for ds in datastreams}
             
-            if speed_data and gust_data and dir_data:
-                speed_points = speed_data.get("data", [])
-                gust_points = gust_data.get("data", [])
-                dir_points = dir_data.get("data", [])
+            if hours <= MAX_API_WINDOW_HOURS:
+                speed_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                        wind_speed_id, start_time, end_time)
+                gust_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                       wind_gust_id, start_time, end_time)
+                dir_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                      wind_dir_id, start_time, end_time)
+                if speed_data is not None:
+                    # Break the line at indexed gaps instead of drawing across them
+                    speed_data = with_breaks(config["DATA_DIR"], ds_by_id[wind_speed_id], *speed_data)
+            else:
+                speed_data = load_window(config, token, ds_by_id[wind_speed_id], start_time, end_time, breaks=True)
+                gust_data = load_window(config, token, ds_by_id[wind_gust_id], start_time, end_time, column="max")
+                dir_data = load_window(config, token, ds_by_id[wind_dir_id], start_time, end_time)
+            
+            if speed_data is not None and gust_data is not None and dir_data is not None:
+                speed_ts, speed_values = speed_data
+                gust_ts, gust_values = gust_data
+                dir_ts, dir_values = dir_data
+                # Converted copies for display; the cached series stay in station units
+                speed_values = to_display(speed_values, "speed")
+                gust_values = to_display(gust_values, "speed")
                 
-                if not speed_points or not gust_points:
+                if not speed_ts.size or not gust_ts.size:
                     st.error("No data points found in response.")
                 else:
-                    speed_times = [datetime.fromtimestamp(p['ts']/1000, tz=ZoneInfo("America/Denver")) for p in speed_points]
-                    speed_values = [p['value'] for p in speed_points]
-                    
-                    gust_times = [datetime.fromtimestamp(p['ts']/1000, tz=ZoneInfo("America/Denver")) for p in gust_points]
-                    gust_values = [p['value'] for p in gust_points]
-                    
-                    dir_times = [datetime.fromtimestamp(p['ts']/1000, tz=ZoneInfo("America/Denver")) for p in dir_points]
-                    dir_values = [p['value'] for p in dir_points]
+                    speed_times = to_local_times(speed_ts)
+                    gust_times = to_local_times(gust_ts)
+                    dir_times = to_local_times(dir_ts)
                     
-                    fig = go.Figure()
+                    vector_data = None
+                    if show_vector_mean:
+                        if hours <= MAX_API_WINDOW_HOURS:
+                            vector_data = get_derived_series(config, token, vector_mean_ds, start_time, end_time)
+                        else:
+                            vector_data = load_derived_window(config, token, vector_mean_ds, start_time, end_time)
+                    if vector_data is not None:
+                        vector_data = (vector_data[0], to_display(vector_data[1], "speed"))
+                    vector_mean = None if vector_data is None else (to_local_times(vector_data[0]), vector_data[1])
                     
-                    avg_wind_speed = np.mean(speed_values)
+                    overlay_data = []
+                    if compare_offset:
+                        # Same point budget as the current period's traces, and never an upstream request
+                        for kind, ds_id, column, current_ts in (("speed", wind_speed_id, "mean", speed_ts),
+                                                                ("gust", wind_gust_id, "max", gust_ts)):
+                            series = overlay_series(config, ds_by_id[ds_id], start_time, end_time, compare_offset,
+                                                    column, current_ts.size)
+                            if series is not None and series[0].size:
+                                overlay_data.append((kind, (series[0], to_display(series[1], "speed"))))
+                        if not overlay_data:
+                            st.caption(f"No stored data for {compare_label} yet. Longer ranges and the Climatology page fill the local history.")
+                    overlay_names = {"speed": f"Wind Speed ({compare_label})", "gust": f"Wind Gusts ({compare_label})"}
+                    overlays = [(kind, overlay_names[kind], to_local_times(ts), values) for kind, (ts, values) in overlay_data]
                     
-                    fig.add_trace(go.Scatter(
-                        x=speed_times,
-                        y=speed_values,
-                        fill='tozeroy',
-                        fillcolor='rgba(76, 175, 80, 0.7)',
-                        line=dict(color='rgba(76, 175, 80, 1)', width=2, shape='spline'),
-                        name='Wind Speed',
-                        hovertemplate='%{y:.1f} mph<extra></extra>'
-                    ))
-                    
-                    fig.add_trace(go.Scatter(
-                        x=gust_times,
-                        y=gust_values,
-                        mode='markers',
-                        marker=dict(color='orange', size=4),
-                        name='Wind Gusts',
-                        hovertemplate='%{y:.1f} mph<extra></extra>'
-                    ))
-                    
-                    fig.add_hline(
-                        y=avg_wind_speed,
-                        line_dash="dash",
-                        line_color="rgba(255, 255, 255, 0.5)",
-                        line_width=2,
-                        annotation_text=f"Avg {avg_wind_speed:.0f}mph",
-                        annotation_position="right"
+                    version = data_version(speed_data, gust_data, dir_data, *([vector_data] if vector_data is not None else []),
+                                           *[series for _, series in overlay_data])
+                    overlay_mode = (compare_offset, tuple(kind for kind, _ in overlay_data))
+                    cached = get_cached_figure(
+                        "wind_chart", version, hours, (is_mobile, vector_data is not None, overlay_mode, unit_system()),
+                        lambda: build_wind_figure(speed_times, speed_values, gust_times, gust_values,
+                                                  dir_times, dir_values, hours, is_mobile, unit_for("speed"), vector_mean,
+                                                  overlays)
                     )
                     
-                    dir_lookup_for_arrows = {dir_times[i]: dir_values[i] for i in range(len(dir_times))}
-                    max_gust = max(gust_values)
-                    y_max = max(max_gust + 10, 55)
-                    
-                    arrow_interval = max(1, len(speed_points) // 30)
-                    for i in range(0, len(speed_points), arrow_interval):
-                        time_val = speed_times[i]
-                        
-                        if time_val in dir_lookup_for_arrows:
-                            direction = dir_lookup_for_arrows[time_val]
-                            arrow_angle = (direction + 180) % 360
-                            arrow_length = 25
-                            
-                            angle_rad = np.radians(arrow_angle)
-                            dx = -arrow_length * np.sin(angle_rad)
-                            dy = arrow_length * np.cos(angle_rad)
-                            
-                            fig.add_annotation(
-                                x=time_val,
-                                y=y_max * 0.95,
-                                ax=dx,
-                                ay=dy,
-                                xref='x',
-                                yref='y',
-                                axref='pixel',
-                                ayref='pixel',
-                                showarrow=True,
-                                arrowhead=2,
-                                arrowsize=1,
-                                arrowwidth=2,
-                                arrowcolor='#00CED1',
-                                standoff=0
-                            )
-                    
-                    layout_config = {
-                        'xaxis_title': f"Previous {hours} Hours",
-                        'yaxis_title': "Wind Speed (mph)",
-                        'hovermode': 'x unified',
-                        'showlegend': True,
-                        'legend': dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="left",
-                            x=0
-                        ),
-                        'margin': dict(l=60, r=20, t=50, b=80),
-                        'xaxis': dict(
-                            tickformat='%b %d %I%p',
-                            tickangle=-45,
-                            range=[min(speed_times), max(speed_times)],
-                            nticks=10
-                        ),
-                        'yaxis': dict(
-                            range=[0, y_max]
+                    if st.session_state.get("streaming_charts") and hours <= MAX_API_WINDOW_HOURS:
+                        streaming_plotly_chart(
+                            "wind_chart", figure_spec(cached),
+                            [(speed_ts.tolist(), speed_values.tolist()), (gust_ts.tolist(), gust_values.tolist())]
+                            + ([(vector_data[0].tolist(), vector_data[1].tolist())] if vector_data is not None else [])
+                            + [(ts.tolist(), values.tolist()) for _, (ts, values) in overlay_data],
+                            (hours, is_mobile, vector_data is not None, overlay_mode, unit_system()),
+                            config={'staticPlot': is_mobile, 'responsive': True},
+                            height=350 if is_mobile else None
                         )
-                    }
-                    
-                    if is_mobile:
-                        layout_config['height'] = 350
-                    
-                    fig.update_layout(**layout_config)
-                    
-                    st.plotly_chart(fig, config={'staticPlot': is_mobile, 'responsive': True})
+                    else:
+                        st.plotly_chart(cached["figure"], config={'staticPlot': is_mobile, 'responsive': True})
                     
                     with st.expander("📊 View Raw Data"):
+                        unit = unit_for("speed")
                         df = pd.DataFrame({
-                            'Time': [t.strftime('%Y-%m-%d %I:%M %p') for t in speed_times],
-                            'Wind Speed (mph)': speed_values,
-                            'Wind Gust (mph)': [gust_values[gust_times.index(t)] if t in gust_times else None for t in speed_times],
-                            'Wind Direction (°)': [dir_values[dir_times.index(t)] if t in dir_times else None for t in speed_times]
+                            'Time': speed_times.strftime('%Y-%m-%d %I:%M %p'),
+                            f'Wind Speed ({unit})': speed_values,
+                            f'Wind Gust ({unit})': pd.Series(gust_values, index=gust_ts).reindex(speed_ts).to_numpy(),
+                            'Wind Direction (°)': pd.Series(dir_values, index=dir_ts).reindex(speed_ts).to_numpy()
                         })
+                        if vector_data is not None:
+                            df[f'1-Hour Vector Mean ({unit})'] = pd.Series(vector_data[1], index=vector_data[0]).reindex(speed_ts).to_numpy()
                         df = df.iloc[::-1].reset_index(drop=True)
                         st.dataframe(df, width="stretch", height=400)
             else:
@@ -5,9 +5,75 @@ import plotly.graph_objects as go
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from utils.formatters import degrees_to_cardinal
-from api.campbell_client import get_historical_datapoints
+from store.series_cache import get_series
+from store.sensor_health import get_sensor_health, wind_datastream_ids
+from components.progressive import fields_by_name, recent_series_request
+from utils.figure_cache import data_version, get_cached_figure
+from utils.units import convert, to_display, unit_for, unit_system
 from browser_detection import browser_detection_engine
 
+def _build_wind_rose_figure(speeds, directions, unit):
+    """Build the wind rose figure, labelling the speed bins in the given unit"""
+    dir_bins = np.arange(0, 360, 22.5)
+    dir_labels = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 
+                 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+    
+    # Binned in station units; only the labels follow the display unit
+    speed_bins = [0, 5, 15, 25, 100]
+    edges = [f"{convert(edge, 'mph', unit):.0f}" for edge in speed_bins]
+    speed_labels = [f"{lo}-{hi}" for lo, hi in zip(edges[:-2], edges[1:-1])] + [f">{edges[-2]}"]
+    speed_colors = ['#9370DB', '#FFFF00', '#FF0000', '#FF8C00']
+    
+    df = pd.DataFrame({'speed': speeds, 'direction': directions})
+    
+    df['dir_bin'] = pd.cut(df['direction'], bins=np.append(dir_bins, 360), 
+                          labels=dir_labels, include_lowest=True)
+    df['speed_bin'] = pd.cut(df['speed'], bins=speed_bins, 
+                           labels=speed_labels, include_lowest=True)
+    
+    rose_data = df.groupby(['dir_bin', 'speed_bin'], observed=False).size().unstack(fill_value=0)
+    rose_data = (rose_data.T / rose_data.sum().sum() * 100).T
+    
+    fig = go.Figure()
+    
+    for i, speed_label in enumerate(speed_labels):
+        if speed_label in rose_data.columns:
+            fig.add_trace(go.Barpolar(
+                r=rose_data[speed_label],
+                theta=dir_labels,
+                name=f'{speed_label} {unit}',
+                marker_color=speed_colors[i]
+            ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                ticksuffix='%', 
+                angle=90, 
+                dtick=10,
+                tickfont=dict(size=14, color='#333333')
+            ),
+            angularaxis=dict(direction='clockwise')
+        ),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.15,
+            xanchor="center",
+            x=0.5
+        ),
+        # height=500,
+        margin=dict(t=40, b=60, l=30, r=30)
+    )
+    
+    return fig
+
+def wind_rose_requests(config, token, datastreams):
+    """Speed and direction series; every time range is a view of the cached recent window"""
+    found = fields_by_name(datastreams, "Five_Min", ["WS_mph_S_WVT", "WindDir_D1_WVT"])
+    return [recent_series_request(config, token, ds["id"]) for ds in found.values()]
+
 def display_wind_rose(config, token, datastreams):
     """Display 24-hour wind rose chart"""
     if 'browser_info' not in st.session_state:
@@ -53,84 +119,34 @@ def display_wind_rose(config, token, datastreams):
             end_time = int(datetime.now().timestamp() * 1000)
             start_time = end_time - (hours * 60 * 60 * 1000)
             
-            wind_speed_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                       wind_speed_id, start_time, end_time)
-            wind_dir_data = get_historical_datapoints(config["BASE_URL"], token, config["ORGANIZATION_ID"],
-                                                     wind_dir_id, start_time, end_time)
+            wind_speed_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                         wind_speed_id, start_time, end_time)
+            wind_dir_data = get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"],
+                                       wind_dir_id, start_time, end_time)
             
-            if wind_speed_data and wind_dir_data:
-                speeds = []
-                directions = []
-                
-                speed_points = wind_speed_data.get("data", [])
-                dir_points = wind_dir_data.get("data", [])
-                
-                dir_lookup = {point["ts"]: point["value"] for point in dir_points}
+            if wind_speed_data is not None and wind_dir_data is not None:
+                _, speed_idx, dir_idx = np.intersect1d(wind_speed_data[0], wind_dir_data[0], return_indices=True)
+                timestamps = wind_speed_data[0][speed_idx]
+                speeds = wind_speed_data[1][speed_idx]
+                directions = wind_dir_data[1][dir_idx]
                 
-                for speed_point in speed_points:
-                    ts = speed_point["ts"]
-                    if ts in dir_lookup:
-                        speeds.append(speed_point["value"])
-                        directions.append(dir_lookup[ts])
+                # Observations from while a wind sensor looked iced or stuck would skew the rose
+                suspect = get_sensor_health().suspect_mask(wind_datastream_ids(datastreams), timestamps)
+                excluded = int(suspect.sum())
+                timestamps, speeds, directions = timestamps[~suspect], speeds[~suspect], directions[~suspect]
                 
-                if speeds and directions:
-                    dir_bins = np.arange(0, 360, 22.5)
-                    dir_labels = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 
-                                 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-                    
-                    speed_bins = [0, 5, 15, 25, 100]
-                    speed_labels = ['0-5', '5-15', '15-25', '>25']
-                    speed_colors = ['#9370DB', '#FFFF00', '#FF0000', '#FF8C00']
-                    
-                    df = pd.DataFrame({'speed': speeds, 'direction': directions})
-                    
-                    df['dir_bin'] = pd.cut(df['direction'], bins=np.append(dir_bins, 360), 
-                                          labels=dir_labels, include_lowest=True)
-                    df['speed_bin'] = pd.cut(df['speed'], bins=speed_bins, 
-                                           labels=speed_labels, include_lowest=True)
-                    
-                    rose_data = df.groupby(['dir_bin', 'speed_bin'], observed=False).size().unstack(fill_value=0)
-                    rose_data = (rose_data.T / rose_data.sum().sum() * 100).T
-                    
-                    fig = go.Figure()
-                    
-                    for i, speed_label in enumerate(speed_labels):
-                        if speed_label in rose_data.columns:
-                            fig.add_trace(go.Barpolar(
-                                r=rose_data[speed_label],
-                                theta=dir_labels,
-                                name=f'{speed_label} mph',
-                                marker_color=speed_colors[i]
-                            ))
-                    
-                    fig.update_layout(
-                        polar=dict(
-                            radialaxis=dict(
-                                ticksuffix='%', 
-                                angle=90, 
-                                dtick=10,
-                                tickfont=dict(size=14, color='#333333')
-                            ),
-                            angularaxis=dict(direction='clockwise')
-                        ),
-                        showlegend=True,
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=-0.15,
-                            xanchor="center",
-                            x=0.5
-                        ),
-                        # height=500,
-                        margin=dict(t=40, b=60, l=30, r=30)
+                if speeds.size and directions.size:
+                    version = data_version(wind_speed_data, wind_dir_data)
+                    cached = get_cached_figure(
+                        "wind_rose", (version, excluded), hours, unit_system(),
+                        lambda: _build_wind_rose_figure(speeds, directions, unit_for("speed"))
                     )
                     
-                    st.plotly_chart(fig, config={'staticPlot': is_mobile, 'responsive': True})
+                    st.plotly_chart(cached["figure"], config={'staticPlot': is_mobile, 'responsive': True})
                     
-                    timestamps = [point["ts"] for point in speed_points if point["ts"] in dir_lookup]
-                    if timestamps:
-                        start_dt = datetime.fromtimestamp(min(timestamps) / 1000, tz=ZoneInfo("America/Denver"))
-                        end_dt = datetime.fromtimestamp(max(timestamps) / 1000, tz=ZoneInfo("America/Denver"))
+                    if timestamps.size:
+                        start_dt = datetime.fromtimestamp(int(timestamps[0]) / 1000, tz=ZoneInfo("America/Denver"))
+                        end_dt = datetime.fromtimestamp(int(timestamps[-1]) / 1000, tz=ZoneInfo("America/Denver"))
                         time_range = f"{start_dt.strftime('%m/%d %I:%M%p')} - {end_dt.strftime('%m/%d %I:%M%p')}"
                     else:
                         time_range = "N/A"
@@ -143,9 +159,13 @@ def display_wind_rose(config, token, datastreams):
                         st.metric("Observations", len(speeds))
                         st.caption(time_range)
                     with col2:
-                        st.metric("Avg Wind Speed", f"{np.mean(speeds):.1f} mph")
+                        st.metric("Avg Wind Speed", f"{to_display(np.mean(speeds), 'speed'):.1f} {unit_for('speed')}")
                     with col3:
                         st.metric("Avg Direction", f"{avg_direction:.0f}° ({cardinal})")
+                    if excluded:
+                        st.caption(f"⚠️ {excluded} observation(s) left out while a wind sensor looked iced or stuck")
+                elif excluded:
+                    st.warning(f"Every wind observation in the last {hours} hours is suspect; a wind sensor looks iced or stuck.")
                 else:
                     st.warning(f"No matching wind data found for the last {hours} hours.")
             else:
@@ -8,7 +8,24 @@ def load_config():
             "USERNAME": st.secrets["CAMPBELL_USERNAME"],
             "PASSWORD": st.secrets["CAMPBELL_PASSWORD"],
             "ORGANIZATION_ID": st.secrets["CAMPBELL_ORGANIZATION_ID"],
-            "APP_PASSWORD": st.secrets["APP_PASSWORD"]
+            "APP_PASSWORD": st.secrets["APP_PASSWORD"],
+            "STATION_ID": st.secrets.get("CAMPBELL_STATION_ID", ""),
+            "DATA_DIR": st.secrets.get("DATA_DIR", ".data"),
+            "SERIES_CACHE_MB": float(st.secrets.get("SERIES_CACHE_MB", 64)),
+            "MAX_CONCURRENT_REQUESTS": int(st.secrets.get("MAX_CONCURRENT_REQUESTS", 8)),
+            "MAX_REQUESTS_PER_SECOND": float(st.secrets.get("MAX_REQUESTS_PER_SECOND", 10)),
+            "ALERT_GUST_MPH": float(st.secrets.get("ALERT_GUST_MPH", 50)),
+            "ALERT_GUST_MINUTES": float(st.secrets.get("ALERT_GUST_MINUTES", 15)),
+            "ALERT_BATTERY_V": float(st.secrets.get("ALERT_BATTERY_V", 12.1)),
+            "ALERT_STALE_MINUTES": float(st.secrets.get("ALERT_STALE_MINUTES", 30)),
+            "ALERT_RENOTIFY_MINUTES": float(st.secrets.get("ALERT_RENOTIFY_MINUTES", 60)),
+            "ALERTS_SYNC_CLOUD": str(st.secrets.get("ALERTS_SYNC_CLOUD", "false")).lower() == "true",
+            "PROFILE_KEEP": int(st.secrets.get("PROFILE_KEEP", 10)),
+            "KIOSK_REFRESH_S": float(st.secrets.get("KIOSK_REFRESH_S", 60)),
+            "KIOSK_KEY": st.secrets.get("KIOSK_KEY", ""),
+            "UNIT_SYSTEM": st.secrets.get("UNIT_SYSTEM", "imperial"),
+            "RING_HOURS": float(st.secrets.get("RING_HOURS", 72)),
+            "RING_POLL_S": float(st.secrets.get("RING_POLL_S", 60))
         }
         return config
     except KeyError as e:
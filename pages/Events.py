@@ -0,0 +1,43 @@
+import streamlit as st
+
+from config.settings import load_config
+from auth.authentication import check_password
+from api.campbell_client import get_access_token, get_datastreams
+from api.throttle import UpstreamUnavailable, configure_budget
+from utils.styles import apply_custom_css
+from components.station_overview import OVERVIEW, select_station, station_name
+from components.events import display_events
+
+st.set_page_config(
+    page_title="Wind Events • Silverton Mountain Weather Station",
+    page_icon="img/apple-touch-icon.png",
+    layout="wide",
+    initial_sidebar_state="collapsed",
+)
+
+config = load_config()
+configure_budget(config["MAX_CONCURRENT_REQUESTS"], config["MAX_REQUESTS_PER_SECOND"])
+
+if not check_password(config["APP_PASSWORD"]):
+    st.stop()
+
+apply_custom_css()
+st.title("🌪️ Wind Events")
+
+try:
+    token = get_access_token(config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
+    datastreams = get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"])["data"]
+    
+    with st.sidebar:
+        station, stations, datastreams = select_station(config, token, datastreams)
+    
+    if station == OVERVIEW:
+        st.info("Pick a station in the sidebar to browse its wind events.")
+    else:
+        if station and len(stations) > 1:
+            st.caption(station_name(station))
+        display_events(config, token, datastreams)
+
+except UpstreamUnavailable as e:
+    retry = f" Retrying in about {e.retry_after:.0f}s." if e.retry_after else ""
+    st.warning(f"⏳ Campbell Cloud is limiting requests right now, so there's nothing cached to show yet.{retry}")
@@ -0,0 +1,9 @@
+"""Dashboard plus the kiosk JSON/SVG and streamed export endpoints in one process, sharing caches and the local store.
+
+    streamlit run server.py
+"""
+import streamlit as st
+from api.export import export_routes
+from api.kiosk import kiosk_routes
+
+app = st.App("app.py", routes=kiosk_routes() + export_routes())
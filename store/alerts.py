@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from store.gaps import slot_interval
+from store.ingest import on_points
+
+NOTIFY_MAX_AGE_MS = 60 * 60 * 1000
+MAX_EVENTS = 200
+MAX_NOTIFICATIONS_PER_HOUR = 20
+
+def default_rules(config):
+    """Alert rules built from the ALERT_* settings"""
+    return [
+        {
+            "id": "gust",
+            "kind": "above_for",
+            "table": "Five_Min",
+            "field": "WS_mph_Max",
+            "threshold": config["ALERT_GUST_MPH"],
+            "duration_ms": int(config["ALERT_GUST_MINUTES"] * 60 * 1000),
+            "label": f"Gusts above {config['ALERT_GUST_MPH']:g} mph for {config['ALERT_GUST_MINUTES']:g} min"
+        },
+        {
+            "id": "battery",
+            "kind": "below",
+            "table": "Hourly",
+            "field": "BattV_Min",
+            "threshold": config["ALERT_BATTERY_V"],
+            "label": f"Battery below {config['ALERT_BATTERY_V']:g} V"
+        },
+        {
+            "id": "stale",
+            "kind": "stale",
+            "table": "Five_Min",
+            "max_age_ms": int(config["ALERT_STALE_MINUTES"] * 60 * 1000),
+            "label": f"No new data for {config['ALERT_STALE_MINUTES']:g} min"
+        }
+    ]
+
+class AlertEngine:
+    """Evaluates alert rules point by point as data is ingested, with per-rule state so each point is O(1)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules_by_stream = {}
+        self._stale_rules = []
+        self._rules = []
+        self._streams = {}
+        self._last_ts = {}
+        self._state = {}
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._sent = deque()
+        self._seq = 0
+        self.renotify_ms = 60 * 60 * 1000
+        self.suppressed = 0
+
+    def configure(self, rules, renotify_ms):
+        with self._lock:
+            self._rules = rules
+            self.renotify_ms = renotify_ms
+            self._index()
+
+    def watch(self, datastreams):
+        """Map datastream ids to table/field so incoming points find their rules"""
+        with self._lock:
+            streams = {ds.get("id"): ds for ds in datastreams}
+            if streams.keys() - self._streams.keys():
+                self._streams.update(streams)
+                self._index()
+
+    def _index(self):
+        by_field = {}
+        for rule in self._rules:
+            if rule["kind"] != "stale":
+                by_field.setdefault((rule["table"], rule["field"]), []).append(rule)
+        self._rules_by_stream = {}
+        for ds_id, ds in self._streams.items():
+            metadata = ds.get("metadata", {})
+            rules = by_field.get((metadata.get("table"), metadata.get("field")))
+            if rules:
+                self._rules_by_stream[ds_id] = rules
+        self._stale_rules = [rule for rule in self._rules if rule["kind"] == "stale"]
+
+    def ingest(self, datastream_id, ts, values):
+        """Evaluate newly arrived points; anything at or before the last seen timestamp is skipped"""
+        if not len(ts):
+            return
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            last_ts = self._last_ts.get(datastream_id)
+            start = 0 if last_ts is None else int(np.searchsorted(ts, last_ts, side="right"))
+            if start == len(ts):
+                return
+            self._last_ts[datastream_id] = int(ts[-1])
+            rules = self._rules_by_stream.get(datastream_id, ())
+            if not rules:
+                return
+            for point_ts, value in zip(ts[start:].tolist(), values[start:].tolist()):
+                for rule in rules:
+                    self._evaluate(rule, datastream_id, point_ts, value, now_ms)
+
+    def _rule_state(self, rule, datastream_id):
+        return self._state.setdefault((rule["id"], datastream_id),
+                                      {"active": False, "announced": False, "run_start": None, "prev_ts": None, "notified_at": None})
+
+    def _evaluate(self, rule, datastream_id, ts, value, now_ms):
+        state = self._rule_state(rule, datastream_id)
+        if rule["kind"] == "above_for":
+            slot_ms = slot_interval(self._streams[datastream_id])
+            # A run only counts logged records; missing ones in between could have been below the threshold
+            gap = slot_ms is not None and state["prev_ts"] is not None and ts - state["prev_ts"] > slot_ms
+            state["prev_ts"] = ts
+            if value > rule["threshold"]:
+                if state["run_start"] is None or gap:
+                    state["run_start"] = ts
+                active = ts - state["run_start"] >= rule["duration_ms"]
+            else:
+                state["run_start"] = None
+                active = False
+        else:
+            active = value < rule["threshold"]
+        self._transition(rule, datastream_id, state, active, ts, value, now_ms)
+
+    def check_stale(self):
+        """Evaluate stale-data rules against the wall clock"""
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            for rule in self._stale_rules:
+                for ds_id, last_ts in self._last_ts.items():
+                    if self._streams.get(ds_id, {}).get("metadata", {}).get("table") != rule["table"]:
+                        continue
+                    state = self._rule_state(rule, ds_id)
+                    self._transition(rule, ds_id, state, now_ms - last_ts > rule["max_age_ms"], now_ms, None, now_ms)
+
+    def _transition(self, rule, datastream_id, state, active, ts, value, now_ms):
+        """Emit an event when a rule triggers or clears, subject to the renotify and hourly limits.
+        A condition first seen on old data is announced once a recent point shows it still holds."""
+        if not active:
+            was_announced = state["active"] and state["announced"]
+            state["active"] = state["announced"] = False
+            if not was_announced:
+                return
+        else:
+            if state["announced"]:
+                return
+            fresh = not state["active"]
+            state["active"] = True
+            recent = now_ms - ts <= NOTIFY_MAX_AGE_MS
+            cooled = state["notified_at"] is None or now_ms - state["notified_at"] >= self.renotify_ms
+            if not (recent and cooled and self._allow(now_ms)):
+                self.suppressed += fresh
+                return
+            state["announced"] = True
+            state["notified_at"] = now_ms
+        self._seq += 1
+        metadata = self._streams.get(datastream_id, {}).get("metadata", {})
+        self._events.append({
+            "seq": self._seq,
+            "rule": rule["id"],
+            "label": rule["label"],
+            "status": "triggered" if active else "cleared",
+            "datastream_id": datastream_id,
+            "field": metadata.get("field", ""),
+            "value": value,
+            "ts": ts
+        })
+
+    def _allow(self, now_ms):
+        """Hourly cap on notifications across all rules"""
+        while self._sent and now_ms - self._sent[0] > 60 * 60 * 1000:
+            self._sent.popleft()
+        if len(self._sent) >= MAX_NOTIFICATIONS_PER_HOUR:
+            return False
+        self._sent.append(now_ms)
+        return True
+
+    def sync_external(self, cloud_events):
+        """Treat alerts Campbell Cloud already raised as notified, so the same stream isn't announced twice"""
+        with self._lock:
+            for event in cloud_events:
+                triggered_ts = event.get("triggered_ts")
+                datastream_id = event.get("context", {}).get("datastream_id") or event.get("entity_id")
+                if not triggered_ts or datastream_id not in self._streams:
+                    continue
+                for rule in self._rules_by_stream.get(datastream_id, ()):
+                    state = self._rule_state(rule, datastream_id)
+                    state["notified_at"] = max(state["notified_at"] or 0, triggered_ts)
+
+    def events(self, after_seq=0):
+        with self._lock:
+            return [event for event in self._events if event["seq"] > after_seq]
+
+    def active(self):
+        """(rule id, datastream id) pairs currently in alert"""
+        with self._lock:
+            return [key for key, state in self._state.items() if state["active"]]
+
+_engine = AlertEngine()
+on_points(_engine.ingest)
+
+def get_alert_engine():
+    """Return the shared alert engine"""
+    return _engine
+
+def configure_alerts(config):
+    """Load the alert rules from settings"""
+    _engine.configure(default_rules(config), int(config["ALERT_RENOTIFY_MINUTES"] * 60 * 1000))
+    return _engine
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from store.history import PARTITION_TZ, load_index, read_partition
+from store.rollups import HOUR_MS
+
+WINTER_MONTHS = (12, 1, 2, 3)
+GROUPS = {
+    "month": "Month",
+    "year": "Year",
+    "winter": "Winter (Dec–Mar)",
+    "hour": "Hour of day"
+}
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def _partition_group(month_key, group):
+    """Group key shared by every point in a month partition, or None if it varies per point"""
+    year, month = (int(part) for part in month_key.split("-"))
+    if group == "month":
+        return month
+    if group == "year":
+        return year
+    if group == "winter":
+        if month not in WINTER_MONTHS:
+            return None
+        start = year if month == 12 else year - 1
+        return f"{start}–{(start + 1) % 100:02d}"
+    return None
+
+def plan_partitions(index, months=None, start_ts=None, end_ts=None, min_value=None, max_value=None, group=None):
+    """Month partitions that can hold matching points, using the index's time and min/max zone maps"""
+    selected = []
+    for month_key in sorted(index):
+        zone = index[month_key]
+        if not zone["count"] or zone["min"] is None:
+            continue
+        if months and int(month_key[5:]) not in months:
+            continue
+        if (start_ts is not None and zone["max_ts"] < start_ts) or (end_ts is not None and zone["min_ts"] > end_ts):
+            continue
+        if (min_value is not None and zone["max"] < min_value) or (max_value is not None and zone["min"] > max_value):
+            continue
+        if group == "winter" and _partition_group(month_key, group) is None:
+            continue
+        selected.append(month_key)
+    return selected
+
+def scan(data_dir, datastream_id, group=None, months=None, start_ts=None, end_ts=None, min_value=None, max_value=None):
+    """(ts, values, keys) for finite points in the matching partitions; keys is the group key per point.
+    min_value/max_value prune partitions only, callers still filter the values they scan."""
+    partitions = plan_partitions(load_index(data_dir, datastream_id), months, start_ts, end_ts, min_value, max_value, group)
+    ts_parts, value_parts, key_parts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.float64)], [np.empty(0, dtype=object)]
+    for month_key in partitions:
+        ts, values = read_partition(data_dir, datastream_id, month_key)
+        keep = np.isfinite(values)
+        if start_ts is not None:
+            keep &= ts >= start_ts
+        if end_ts is not None:
+            keep &= ts <= end_ts
+        ts, values = ts[keep], values[keep]
+        ts_parts.append(ts)
+        value_parts.append(values)
+        if group == "hour":
+            key_parts.append(np.asarray(pd.to_datetime(ts, unit="ms", utc=True).tz_convert(PARTITION_TZ).hour))
+        elif group:
+            key_parts.append(np.full(ts.size, _partition_group(month_key, group), dtype=object))
+    keys = np.concatenate(key_parts) if group else None
+    return np.concatenate(ts_parts), np.concatenate(value_parts), keys
+
+def sample_interval_ms(index):
+    """Typical spacing between points from the zone maps, used to turn point counts into durations"""
+    spacings = [(z["max_ts"] - z["min_ts"]) / (z["count"] - 1) for z in index.values() if z["count"] > 1]
+    return float(np.median(spacings)) if spacings else 0.0
+
+def _label_index(frame, group):
+    if group == "month":
+        frame.index = [MONTH_NAMES[m - 1] for m in frame.index]
+    elif group == "hour":
+        frame.index = [f"{h:02d}:00" for h in frame.index]
+    frame.index.name = GROUPS[group]
+    return frame
+
+def grouped_percentiles(data_dir, datastream_id, group, percentiles=(50, 90, 95, 99), months=None, start_ts=None, end_ts=None):
+    """Percentiles of a datastream per group, plus max and point count"""
+    _, values, keys = scan(data_dir, datastream_id, group, months, start_ts, end_ts)
+    if not values.size:
+        return pd.DataFrame()
+    grouped = pd.Series(values).groupby(keys, sort=True)
+    frame = grouped.quantile([p / 100 for p in percentiles]).unstack()
+    frame.columns = [f"p{p:g}" for p in percentiles]
+    frame["max"] = grouped.max()
+    frame["points"] = grouped.size()
+    return _label_index(frame, group)
+
+def hours_above(data_dir, datastream_id, threshold, group, months=None, start_ts=None, end_ts=None):
+    """Hours each group spent at or above threshold, counting each point as one sample interval.
+    Partitions whose zone map max is below the threshold only add observed hours and are never read."""
+    index = load_index(data_dir, datastream_id)
+    # Hour-of-day groups and partial-month ranges can't be counted from the index alone
+    countable = group != "hour" and start_ts is None and end_ts is None
+    _, values, keys = scan(data_dir, datastream_id, group, months, start_ts, end_ts,
+                           min_value=threshold if countable else None)
+    if countable:
+        observed = {}
+        for month_key in plan_partitions(index, months, group=group):
+            key = _partition_group(month_key, group)
+            observed[key] = observed.get(key, 0) + index[month_key]["count"]
+        observed = pd.Series(observed, dtype=np.float64)
+    else:
+        observed = pd.Series(keys).value_counts()
+    if observed.empty:
+        return pd.DataFrame()
+
+    interval_h = sample_interval_ms(index) / HOUR_MS
+    above = pd.Series(values >= threshold).groupby(keys).sum()
+    frame = pd.DataFrame({
+        "hours_above": above.reindex(observed.index, fill_value=0) * interval_h,
+        "hours_observed": observed * interval_h
+    }).sort_index()
+    frame["share"] = frame["hours_above"] / frame["hours_observed"]
+    return _label_index(frame, group)
+
+def histogram(data_dir, datastream_id, bin_edges, group=None, months=None, start_ts=None, end_ts=None):
+    """Point counts per value bin, one column per group (or a single 'all' column)"""
+    _, values, keys = scan(data_dir, datastream_id, group, months, start_ts, end_ts)
+    bin_edges = np.asarray(bin_edges, dtype=np.float64)
+    labels = [f"{lo:g}–{hi:g}" for lo, hi in zip(bin_edges[:-1], bin_edges[1:])]
+    bins = np.clip(np.searchsorted(bin_edges, values, side="right") - 1, 0, len(labels) - 1)
+    if group is None:
+        return pd.DataFrame({"all": np.bincount(bins, minlength=len(labels))}, index=pd.Index(labels, name="Range"))
+    frame = pd.crosstab(pd.Categorical.from_codes(bins, labels), keys, rownames=["Range"]).T
+    return _label_index(frame, group).T
+
+def paired_values(data_dir, speed_id, direction_id, months=None, start_ts=None, end_ts=None):
+    """(speed, direction) for timestamps both datastreams have, e.g. for a wind rose"""
+    speed_ts, speeds, _ = scan(data_dir, speed_id, months=months, start_ts=start_ts, end_ts=end_ts)
+    dir_ts, directions, _ = scan(data_dir, direction_id, months=months, start_ts=start_ts, end_ts=end_ts)
+    _, speed_idx, dir_idx = np.intersect1d(speed_ts, dir_ts, assume_unique=True, return_indices=True)
+    return speeds[speed_idx], directions[dir_idx]
+
+def history_extent(data_dir, datastream_id):
+    """(first_ts, last_ts, points) held locally"""
+    index = load_index(data_dir, datastream_id)
+    if not index:
+        return None, None, 0
+    return (min(z["min_ts"] for z in index.values()), max(z["max_ts"] for z in index.values()),
+            sum(z["count"] for z in index.values()))
@@ -0,0 +1,132 @@
+import time
+from functools import reduce
+import numpy as np
+from store.ingest import load_window
+from store.series_cache import RETENTION_MS, CompactSeries, get_series, get_series_cache
+
+VECTOR_MEAN_WINDOW_MS = 60 * 60 * 1000
+
+def wind_chill(temp_f, speed_mph):
+    """NWS wind chill (°F); the air temperature where the formula doesn't apply (above 50°F or 3 mph or less)"""
+    v16 = np.power(np.maximum(speed_mph, 0), 0.16)
+    chill = 35.74 + 0.6215 * temp_f - 35.75 * v16 + 0.4275 * temp_f * v16
+    return np.where((temp_f <= 50) & (speed_mph > 3), chill, temp_f)
+
+def dew_point(temp_f, rh):
+    """Dew point (°F) from the Magnus formula"""
+    temp_c = (temp_f - 32) * 5 / 9
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.log(np.clip(rh, 1e-3, 100) / 100) + 17.625 * temp_c / (243.04 + temp_c)
+    return 243.04 * gamma / (17.625 - gamma) * 9 / 5 + 32
+
+def _trailing_sum(x, lo):
+    """Sum of x[lo[i]:i + 1] for every i, from one cumulative sum"""
+    cumulative = np.concatenate([[0.0], np.cumsum(x)])
+    return cumulative[1:] - cumulative[lo]
+
+def vector_mean_wind(ts, speed_mph, direction_deg, window_ms=VECTOR_MEAN_WINDOW_MS):
+    """Trailing vector-mean wind over window_ms ending at each point, as (speed, direction) arrays"""
+    radians = np.radians(direction_deg)
+    u = np.nan_to_num(-speed_mph * np.sin(radians))
+    v = np.nan_to_num(-speed_mph * np.cos(radians))
+    valid = (np.isfinite(speed_mph) & np.isfinite(direction_deg)).astype(np.float64)
+
+    # Each point averages the points in (ts - window_ms, ts]
+    lo = np.searchsorted(ts, ts - window_ms, side="right")
+    count = _trailing_sum(valid, lo)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_u = _trailing_sum(u, lo) / count
+        mean_v = _trailing_sum(v, lo) / count
+    direction = (np.degrees(np.arctan2(-mean_u, -mean_v)) + 360) % 360
+    return np.hypot(mean_u, mean_v), direction
+
+DERIVED_SERIES = {
+    "wind_chill": {
+        "field": "WindChill_F",
+        "label": "Wind Chill",
+        "inputs": ("AirTF_Avg", "WS_mph_S_WVT"),
+        "lookback_ms": 0,
+        "compute": lambda ts, temp, speed: wind_chill(temp, speed)
+    },
+    "dew_point": {
+        "field": "DewPoint_F",
+        "label": "Dew Point",
+        "inputs": ("AirTF_Avg", "RH"),
+        "lookback_ms": 0,
+        "compute": lambda ts, temp, rh: dew_point(temp, rh)
+    },
+    "vector_wind_speed": {
+        "field": "WS_mph_VecMean_1h",
+        "label": "1-Hour Vector Mean Wind",
+        "inputs": ("WS_mph_S_WVT", "WindDir_D1_WVT"),
+        "lookback_ms": VECTOR_MEAN_WINDOW_MS,
+        "compute": lambda ts, speed, direction: vector_mean_wind(ts, speed, direction)[0]
+    },
+    "vector_wind_dir": {
+        "field": "WindDir_VecMean_1h",
+        "label": "1-Hour Vector Mean Direction",
+        "inputs": ("WS_mph_S_WVT", "WindDir_D1_WVT"),
+        "lookback_ms": VECTOR_MEAN_WINDOW_MS,
+        "compute": lambda ts, speed, direction: vector_mean_wind(ts, speed, direction)[1]
+    }
+}
+
+def derived_datastreams(datastreams):
+    """Pseudo-datastreams for each derived series whose Five_Min inputs are available"""
+    by_field = {ds.get("metadata", {}).get("field"): ds for ds in datastreams
+                if ds.get("metadata", {}).get("table") == "Five_Min"}
+    derived = []
+    for name, spec in DERIVED_SERIES.items():
+        if all(field in by_field for field in spec["inputs"]):
+            inputs = [by_field[field] for field in spec["inputs"]]
+            derived.append({
+                "id": f"derived-{name}-{inputs[0].get('id')}",
+                "station_id": inputs[0].get("station_id"),
+                "metadata": {"table": "Derived", "field": spec["field"]},
+                "derived": name,
+                "inputs": inputs
+            })
+    return derived
+
+def compute_derived(name, input_series):
+    """Evaluate a derived series over the timestamps shared by all of its (ts, values) inputs"""
+    ts = reduce(np.intersect1d, [series[0] for series in input_series])
+    columns = [np.asarray(values, dtype=np.float64)[np.searchsorted(series_ts, ts)]
+               for series_ts, values in input_series]
+    return ts, np.asarray(DERIVED_SERIES[name]["compute"](ts, *columns), dtype=np.float64)
+
+def get_derived_series(config, token, derived_ds, start_epoch, end_epoch):
+    """(ts, values) for a derived series over a recent window, computed from the cached raw series.
+    Kept in the series cache and extended with only the points that arrived since the last call."""
+    spec = DERIVED_SERIES[derived_ds["derived"]]
+    lookback = spec["lookback_ms"]
+    inputs = [get_series(config["BASE_URL"], token, config["ORGANIZATION_ID"], ds["id"], start_epoch - lookback, end_epoch)
+              for ds in derived_ds["inputs"]]
+    if any(series is None for series in inputs):
+        return None
+
+    key = (config["BASE_URL"], config["ORGANIZATION_ID"], derived_ds["id"])
+    cache = get_series_cache()
+    with cache.fetch_lock(key):
+        entry = cache.get(key)
+        if entry is not None and entry["covered_from"] <= start_epoch:
+            series = entry["series"]
+            last_ts = int(series.timestamps()[-1]) if len(series) else entry["covered_from"] - 1
+            if all(ts.size and ts[-1] > last_ts for ts, _ in inputs):
+                tail = [(ts[ts > last_ts - lookback], values[ts > last_ts - lookback]) for ts, values in inputs]
+                new_ts, new_values = compute_derived(derived_ds["derived"], tail)
+                keep_from = max(entry["covered_from"], end_epoch - RETENTION_MS)
+                entry = cache.put(key, series.extended(new_ts, new_values, keep_from), keep_from, time.time())
+        else:
+            ts, values = compute_derived(derived_ds["derived"], inputs)
+            keep = ts >= start_epoch
+            entry = cache.put(key, CompactSeries(ts[keep], values[keep]), start_epoch, time.time())
+        return entry["series"].window(start_epoch, end_epoch)
+
+def load_derived_window(config, token, derived_ds, start_ts, end_ts):
+    """Derived series over a long window, computed from the rollup means of its inputs"""
+    lookback = DERIVED_SERIES[derived_ds["derived"]]["lookback_ms"]
+    inputs = [load_window(config, token, ds, start_ts - lookback, end_ts) for ds in derived_ds["inputs"]]
+    ts, values = compute_derived(derived_ds["derived"], inputs)
+    keep = ts >= start_ts
+    return ts[keep], values[keep]
@@ -0,0 +1,64 @@
+import time
+import numpy as np
+from store.history import stored_extent
+from store.ingest import sync_datastream
+from store.rollups import DAY_MS, HOUR_MS, load_rollup, query_series, series_column
+
+HISTORY_DAYS = 90
+# Don't ask again for a record that's due but hasn't posted yet more often than this
+RECHECK_S = 15 * 60
+# (table, field) -> how often the logger writes a record, and the rollup column that matters
+DIAGNOSTIC_FIELDS = {
+    ("Hourly", "BattV_Min"): {"label": "Battery (min)", "unit": "V", "cadence_ms": HOUR_MS, "column": "min"},
+    ("Twelve_Hours", "PTemp_C_Max"): {"label": "Panel temperature (max)", "unit": "°C", "cadence_ms": 12 * HOUR_MS, "column": "max"},
+    ("RadioDiagnostics", "RadioStrength"): {"label": "Radio strength", "unit": "", "cadence_ms": HOUR_MS, "column": "mean"}
+}
+
+_last_checked = {}
+
+def diagnostic_datastreams(datastreams):
+    """(datastream, spec) for the slow diagnostic tables a station has"""
+    found = []
+    for ds in datastreams:
+        metadata = ds.get("metadata", {})
+        spec = DIAGNOSTIC_FIELDS.get((metadata.get("table", ""), metadata.get("field", "")))
+        if spec:
+            found.append((ds, spec))
+    return found
+
+def sync_diagnostic(config, token, datastream, spec, days=HISTORY_DAYS):
+    """Bring a diagnostic datastream's local history up to date, only once a new record is due"""
+    datastream_id = datastream["id"]
+    now = int(time.time() * 1000)
+    _, last_ts = stored_extent(config["DATA_DIR"], datastream_id)
+    checked = time.monotonic() - _last_checked.get(datastream_id, float("-inf")) < RECHECK_S
+    if last_ts is not None and (now < last_ts + spec["cadence_ms"] or checked):
+        return
+    _last_checked[datastream_id] = time.monotonic()
+    sync_datastream(config["BASE_URL"], token, config["ORGANIZATION_ID"], config["DATA_DIR"], datastream, days)
+
+def diagnostic_history(data_dir, datastream, spec, days=HISTORY_DAYS):
+    """(ts, values) of the spec's column over the last days, read from the rollups"""
+    now = int(time.time() * 1000)
+    series = query_series(data_dir, datastream["id"], now - days * DAY_MS, now)
+    return series_column(series, spec["column"])
+
+def daily_trend(data_dir, datastream_id, days, column="min"):
+    """Least-squares slope per day of the daily column over the last days, or None with under 3 days"""
+    daily = load_rollup(data_dir, datastream_id, "daily")
+    start = np.searchsorted(daily["ts"], int(time.time() * 1000) - days * DAY_MS)
+    count = daily["count"][start:]
+    if column == "mean":
+        values = daily["sum"][start:] / np.maximum(count, 1)
+    else:
+        values = daily[column][start:]
+    keep = (count > 0) & np.isfinite(values)
+    if keep.sum() < 3:
+        return None
+    return float(np.polyfit(daily["ts"][start:][keep] / DAY_MS, values[keep], 1)[0])
+
+def days_until(latest, slope, threshold):
+    """Days until a falling value crosses threshold at the given slope per day, or None if it isn't falling"""
+    if slope is None or slope >= 0 or latest <= threshold:
+        return None
+    return (latest - threshold) / -slope
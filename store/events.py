@@ -0,0 +1,216 @@
+import json
+import os
+import numpy as np
+from store.history import atomic_write, datastream_lock, read_range
+from store.rollups import HOUR_MS
+
+EVENT_FIELDS = ["WS_mph_Max", "WS_mph_S_WVT", "WindDir_D1_WVT"]
+# An event opens when its field reaches on and lasts while it keeps coming back to off or above (mph)
+EVENT_KINDS = {
+    "gust": {"label": "Gust events", "field": "WS_mph_Max", "on": 40.0, "off": 30.0},
+    "sustained": {"label": "Sustained-wind events", "field": "WS_mph_S_WVT", "on": 25.0, "off": 18.0}
+}
+MIN_DURATION_MS = 15 * 60 * 1000
+# An event ends once its field has stayed below off this long
+END_HOLD_MS = HOUR_MS
+SECTORS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+EVENT_COLUMNS = ["start", "end", "peak_gust", "peak_gust_ts", "peak_speed", "mean_speed", "direction"]
+# How far back each read looks for the start of a run still open at the first changed point
+HOLD_SCAN_MS = 24 * HOUR_MS
+# Reads to the end of the stored history
+END_OF_TIME = 2 ** 62
+
+_loaded = {}
+
+def _station_key(station_id):
+    return station_id or "station"
+
+def _events_path(data_dir, station_id):
+    return os.path.join(data_dir, "events", f"{_station_key(station_id)}.npz")
+
+def _dirty_path(data_dir, station_id):
+    return os.path.join(data_dir, "events", f"{_station_key(station_id)}.dirty.json")
+
+def _events_lock(station_id):
+    return datastream_lock(f"events:{_station_key(station_id)}")
+
+def event_streams(datastreams):
+    """{field: datastream} for the Five_Min wind streams events are built from"""
+    return {ds["metadata"]["field"]: ds for ds in datastreams
+            if ds.get("metadata", {}).get("table") == "Five_Min" and ds.get("metadata", {}).get("field") in EVENT_FIELDS}
+
+def _empty_events():
+    return {kind: {column: np.empty(0, dtype=np.int64 if column in ("start", "end", "peak_gust_ts") else np.float64)
+                   for column in EVENT_COLUMNS} for kind in EVENT_KINDS}
+
+def load_events(data_dir, station_id):
+    """The station's event index as {kind: {column: array}}, or None before it's first built.
+    Kept in memory and reread only when the file changes, so queries don't touch the disk."""
+    path = _events_path(data_dir, station_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    events = _empty_events()
+    with np.load(path) as stored:
+        for kind in EVENT_KINDS:
+            for column in EVENT_COLUMNS:
+                events[kind][column] = stored[f"{kind}.{column}"]
+    _loaded[path] = (mtime, events)
+    return events
+
+def _save_events(data_dir, station_id, events):
+    def write(path):
+        with open(path, "wb") as f:
+            np.savez(f, **{f"{kind}.{column}": events[kind][column] for kind in EVENT_KINDS for column in EVENT_COLUMNS})
+    atomic_write(_events_path(data_dir, station_id), write)
+
+def _read_dirty(data_dir, station_id):
+    try:
+        with open(_dirty_path(data_dir, station_id)) as f:
+            return json.load(f)["dirty_from"]
+    except FileNotFoundError:
+        return None
+
+def _write_dirty(data_dir, station_id, dirty_from):
+    path = _dirty_path(data_dir, station_id)
+    if dirty_from is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump({"dirty_from": dirty_from}, f)
+    atomic_write(path, write)
+
+def mark_events_dirty(data_dir, datastream, changed_ts):
+    """Note that stored wind points changed from the earliest of changed_ts on, so the next update redoes events from there"""
+    metadata = datastream.get("metadata", {})
+    if not len(changed_ts) or metadata.get("table") != "Five_Min" or metadata.get("field") not in EVENT_FIELDS:
+        return
+    station_id = datastream.get("station_id")
+    first = int(np.min(changed_ts))
+    with _events_lock(station_id):
+        dirty_from = _read_dirty(data_dir, station_id)
+        if dirty_from is None or first < dirty_from:
+            _write_dirty(data_dir, station_id, first)
+
+def segment(ts, values, on, off):
+    """(starts, ends) of events: from the first point at or above on, through the last point at or above off
+    before the field stays below off for END_HOLD_MS, kept if they last at least MIN_DURATION_MS"""
+    held = ts[values >= off]
+    armed = ts[values >= on]
+    if not armed.size:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(held) > END_HOLD_MS)
+    run_starts = np.append(held[0], held[breaks + 1])
+    run_ends = np.append(held[breaks], held[-1])
+    first_armed = armed[np.minimum(np.searchsorted(armed, run_starts, side="left"), armed.size - 1)]
+    keep = (first_armed >= run_starts) & (first_armed <= run_ends) & (run_ends - first_armed >= MIN_DURATION_MS)
+    return first_armed[keep], run_ends[keep]
+
+def _held_run_start(data_dir, datastream_id, ts, off):
+    """Start of the stored run of points at or above off, with no gap over END_HOLD_MS, that reaches ts, or ts if none does.
+    Segmenting again from there gives the same events a full rebuild would, even for a run not yet long enough to keep."""
+    start = ts
+    while True:
+        scan_ts, values = read_range(data_dir, datastream_id, start - HOLD_SCAN_MS, start - 1)
+        chain = np.append(scan_ts[values >= off], start)
+        breaks = np.flatnonzero(np.diff(chain) > END_HOLD_MS)
+        if breaks.size:
+            return int(chain[breaks[-1] + 1])
+        if chain.size == 1:
+            return start
+        start = int(chain[0])
+
+def _window(series, start, end):
+    ts, values = series
+    lo = np.searchsorted(ts, start, side="left")
+    hi = np.searchsorted(ts, end, side="right")
+    return ts[lo:hi], values[lo:hi]
+
+def summarize(starts, ends, gust, speed, direction):
+    """Peak gust and its time, peak and mean speed, and the speed-weighted mean direction of each event"""
+    rows = {column: [] for column in EVENT_COLUMNS}
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        gust_ts, gust_values = _window(gust, start, end)
+        speed_ts, speed_values = _window(speed, start, end)
+        dir_ts, dir_values = _window(direction, start, end)
+        finite_gust = np.isfinite(gust_values)
+        finite_speed = np.isfinite(speed_values)
+        peak = int(np.nanargmax(gust_values)) if finite_gust.any() else None
+        _, speed_idx, dir_idx = np.intersect1d(speed_ts, dir_ts, return_indices=True)
+        weights, angles = speed_values[speed_idx], np.radians(dir_values[dir_idx])
+        valid = np.isfinite(weights) & np.isfinite(angles)
+        if valid.any():
+            heading = np.degrees(np.arctan2((weights[valid] * np.sin(angles[valid])).sum(),
+                                            (weights[valid] * np.cos(angles[valid])).sum())) % 360
+        else:
+            heading = np.nan
+        rows["start"].append(start)
+        rows["end"].append(end)
+        rows["peak_gust"].append(float(gust_values[peak]) if peak is not None else np.nan)
+        rows["peak_gust_ts"].append(int(gust_ts[peak]) if peak is not None else start)
+        rows["peak_speed"].append(float(np.nanmax(speed_values)) if finite_speed.any() else np.nan)
+        rows["mean_speed"].append(float(np.nanmean(speed_values)) if finite_speed.any() else np.nan)
+        rows["direction"].append(float(heading))
+    return {column: np.asarray(rows[column], dtype=np.int64 if column in ("start", "end", "peak_gust_ts") else np.float64)
+            for column in EVENT_COLUMNS}
+
+def update_events(data_dir, datastreams):
+    """Bring a station's event index up to date with its stored wind history and return it.
+    Only the stretch from the earliest change since the last update is segmented again, pulled back to the start
+    of any run the changed points could extend; the first build reads the whole history."""
+    streams = event_streams(datastreams)
+    if not any(EVENT_KINDS[kind]["field"] in streams for kind in EVENT_KINDS):
+        return None
+    station_id = next(iter(streams.values())).get("station_id")
+    with _events_lock(station_id):
+        events = load_events(data_dir, station_id)
+        dirty_from = _read_dirty(data_dir, station_id)
+        if events is not None and dirty_from is None:
+            return events
+
+        if events is None:
+            events, from_ts = _empty_events(), -END_OF_TIME
+        else:
+            from_ts = dirty_from - END_HOLD_MS
+            for spec in EVENT_KINDS.values():
+                if spec["field"] in streams:
+                    from_ts = min(from_ts, _held_run_start(data_dir, streams[spec["field"]]["id"], dirty_from, spec["off"]))
+
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        series = {field: read_range(data_dir, ds["id"], from_ts, END_OF_TIME) for field, ds in streams.items()}
+        gust, speed, direction = (series.get(field, empty) for field in EVENT_FIELDS)
+        for kind, spec in EVENT_KINDS.items():
+            kept = events[kind]["start"] < from_ts
+            fresh = summarize(*segment(*series.get(spec["field"], empty), spec["on"], spec["off"]), gust, speed, direction)
+            events[kind] = {column: np.concatenate([events[kind][column][kept], fresh[column]]) for column in EVENT_COLUMNS}
+        _save_events(data_dir, station_id, events)
+        _write_dirty(data_dir, station_id, None)
+    return load_events(data_dir, station_id)
+
+def sector_index(directions):
+    """Index into SECTORS of each direction in degrees; -1 where it's unknown"""
+    directions = np.asarray(directions, dtype=np.float64)
+    finite = np.isfinite(directions)
+    return np.where(finite, ((np.where(finite, directions, 0) + 22.5) % 360 // 45).astype(np.int64), -1)
+
+def query_events(events, kind, min_peak_gust=None, sectors=None, start_ts=None, end_ts=None, limit=None):
+    """Events of one kind matching the filters, newest first, as {column: array}"""
+    columns = events[kind]
+    keep = np.ones(columns["start"].size, dtype=bool)
+    if min_peak_gust is not None:
+        keep &= columns["peak_gust"] >= min_peak_gust
+    if sectors:
+        keep &= np.isin(sector_index(columns["direction"]), [SECTORS.index(sector) for sector in sectors])
+    if start_ts is not None:
+        keep &= columns["end"] >= start_ts
+    if end_ts is not None:
+        keep &= columns["start"] <= end_ts
+    rows = np.flatnonzero(keep)[::-1][:limit]
+    return {column: columns[column][rows] for column in EVENT_COLUMNS}
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from store.derived import DERIVED_SERIES, compute_derived
+from store.history import read_range, stored_extent
+from store.ingest import fetch_range
+from store.rollups import DAY_MS
+
+EXPORT_CHUNK_MS = 30 * DAY_MS
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+def column_label(datastream):
+    """Export column name for a datastream, e.g. "WS_mph_Max (Five_Min)" """
+    metadata = datastream.get("metadata", {})
+    return f"{metadata.get('field', datastream.get('id'))} ({metadata.get('table', '')})"
+
+def _read_chunk(config, token, datastream, start_ts, end_ts):
+    """(ts, values) for one chunk, from the local store when it covers the chunk, else the API"""
+    if datastream.get("derived"):
+        lookback = DERIVED_SERIES[datastream["derived"]]["lookback_ms"]
+        inputs = [_read_chunk(config, token, ds, start_ts - lookback, end_ts) for ds in datastream["inputs"]]
+        ts, values = compute_derived(datastream["derived"], inputs)
+        keep = ts >= start_ts
+        return ts[keep], values[keep]
+
+    first_ts, last_ts = stored_extent(config["DATA_DIR"], datastream["id"])
+    if first_ts is not None and first_ts <= start_ts and last_ts >= end_ts:
+        return read_range(config["DATA_DIR"], datastream["id"], start_ts, end_ts)
+
+    ts_parts, value_parts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.float64)]
+    for page in fetch_range(config["BASE_URL"], token, config["ORGANIZATION_ID"], datastream["id"], start_ts, end_ts):
+        if page is None:
+            raise RuntimeError(f"Failed to fetch {column_label(datastream)} for export")
+        ts_parts.append(page[0])
+        value_parts.append(page[1])
+    return np.concatenate(ts_parts), np.concatenate(value_parts)
+
+def iter_export_chunks(config, token, datastreams, start_ts, end_ts):
+    """Yield one DataFrame per time chunk, with a UTC Time column and one column per datastream.
+    Only one chunk is held in memory at a time."""
+    labels = [column_label(ds) for ds in datastreams]
+    chunk_start = start_ts
+    while chunk_start <= end_ts:
+        chunk_end = min(chunk_start + EXPORT_CHUNK_MS - 1, end_ts)
+        columns = {}
+        for ds, label in zip(datastreams, labels):
+            ts, values = _read_chunk(config, token, ds, chunk_start, chunk_end)
+            columns[label] = pd.Series(values, index=ts, dtype=np.float64)
+        chunk = pd.concat(columns, axis=1).reindex(columns=labels).sort_index()
+        if len(chunk):
+            chunk.insert(0, "Time", pd.to_datetime(chunk.index, unit="ms", utc=True))
+            yield chunk.reset_index(drop=True)
+        chunk_start = chunk_end + 1
+
+def iter_csv(chunks):
+    """UTF-8 CSV bytes with ISO UTC times, matching the dashboard's raw data export, one piece per chunk"""
+    yield b"\xef\xbb\xbf"
+    header = True
+    for chunk in chunks:
+        chunk["Time"] = chunk["Time"].dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3] + "Z"
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+class _PieceSink:
+    """Write-only file for ParquetWriter that hands back what was written since the last take()"""
+
+    def __init__(self):
+        self._pieces = []
+        self._size = 0
+        self.closed = False
+
+    def write(self, data):
+        self._pieces.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._pieces)
+        self._pieces = []
+        return data
+
+def iter_parquet(chunks, labels):
+    """Parquet bytes, one row group per chunk, handed on as each row group is written"""
+    schema = pa.schema([("Time", pa.timestamp("ms", tz="UTC"))] + [(label, pa.float64()) for label in labels])
+    sink = _PieceSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            piece = sink.take()
+            if piece:
+                yield piece
+    yield sink.take()
+
+def iter_export(config, token, datastreams, start_ts, end_ts, export_format):
+    """The export file as a stream of bytes, built a chunk at a time so memory stays flat for any range"""
+    chunks = iter_export_chunks(config, token, datastreams, start_ts, end_ts)
+    if export_format == "Parquet":
+        return iter_parquet(chunks, [column_label(ds) for ds in datastreams])
+    return iter_csv(chunks)
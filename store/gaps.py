@@ -0,0 +1,150 @@
+import os
+import numpy as np
+from store.history import atomic_write, datastream_lock
+from store.rollups import FIVE_MIN_MS, HOUR_MS
+
+# Tables logged on a fixed slot, whose missing records are worth tracking
+TABLE_SLOT_MS = {"Five_Min": FIVE_MIN_MS}
+GAP_FIELDS = ["start", "end", "attempts", "next_try"]
+REPAIR_MAX_ATTEMPTS = 6
+# Doubles after every repair attempt that comes back without the missing records
+REPAIR_RETRY_MS = HOUR_MS
+
+def slot_interval(datastream):
+    """Logging interval of a datastream's table in ms, or None if gaps aren't tracked for it"""
+    return TABLE_SLOT_MS.get(datastream.get("metadata", {}).get("table", ""))
+
+def _gaps_path(data_dir, datastream_id):
+    return os.path.join(data_dir, "gaps", f"{datastream_id}.npz")
+
+def _empty_gaps(slot_ms):
+    gaps = {name: np.empty(0, dtype=np.int64) for name in GAP_FIELDS}
+    gaps["slot_ms"] = slot_ms
+    return gaps
+
+def load_gaps(data_dir, datastream_id, slot_ms=FIVE_MIN_MS):
+    """Sorted, disjoint missing-slot intervals; start and end are the first and last missing slot"""
+    try:
+        with np.load(_gaps_path(data_dir, datastream_id)) as stored:
+            gaps = {name: stored[name] for name in GAP_FIELDS}
+            gaps["slot_ms"] = int(stored["slot_ms"])
+            return gaps
+    except FileNotFoundError:
+        return _empty_gaps(slot_ms)
+
+def _save_gaps(data_dir, datastream_id, gaps):
+    def write(path):
+        with open(path, "wb") as f:
+            np.savez(f, slot_ms=np.int64(gaps["slot_ms"]), **{name: gaps[name] for name in GAP_FIELDS})
+    atomic_write(_gaps_path(data_dir, datastream_id), write)
+
+def _runs(slots, slot_ms):
+    """(starts, ends) of runs of consecutive slots in a sorted unique array"""
+    breaks = np.flatnonzero(np.diff(slots) != slot_ms)
+    return np.append(slots[0], slots[breaks + 1]), np.append(slots[breaks], slots[-1])
+
+def _subtract(gaps, slots):
+    """Remove present slots from the gap intervals, splitting any they land inside"""
+    if not gaps["start"].size or not slots.size:
+        return gaps
+    slot_ms = gaps["slot_ms"]
+    run_starts, run_ends = _runs(slots, slot_ms)
+    pieces = {name: [] for name in GAP_FIELDS}
+    for start, end, attempts, next_try in zip(*(gaps[name] for name in GAP_FIELDS)):
+        lo = np.searchsorted(run_ends, start, side="left")
+        hi = np.searchsorted(run_starts, end, side="right")
+        cursor = start
+        for run_start, run_end in zip(run_starts[lo:hi], run_ends[lo:hi]):
+            if run_start > cursor:
+                for name, value in zip(GAP_FIELDS, (cursor, run_start - slot_ms, attempts, next_try)):
+                    pieces[name].append(value)
+            cursor = max(cursor, run_end + slot_ms)
+        if cursor <= end:
+            for name, value in zip(GAP_FIELDS, (cursor, end, attempts, next_try)):
+                pieces[name].append(value)
+    result = {name: np.asarray(pieces[name], dtype=np.int64) for name in GAP_FIELDS}
+    result["slot_ms"] = slot_ms
+    return result
+
+def update_gaps(data_dir, datastream_id, slot_ms, previous_extent, ts):
+    """Fold a batch of stored timestamps into the gap index.
+    Slots skipped between the previous extent and the batch become gaps; slots the batch fills are removed."""
+    if not len(ts):
+        return
+    slots = np.unique(np.asarray(ts, dtype=np.int64) // slot_ms * slot_ms)
+    first_ts, last_ts = previous_extent
+    with datastream_lock(datastream_id):
+        gaps = load_gaps(data_dir, datastream_id, slot_ms)
+        new = []
+        if first_ts is None:
+            new.append((slots[0], slots[-1]))
+        else:
+            if slots[-1] > last_ts:
+                new.append((last_ts // slot_ms * slot_ms + slot_ms, slots[-1]))
+            if slots[0] < first_ts:
+                new.append((slots[0], first_ts // slot_ms * slot_ms - slot_ms))
+        new = [(start, end) for start, end in new if start <= end]
+        if new:
+            starts = np.concatenate([gaps["start"], [start for start, _ in new]])
+            order = np.argsort(starts, kind="stable")
+            gaps = {
+                "start": starts[order],
+                "end": np.concatenate([gaps["end"], [end for _, end in new]])[order],
+                "attempts": np.concatenate([gaps["attempts"], np.zeros(len(new), dtype=np.int64)])[order],
+                "next_try": np.concatenate([gaps["next_try"], np.zeros(len(new), dtype=np.int64)])[order],
+                "slot_ms": slot_ms
+            }
+        before = gaps["start"].size, int((gaps["end"] - gaps["start"]).sum())
+        gaps = _subtract(gaps, slots)
+        if new or before != (gaps["start"].size, int((gaps["end"] - gaps["start"]).sum())):
+            _save_gaps(data_dir, datastream_id, gaps)
+
+def gaps_in(data_dir, datastream_id, start_ts, end_ts):
+    """(starts, ends) of the missing time overlapping [start_ts, end_ts], as half-open [start, end) intervals"""
+    gaps = load_gaps(data_dir, datastream_id)
+    keep = (gaps["end"] >= start_ts) & (gaps["start"] <= end_ts)
+    return gaps["start"][keep], gaps["end"][keep] + gaps["slot_ms"]
+
+def gap_summary(data_dir, datastream_id):
+    """Gap count, missing slots, and how many gaps the repair job has given up on"""
+    gaps = load_gaps(data_dir, datastream_id)
+    missing = int(((gaps["end"] - gaps["start"]) // gaps["slot_ms"] + 1).sum())
+    return {"gaps": int(gaps["start"].size), "missing_slots": missing, "missing_ms": missing * gaps["slot_ms"],
+            "abandoned": int((gaps["attempts"] >= REPAIR_MAX_ATTEMPTS).sum())}
+
+def repair_ranges(data_dir, datastream_id, now, max_slots):
+    """Due gaps merged, newest first, into as few [start, end] fetches as fit max_slots each"""
+    gaps = load_gaps(data_dir, datastream_id)
+    due = (gaps["attempts"] < REPAIR_MAX_ATTEMPTS) & (gaps["next_try"] <= now)
+    slot_ms = gaps["slot_ms"]
+    ranges = []
+    for start, end in zip(gaps["start"][due][::-1], gaps["end"][due][::-1]):
+        if ranges and (ranges[-1][1] - start) // slot_ms + 1 <= max_slots:
+            ranges[-1] = (int(start), ranges[-1][1])
+        else:
+            ranges.append((int(start), int(end)))
+    return ranges
+
+def record_repair_attempt(data_dir, datastream_id, start_ts, end_ts, now):
+    """Push back the next try for gaps in a fetched range that are still missing"""
+    with datastream_lock(datastream_id):
+        gaps = load_gaps(data_dir, datastream_id)
+        tried = (gaps["start"] >= start_ts) & (gaps["end"] <= end_ts)
+        if not tried.any():
+            return
+        gaps["attempts"] = np.where(tried, gaps["attempts"] + 1, gaps["attempts"])
+        gaps["next_try"] = np.where(tried, now + REPAIR_RETRY_MS * 2 ** gaps["attempts"], gaps["next_try"])
+        _save_gaps(data_dir, datastream_id, gaps)
+
+def insert_breaks(ts, values, gap_starts, gap_ends, bucket_ms):
+    """Put a NaN at the start of each [start, end) gap that swallows a whole bucket of the series
+    and that the series has no points in, so line charts break there instead of drawing across it"""
+    keep = -(-gap_starts // bucket_ms) * bucket_ms + bucket_ms <= gap_ends
+    gap_starts, gap_ends = gap_starts[keep], gap_ends[keep]
+    at = np.searchsorted(ts, gap_starts, side="left")
+    empty = at == np.searchsorted(ts, gap_ends - bucket_ms, side="right")
+    inside = (at > 0) & (at < len(ts))
+    at, gap_starts = at[empty & inside], gap_starts[empty & inside]
+    if not at.size:
+        return ts, values
+    return np.insert(ts, at, gap_starts), np.insert(np.asarray(values, dtype=np.float64), at, np.nan)
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+PARTITION_TZ = "America/Denver"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def datastream_lock(datastream_id):
+    """Per-datastream lock so concurrent sessions don't interleave writes"""
+    with _locks_guard:
+        return _locks.setdefault(datastream_id, threading.RLock())
+
+def _datastream_dir(data_dir, datastream_id):
+    return os.path.join(data_dir, "history", datastream_id)
+
+def _partition_path(data_dir, datastream_id, month):
+    return os.path.join(_datastream_dir(data_dir, datastream_id), f"{month}.npz")
+
+def _index_path(data_dir, datastream_id):
+    return os.path.join(_datastream_dir(data_dir, datastream_id), "index.json")
+
+def atomic_write(path, write):
+    """Write via a temp file and rename so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def month_keys(ts):
+    """Month partition key (YYYY-MM, station local time) for each epoch-ms timestamp"""
+    local = pd.to_datetime(ts, unit="ms", utc=True).tz_convert(PARTITION_TZ)
+    return np.asarray(local.strftime("%Y-%m"))
+
+def load_index(data_dir, datastream_id):
+    """Partition index with per-month count and min/max zone maps"""
+    try:
+        with open(_index_path(data_dir, datastream_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _save_index(data_dir, datastream_id, index):
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(index, f, sort_keys=True)
+    atomic_write(_index_path(data_dir, datastream_id), write)
+
+def read_partition(data_dir, datastream_id, month):
+    """Read one month partition as (ts, values) arrays"""
+    try:
+        with np.load(_partition_path(data_dir, datastream_id, month)) as partition:
+            return partition["ts"], partition["value"]
+    except FileNotFoundError:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+def _write_partition(data_dir, datastream_id, month, ts, values):
+    def write(path):
+        with open(path, "wb") as f:
+            np.savez(f, ts=ts, value=values)
+    atomic_write(_partition_path(data_dir, datastream_id, month), write)
+
+def merge_points(old_ts, old_values, new_ts, new_values):
+    """Merge two series by timestamp; new values win on duplicates. Returns sorted arrays"""
+    ts = np.concatenate([new_ts, old_ts])
+    values = np.concatenate([new_values, old_values])
+    # np.unique keeps the first occurrence, which is the new point
+    ts, first = np.unique(ts, return_index=True)
+    return ts, values[first]
+
+def append_points(data_dir, datastream_id, ts, values):
+    """Merge points into their month partitions; returns the timestamps that were new or changed"""
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if ts.size == 0:
+        return ts
+
+    changed = [np.empty(0, dtype=np.int64)]
+    with datastream_lock(datastream_id):
+        index = load_index(data_dir, datastream_id)
+        keys = month_keys(ts)
+        for month in np.unique(keys):
+            in_month = keys == month
+            new_ts, new_values = ts[in_month], values[in_month]
+            old_ts, old_values = read_partition(data_dir, datastream_id, month)
+            merged_ts, merged_values = merge_points(old_ts, old_values, new_ts, new_values)
+
+            if old_ts.size:
+                pos = np.minimum(np.searchsorted(old_ts, new_ts), old_ts.size - 1)
+                unchanged = (old_ts[pos] == new_ts) & (old_values[pos] == new_values)
+                changed.append(new_ts[~unchanged])
+            else:
+                changed.append(new_ts)
+
+            _write_partition(data_dir, datastream_id, month, merged_ts, merged_values)
+            finite = merged_values[np.isfinite(merged_values)]
+            index[str(month)] = {
+                "count": int(merged_ts.size),
+                "min_ts": int(merged_ts[0]),
+                "max_ts": int(merged_ts[-1]),
+                "min": float(finite.min()) if finite.size else None,
+                "max": float(finite.max()) if finite.size else None
+            }
+        _save_index(data_dir, datastream_id, index)
+    return np.unique(np.concatenate(changed))
+
+def read_range(data_dir, datastream_id, start_ts, end_ts):
+    """Read [start_ts, end_ts] from the partitions that overlap it"""
+    index = load_index(data_dir, datastream_id)
+    ts_parts, value_parts = [], []
+    for month in sorted(index):
+        zone = index[month]
+        if zone["max_ts"] < start_ts or zone["min_ts"] > end_ts:
+            continue
+        ts, values = read_partition(data_dir, datastream_id, month)
+        lo = np.searchsorted(ts, start_ts, side="left")
+        hi = np.searchsorted(ts, end_ts, side="right")
+        ts_parts.append(ts[lo:hi])
+        value_parts.append(values[lo:hi])
+    if not ts_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return np.concatenate(ts_parts), np.concatenate(value_parts)
+
+def stored_extent(data_dir, datastream_id):
+    """(first_ts, last_ts) held locally for a datastream, or (None, None)"""
+    index = load_index(data_dir, datastream_id)
+    if not index:
+        return None, None
+    return min(z["min_ts"] for z in index.values()), max(z["max_ts"] for z in index.values())
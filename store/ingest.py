@@ -0,0 +1,133 @@
+import time
+from api.campbell_client import fetch_datapoint_arrays
+from api.throttle import PRIORITY_BACKFILL, PRIORITY_HISTORY
+from store.events import mark_events_dirty
+from store.gaps import gaps_in, insert_breaks, record_repair_attempt, repair_ranges, slot_interval, update_gaps
+from store.history import append_points, datastream_lock, stored_extent
+from store.rollups import CHART_POINT_BUDGET, DAY_MS, LEVELS, query_series, series_column, update_rollups
+
+PAGE_LIMIT = 15000
+MAX_API_WINDOW_HOURS = 72
+RANGE_HOURS = {"12 Hours": 12, "24 Hours": 24, "72 Hours": 72, "7 Days": 168, "30 Days": 720, "90 Days": 2160}
+MIN_SYNC_INTERVAL_S = 60
+# About one full page of 5-minute points
+BACKFILL_CHUNK_MS = PAGE_LIMIT * 5 * 60 * 1000
+# Gap repair fetches per sync, so a long outage is worked through over several syncs
+REPAIR_RANGES_PER_SYNC = 4
+
+_last_sync = {}
+_backfilled_to = {}
+_point_listeners = []
+
+def is_circular(datastream):
+    """Whether a datastream holds directions in degrees"""
+    return "Dir" in datastream.get("metadata", {}).get("field", "")
+
+def on_points(listener):
+    """Register listener(datastream_id, ts, values), called with every batch of points fetched upstream"""
+    _point_listeners.append(listener)
+
+def publish_points(datastream_id, ts, values):
+    """Hand a batch of fetched points to the registered listeners"""
+    for listener in _point_listeners:
+        listener(datastream_id, ts, values)
+
+def ingest_points(data_dir, datastream, ts, values):
+    """Store new points, roll them up, update the gap index and flag the event index; returns the timestamps that changed"""
+    slot_ms = slot_interval(datastream)
+    with datastream_lock(datastream["id"]):
+        extent = stored_extent(data_dir, datastream["id"]) if slot_ms else None
+        changed = append_points(data_dir, datastream["id"], ts, values)
+        if slot_ms:
+            update_gaps(data_dir, datastream["id"], slot_ms, extent, ts)
+    update_rollups(data_dir, datastream["id"], changed, circular=is_circular(datastream))
+    mark_events_dirty(data_dir, datastream, changed)
+    publish_points(datastream["id"], ts, values)
+    return changed
+
+def fetch_range(base_url, token, organization_id, datastream_id, start_ts, end_ts, priority=PRIORITY_HISTORY):
+    """Yield (ts, values) pages covering [start_ts, end_ts], following the API's per-call limit.
+    Yields None and stops if a request fails or the request budget defers it."""
+    while start_ts <= end_ts:
+        page = fetch_datapoint_arrays(base_url, token, organization_id, datastream_id, start_ts, end_ts, PAGE_LIMIT, priority)
+        if page is None:
+            yield None
+            return
+        if not page[0].size:
+            return
+        yield page
+        if page[0].size < PAGE_LIMIT:
+            return
+        start_ts = int(page[0][-1]) + 1
+
+def sync_datastream(base_url, token, organization_id, data_dir, datastream, backfill_days):
+    """Bring the local history up to now and back to backfill_days ago, fetching only what's missing"""
+    datastream_id = datastream["id"]
+    now = int(time.time() * 1000)
+    want_start = now - int(backfill_days * DAY_MS)
+
+    with datastream_lock(datastream_id):
+        recent = time.monotonic() - _last_sync.get(datastream_id, float("-inf")) < MIN_SYNC_INTERVAL_S
+        if recent and _backfilled_to.get(datastream_id, now) <= want_start:
+            return
+
+        first_ts, last_ts = stored_extent(data_dir, datastream_id)
+        if first_ts is None:
+            ranges = [(max(want_start, now - MAX_API_WINDOW_HOURS * 60 * 60 * 1000), now, PRIORITY_HISTORY)]
+            if want_start < ranges[0][0]:
+                ranges.append((want_start, ranges[0][0] - 1, PRIORITY_BACKFILL))
+        else:
+            ranges = [(last_ts + 1, now, PRIORITY_HISTORY)]
+            if want_start < min(first_ts, _backfilled_to.get(datastream_id, first_ts)):
+                ranges.append((want_start, first_ts - 1, PRIORITY_BACKFILL))
+
+        for start_ts, end_ts, priority in ranges:
+            chunks = [(start_ts, end_ts)]
+            if priority == PRIORITY_BACKFILL:
+                # Newest first, so a deferred backfill leaves the stored history contiguous
+                chunks = [(max(start_ts, chunk_end - BACKFILL_CHUNK_MS + 1), chunk_end)
+                          for chunk_end in range(end_ts, start_ts - 1, -BACKFILL_CHUNK_MS)]
+            for chunk_start, chunk_end in chunks:
+                for page in fetch_range(base_url, token, organization_id, datastream_id, chunk_start, chunk_end, priority):
+                    if page is None:
+                        return
+                    ingest_points(data_dir, datastream, *page)
+
+        _last_sync[datastream_id] = time.monotonic()
+        _backfilled_to[datastream_id] = min(want_start, _backfilled_to.get(datastream_id, want_start))
+        if slot_interval(datastream):
+            repair_gaps(base_url, token, organization_id, data_dir, datastream)
+
+def repair_gaps(base_url, token, organization_id, data_dir, datastream, max_ranges=REPAIR_RANGES_PER_SYNC):
+    """Re-request the gap index's due intervals, merged into page-sized ranges, at backfill priority.
+    Returns the number of ranges fetched."""
+    now = int(time.time() * 1000)
+    ranges = repair_ranges(data_dir, datastream["id"], now, PAGE_LIMIT)[:max_ranges]
+    for start_ts, end_ts in ranges:
+        for page in fetch_range(base_url, token, organization_id, datastream["id"], start_ts, end_ts, PRIORITY_BACKFILL):
+            if page is None:
+                return ranges.index((start_ts, end_ts))
+            ingest_points(data_dir, datastream, *page)
+        record_repair_attempt(data_dir, datastream["id"], start_ts, end_ts, now)
+    return len(ranges)
+
+def with_breaks(data_dir, datastream, ts, values, bucket_ms=None):
+    """(ts, values) with a NaN at each indexed gap the series skips, so line charts break instead of bridging it.
+    bucket_ms is the series' resolution, the table's logging interval for raw points."""
+    slot_ms = slot_interval(datastream)
+    if not slot_ms or not len(ts):
+        return ts, values
+    gap_starts, gap_ends = gaps_in(data_dir, datastream["id"], int(ts[0]), int(ts[-1]))
+    return insert_breaks(ts, values, gap_starts, gap_ends, bucket_ms or slot_ms)
+
+def load_window(config, token, datastream, start_ts, end_ts, column="mean", max_points=CHART_POINT_BUDGET, breaks=False):
+    """Sync local history, then read a window from the rollup pyramid as (ts, values).
+    With breaks, gaps that swallow a whole bucket come back as NaN points."""
+    backfill_days = (int(time.time() * 1000) - start_ts) / DAY_MS
+    sync_datastream(config["BASE_URL"], token, config["ORGANIZATION_ID"], config["DATA_DIR"], datastream, backfill_days)
+    circular = is_circular(datastream)
+    series = query_series(config["DATA_DIR"], datastream["id"], start_ts, end_ts, max_points, circular=circular)
+    ts, values = series_column(series, "direction" if circular else column)
+    if breaks:
+        return with_breaks(config["DATA_DIR"], datastream, ts, values, dict(LEVELS)[series["level"]])
+    return ts, values
@@ -0,0 +1,36 @@
+import numpy as np
+from store.ingest import is_circular
+from store.rollups import CHART_POINT_BUDGET, query_series, series_column
+from store.series_cache import peek_series
+
+def downsample(ts, values, max_points, how="mean"):
+    """Equal-count buckets reduced to at most max_points, keeping each bucket's first timestamp"""
+    if ts.size <= max_points:
+        return ts, values
+    starts = np.linspace(0, ts.size, max_points, endpoint=False).astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if how == "max":
+        return ts[starts], np.fmax.reduceat(values, starts)
+    finite = np.isfinite(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.add.reduceat(np.where(finite, values, 0.0), starts) / np.add.reduceat(finite.astype(np.float64), starts)
+    return ts[starts], means
+
+def local_window(config, datastream, start_ts, end_ts, column="mean", max_points=CHART_POINT_BUDGET):
+    """(ts, values) for a past window from the series cache or the local store, never upstream.
+    Returns None if neither holds any of it."""
+    series = peek_series(config["BASE_URL"], config["ORGANIZATION_ID"], datastream["id"], start_ts, end_ts)
+    if series is None or not series[0].size:
+        circular = is_circular(datastream)
+        stored = query_series(config["DATA_DIR"], datastream["id"], start_ts, end_ts, max_points, circular=circular)
+        series = series_column(stored, "direction" if circular else column)
+        if not series[0].size:
+            return None
+    return downsample(series[0], series[1], max_points, "max" if column == "max" else "mean")
+
+def overlay_series(config, datastream, start_ts, end_ts, offset_ms, column="mean", max_points=CHART_POINT_BUDGET):
+    """The window offset_ms earlier, shifted forward onto [start_ts, end_ts] so it lines up on relative time"""
+    window = local_window(config, datastream, start_ts - offset_ms, end_ts - offset_ms, column, max_points)
+    if window is None:
+        return None
+    return window[0] + offset_ms, window[1]
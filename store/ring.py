@@ -0,0 +1,191 @@
+import mmap
+import os
+import threading
+import time
+import numpy as np
+
+RING_MAGIC = b"CCRING01"
+# Records per datastream: two weeks of 5-minute points, 64 KiB per file
+RING_CAPACITY = 4096
+HEADER_BYTES = 64
+HEADER = np.dtype([("magic", "S8"), ("seq", "<u8"), ("capacity", "<u8"), ("count", "<u8"),
+                   ("covered_from", "<i8"), ("updated_ms", "<i8"), ("poll_ms", "<i8")])
+RECORD = np.dtype([("ts", "<i8"), ("value", "<f8")])
+# A ring the daemon hasn't touched for this many poll intervals is ignored
+STALE_POLLS = 3
+READ_RETRIES = 100
+
+_ring_dir = None
+_readers = {}
+_readers_lock = threading.Lock()
+
+def ring_path(ring_dir, datastream_id):
+    return os.path.join(ring_dir, f"{datastream_id}.ring")
+
+def configure_shared_ring(data_dir):
+    """Read recent windows and latest values from the ingestion daemon's rings under data_dir/ring"""
+    global _ring_dir
+    _ring_dir = os.path.join(data_dir, "ring")
+
+def _views(buf, capacity):
+    return np.frombuffer(buf, HEADER, count=1), np.frombuffer(buf, RECORD, count=capacity, offset=HEADER_BYTES)
+
+def _ordered(records, count, capacity):
+    """The ring's records as one or two slices, oldest first"""
+    if count <= capacity:
+        return [records[:count]]
+    head = count % capacity
+    return [records[head:], records[:head]]
+
+class RingWriter:
+    """Single writer of one datastream's ring file.
+    Each update bumps the header's sequence number to odd, writes, then bumps it back to even (a seqlock),
+    so readers in other processes can copy a consistent window without taking a lock."""
+
+    def __init__(self, ring_dir, datastream_id, poll_s, capacity=RING_CAPACITY):
+        # Only the daemon writes, so readers (imported by the API client) don't pull in the history store
+        from store.history import atomic_write
+
+        self.path = ring_path(ring_dir, datastream_id)
+        size = HEADER_BYTES + capacity * RECORD.itemsize
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != size:
+            def write(path):
+                with open(path, "wb") as f:
+                    header = np.zeros(1, HEADER)
+                    header["magic"], header["capacity"], header["poll_ms"] = RING_MAGIC, capacity, int(poll_s * 1000)
+                    f.write(header.tobytes().ljust(HEADER_BYTES, b"\0"))
+                    f.truncate(size)
+            atomic_write(self.path, write)
+        with open(self.path, "r+b") as f:
+            self._buf = mmap.mmap(f.fileno(), size)
+        self._header, self._records = _views(self._buf, capacity)
+        self.capacity = capacity
+        self._header["poll_ms"] = int(poll_s * 1000)
+
+    @property
+    def last_ts(self):
+        count = int(self._header["count"][0])
+        return int(self._records["ts"][(count - 1) % self.capacity]) if count else None
+
+    def append(self, ts, values):
+        """Add points newer than the last record, keeping the newest capacity of them"""
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        last_ts = self.last_ts
+        if last_ts is not None:
+            newer = ts > last_ts
+            ts, values = ts[newer], values[newer]
+        truncated = ts.size > self.capacity
+        ts, values = ts[-self.capacity:], values[-self.capacity:]
+        header = self._header
+        header["seq"] += 1
+        count = int(header["count"][0])
+        slots = (count + np.arange(ts.size)) % self.capacity
+        self._records["ts"][slots] = ts
+        self._records["value"][slots] = values
+        count += ts.size
+        header["count"] = count
+        if count > self.capacity or truncated:
+            header["covered_from"] = max(int(header["covered_from"][0]), int(self._records["ts"][count % self.capacity]))
+        header["updated_ms"] = int(time.time() * 1000)
+        header["seq"] += 1
+
+    def reset(self, covered_from):
+        """Drop every record before a fresh fill from covered_from; readers ignore the ring until the next append"""
+        header = self._header
+        header["seq"] += 1
+        header["count"] = 0
+        header["covered_from"] = covered_from
+        header["updated_ms"] = 0
+        header["seq"] += 1
+
+    def touch(self):
+        """Mark the ring as fresh after a poll that found nothing new"""
+        self.append(np.empty(0, dtype=np.int64), np.empty(0))
+
+    def close(self):
+        self._buf.close()
+
+class RingReader:
+    """Read-only mapping of a ring file; the page cache is shared by every process that maps it"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(self._buf, HEADER, count=1)
+        if header["magic"][0] != RING_MAGIC:
+            raise ValueError(f"{path} is not a ring file")
+        self._header, self._records = _views(self._buf, int(header["capacity"][0]))
+
+    def snapshot(self, read):
+        """Call read(header, records) until it runs between two equal, even sequence numbers"""
+        header = self._header
+        for attempt in range(READ_RETRIES):
+            seq = int(header["seq"][0])
+            if seq % 2 == 0:
+                result = read(header[0], self._records)
+                if int(header["seq"][0]) == seq:
+                    return result
+            time.sleep(0 if attempt < 10 else 0.001)
+        return None
+
+    def fresh(self, now_ms):
+        header = self._header[0]
+        return now_ms - int(header["updated_ms"]) <= STALE_POLLS * max(int(header["poll_ms"]), 1000)
+
+    def window(self, start_ts, end_ts):
+        """(ts, values) copied out for [start_ts, end_ts], or None if the ring doesn't reach back to start_ts"""
+        def read(header, records):
+            if int(header["covered_from"]) > start_ts:
+                return None
+            ts_parts, value_parts = [], []
+            for part in _ordered(records, int(header["count"]), records.size):
+                lo = np.searchsorted(part["ts"], start_ts, side="left")
+                hi = np.searchsorted(part["ts"], end_ts, side="right")
+                ts_parts.append(part["ts"][lo:hi])
+                value_parts.append(part["value"][lo:hi])
+            return np.concatenate(ts_parts), np.concatenate(value_parts)
+        return self.snapshot(read)
+
+    def latest(self):
+        """(ts, value) of the newest record, or None if the ring is empty"""
+        def read(header, records):
+            count = int(header["count"])
+            if not count:
+                return None
+            record = records[(count - 1) % records.size]
+            return int(record["ts"]), float(record["value"])
+        return self.snapshot(read)
+
+def _reader(datastream_id):
+    """Fresh reader for a datastream's ring, reopened if the daemon replaced the file; None without one"""
+    if _ring_dir is None:
+        return None
+    path = ring_path(_ring_dir, datastream_id)
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    with _readers_lock:
+        reader = _readers.get(datastream_id)
+        if reader is None or reader.inode != inode:
+            try:
+                reader = _readers[datastream_id] = RingReader(path)
+            except (OSError, ValueError):
+                return None
+    return reader if reader.fresh(int(time.time() * 1000)) else None
+
+def shared_window(datastream_id, start_ts, end_ts):
+    """(ts, values) from the shared ring if it's fresh and covers the window, else None"""
+    reader = _reader(datastream_id)
+    return reader.window(start_ts, end_ts) if reader else None
+
+def shared_latest(datastream_id):
+    """The newest point in the shared ring, shaped like a brief /datapoints/last response, or None"""
+    reader = _reader(datastream_id)
+    latest = reader.latest() if reader else None
+    if latest is None:
+        return None
+    ts, value = latest
+    return {"data": [{"ts": ts, "value": None if np.isnan(value) else value}]}
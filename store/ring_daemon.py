@@ -0,0 +1,88 @@
+"""Ingestion daemon that keeps the recent window of every datastream in shared ring files.
+
+    python -m store.ring_daemon
+    python -m store.ring_daemon --poll 30 --hours 72
+    python -m store.ring_daemon --once
+
+Run one next to several `streamlit run app.py` workers that share DATA_DIR. The workers read recent
+series and latest values from the memory-mapped rings under DATA_DIR/ring instead of each polling
+Campbell Cloud, and fall back to the upstream when a ring goes stale (the daemon stopped or is failing).
+"""
+import argparse
+import os
+import time
+import requests
+from api.campbell_client import get_access_token, get_datastreams
+from api.fanout import fan_out
+from api.throttle import PRIORITY_HISTORY, PRIORITY_LATEST, UpstreamUnavailable, configure_budget
+from config.settings import load_config
+from store.ingest import fetch_range
+from store.ring import RingWriter
+from store.rollups import DAY_MS, FIVE_MIN_MS, HOUR_MS
+
+# How often each table logs; a datastream isn't polled again until its next record is due
+TABLE_INTERVAL_MS = {"Five_Min": FIVE_MIN_MS, "Hourly": HOUR_MS, "Twelve_Hours": 12 * HOUR_MS, "Twenty_Four_Hours": DAY_MS}
+
+def poll_datastream(config, token, writer, datastream, now, window_ms):
+    """Top up one ring; returns the number of new points, or None if the fetch failed"""
+    last_ts = writer.last_ts
+    if last_ts is None or last_ts < now - window_ms:
+        start_ts, priority = now - window_ms, PRIORITY_HISTORY
+        writer.reset(start_ts)
+    elif now < last_ts + TABLE_INTERVAL_MS.get(datastream.get("metadata", {}).get("table", ""), 0):
+        writer.touch()
+        return 0
+    else:
+        start_ts, priority = last_ts + 1, PRIORITY_LATEST
+
+    added = 0
+    for page in fetch_range(config["BASE_URL"], token, config["ORGANIZATION_ID"], datastream["id"], start_ts, now, priority):
+        if page is None:
+            # Left untouched, so readers fall back to the upstream if this keeps failing
+            return None
+        writer.append(*page)
+        added += page[0].size
+    writer.touch()
+    return added
+
+def run(config, poll_s, window_hours, once=False):
+    """Poll every datastream into its ring each poll_s seconds"""
+    configure_budget(config["MAX_CONCURRENT_REQUESTS"], config["MAX_REQUESTS_PER_SECOND"])
+    ring_dir = os.path.join(config["DATA_DIR"], "ring")
+    window_ms = int(window_hours * HOUR_MS)
+    writers = {}
+    while True:
+        started = time.monotonic()
+        try:
+            token = get_access_token(config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
+            datastreams = get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"])["data"]
+        except (UpstreamUnavailable, requests.exceptions.RequestException) as e:
+            print(f"Campbell Cloud is unavailable: {e}", flush=True)
+            datastreams = []
+        for ds in datastreams:
+            if ds["id"] not in writers:
+                writers[ds["id"]] = RingWriter(ring_dir, ds["id"], poll_s)
+
+        now = int(time.time() * 1000)
+        results = fan_out(
+            (lambda ds=ds: poll_datastream(config, token, writers[ds["id"]], ds, now, window_ms)) for ds in datastreams
+        )
+        failed = sum(added is None for added in results)
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {len(results)} datastreams, "
+              f"{sum(added or 0 for added in results)} new points, {failed} failed "
+              f"in {time.monotonic() - started:.2f}s", flush=True)
+        if once:
+            return
+        time.sleep(max(0.0, poll_s - (time.monotonic() - started)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--poll", type=float, help="Seconds between polls (default: RING_POLL_S)")
+    parser.add_argument("--hours", type=float, help="Window kept in each ring (default: RING_HOURS)")
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args()
+    config = load_config()
+    run(config, args.poll or config["RING_POLL_S"], args.hours or config["RING_HOURS"], args.once)
+
+if __name__ == "__main__":
+    main()
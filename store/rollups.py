@@ -0,0 +1,152 @@
+import os
+import numpy as np
+import pandas as pd
+from store.history import PARTITION_TZ, datastream_lock, read_range, atomic_write
+
+FIVE_MIN_MS = 5 * 60 * 1000
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+CHART_POINT_BUDGET = 2500
+
+# Finest to coarsest; each level is built from the one before it
+LEVELS = [("5min", FIVE_MIN_MS), ("hourly", HOUR_MS), ("daily", DAY_MS)]
+STAT_FIELDS = ["count", "sum", "min", "max", "sum_sin", "sum_cos"]
+
+def _rollup_path(data_dir, datastream_id, level):
+    return os.path.join(data_dir, "rollups", datastream_id, f"{level}.npz")
+
+def _empty_rollup():
+    rollup = {"ts": np.empty(0, dtype=np.int64)}
+    for name in STAT_FIELDS:
+        rollup[name] = np.empty(0, dtype=np.float64)
+    return rollup
+
+def load_rollup(data_dir, datastream_id, level):
+    """Load one pyramid level as a dict of column arrays"""
+    try:
+        with np.load(_rollup_path(data_dir, datastream_id, level)) as stored:
+            rollup = {name: stored[name] for name in ["ts"] + STAT_FIELDS}
+            rollup["circular"] = bool(stored["circular"])
+            return rollup
+    except FileNotFoundError:
+        rollup = _empty_rollup()
+        rollup["circular"] = False
+        return rollup
+
+def _save_rollup(data_dir, datastream_id, level, rollup, circular):
+    def write(path):
+        with open(path, "wb") as f:
+            np.savez(f, circular=np.bool_(circular), **{name: rollup[name] for name in ["ts"] + STAT_FIELDS})
+    atomic_write(_rollup_path(data_dir, datastream_id, level), write)
+
+def hour_bucket(ts):
+    return ts - ts % HOUR_MS
+
+def day_bucket(ts):
+    """Local-midnight bucket start for each timestamp, so days match the station's calendar"""
+    local = pd.to_datetime(ts, unit="ms", utc=True).tz_convert(PARTITION_TZ).normalize()
+    return np.asarray(local.tz_convert("UTC").as_unit("ms").asi8, dtype=np.int64)
+
+def raw_stats(values, circular):
+    """Per-point stats for raw values, ready to be combined into buckets"""
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+    radians = np.radians(clean)
+    return {
+        "count": finite.astype(np.float64),
+        "sum": clean,
+        "min": np.where(finite, values, np.inf),
+        "max": np.where(finite, values, -np.inf),
+        "sum_sin": np.where(finite, np.sin(radians), 0.0) if circular else np.zeros_like(clean),
+        "sum_cos": np.where(finite, np.cos(radians), 0.0) if circular else np.zeros_like(clean)
+    }
+
+def combine(bucket_keys, stats):
+    """Combine sorted per-row stats into one row per bucket key"""
+    if bucket_keys.size == 0:
+        return _empty_rollup()
+    starts = np.flatnonzero(np.r_[True, bucket_keys[1:] != bucket_keys[:-1]])
+    combined = {"ts": bucket_keys[starts]}
+    for name in ["count", "sum", "sum_sin", "sum_cos"]:
+        combined[name] = np.add.reduceat(stats[name], starts)
+    combined["min"] = np.minimum.reduceat(stats["min"], starts)
+    combined["max"] = np.maximum.reduceat(stats["max"], starts)
+    return combined
+
+def _replace_buckets(rollup, updates):
+    """Replace or insert the updated bucket rows, keeping the level sorted"""
+    keep = ~np.isin(rollup["ts"], updates["ts"])
+    merged = {name: np.concatenate([rollup[name][keep], updates[name]]) for name in ["ts"] + STAT_FIELDS}
+    order = np.argsort(merged["ts"], kind="stable")
+    return {name: column[order] for name, column in merged.items()}
+
+def _select(rollup, mask):
+    return {name: rollup[name][mask] for name in ["ts"] + STAT_FIELDS}
+
+def update_rollups(data_dir, datastream_id, changed_ts, circular=False):
+    """Recompute only the hourly and daily buckets touched by newly ingested timestamps"""
+    changed_ts = np.asarray(changed_ts, dtype=np.int64)
+    if changed_ts.size == 0:
+        return
+
+    with datastream_lock(datastream_id):
+        hours = np.unique(hour_bucket(changed_ts))
+        ts, values = read_range(data_dir, datastream_id, int(hours[0]), int(hours[-1]) + HOUR_MS - 1)
+        in_changed = np.isin(hour_bucket(ts), hours)
+        hourly_updates = combine(hour_bucket(ts[in_changed]), raw_stats(values[in_changed], circular))
+        hourly = _replace_buckets(load_rollup(data_dir, datastream_id, "hourly"), hourly_updates)
+        _save_rollup(data_dir, datastream_id, "hourly", hourly, circular)
+
+        days = np.unique(day_bucket(hours))
+        hourly_days = day_bucket(hourly["ts"])
+        in_days = np.isin(hourly_days, days)
+        daily_updates = combine(hourly_days[in_days], _select(hourly, in_days))
+        daily = _replace_buckets(load_rollup(data_dir, datastream_id, "daily"), daily_updates)
+        _save_rollup(data_dir, datastream_id, "daily", daily, circular)
+
+def choose_level(start_ts, end_ts, max_points=CHART_POINT_BUDGET):
+    """Finest pyramid level whose bucket count for the range fits the point budget"""
+    span = max(end_ts - start_ts, 1)
+    for level, step in LEVELS:
+        if span / step <= max_points:
+            return level
+    return LEVELS[-1][0]
+
+def _series_from_rollup(rollup, level, circular):
+    count = rollup["count"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, rollup["sum"] / count, np.nan)
+    series = {
+        "level": level,
+        "ts": rollup["ts"],
+        "mean": mean,
+        "min": np.where(count > 0, rollup["min"], np.nan),
+        "max": np.where(count > 0, rollup["max"], np.nan),
+        "count": count
+    }
+    if circular:
+        series["direction"] = np.degrees(np.arctan2(rollup["sum_sin"], rollup["sum_cos"])) % 360
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Resultant length: 1 for a steady direction, near 0 when it swung all around
+            series["steadiness"] = np.hypot(rollup["sum_sin"], rollup["sum_cos"]) / count
+    return series
+
+def query_series(data_dir, datastream_id, start_ts, end_ts, max_points=CHART_POINT_BUDGET, circular=False):
+    """Read a range at the coarsest resolution that still fills the chart's point budget"""
+    level = choose_level(start_ts, end_ts, max_points)
+    if level == "5min":
+        ts, values = read_range(data_dir, datastream_id, start_ts, end_ts)
+        stats = raw_stats(values, circular)
+        stats["ts"] = ts
+        return _series_from_rollup(stats, level, circular)
+
+    rollup = load_rollup(data_dir, datastream_id, level)
+    lo = np.searchsorted(rollup["ts"], start_ts, side="left")
+    hi = np.searchsorted(rollup["ts"], end_ts, side="right")
+    return _series_from_rollup(_select(rollup, slice(lo, hi)), level, circular or rollup["circular"])
+
+def series_column(series, column="mean"):
+    """(ts, values) for one column of a queried series, skipping empty buckets"""
+    values = series[column]
+    keep = np.isfinite(values)
+    return series["ts"][keep], values[keep]
@@ -0,0 +1,186 @@
+import threading
+from collections import deque
+import numpy as np
+from store.ingest import on_points
+from store.rollups import FIVE_MIN_MS, HOUR_MS
+from store.series_cache import RETENTION_MS
+
+# Per-field checks on Five_Min streams. A run of identical readings at least flatline_ms long, or a rolling
+# standard deviation below min_std over a full window, marks the stream suspect: an iced cup set reads near
+# zero with almost no variance and an iced vane repeats the same direction, which real wind never does.
+SENSOR_CHECKS = {
+    "WS_mph_S_WVT": {"label": "wind speed", "flatline_ms": HOUR_MS, "min_std": 0.05},
+    "WS_mph_Max": {"label": "gust", "flatline_ms": HOUR_MS, "min_std": 0.05},
+    "WindDir_D1_WVT": {"label": "wind direction", "flatline_ms": HOUR_MS, "min_std": 0.5},
+    "AirTF_Avg": {"label": "temperature", "flatline_ms": 3 * HOUR_MS, "min_std": None}
+}
+WIND_FIELDS = ["WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT"]
+# Rolling variance window: one hour of 5-minute records
+WINDOW_POINTS = 12
+# A gust this far below the average speed logged at the same time can't both be right
+GUST_TOLERANCE_MPH = 0.5
+# Speed/gust points kept to pair with the other stream's point at the same timestamp
+PAIR_POINTS = 24
+# Suspect intervals closer than this are merged
+MERGE_MS = 2 * FIVE_MIN_MS
+
+class SensorHealth:
+    """Tracks rolling variance, flatline runs and speed/gust consistency per stream as points arrive, O(1) per
+    point, and records the intervals each stream looked faulty so readers can exclude or mark them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._last_ts = {}
+        self._state = {}
+        self._pairs = {}
+        self._intervals = {}
+
+    def watch(self, datastreams):
+        """Start checking the datastreams that have a sensor check"""
+        with self._lock:
+            for ds in datastreams:
+                metadata = ds.get("metadata", {})
+                if metadata.get("table") == "Five_Min" and metadata.get("field") in SENSOR_CHECKS:
+                    self._streams[ds.get("id")] = ds
+
+    def ingest(self, datastream_id, ts, values):
+        """Check newly arrived points; anything at or before the last seen timestamp is skipped"""
+        if not len(ts) or datastream_id not in self._streams:
+            return
+        with self._lock:
+            last_ts = self._last_ts.get(datastream_id)
+            start = 0 if last_ts is None else int(np.searchsorted(ts, last_ts, side="right"))
+            if start == len(ts):
+                return
+            self._last_ts[datastream_id] = int(ts[-1])
+            ds = self._streams[datastream_id]
+            field = ds["metadata"]["field"]
+            check = SENSOR_CHECKS[field]
+            state = self._state.setdefault(datastream_id, {
+                "window": deque(), "sum": 0.0, "sumsq": 0.0, "run_value": None, "run_start": None, "prev_ts": None
+            })
+            pair_key = (ds.get("station_id"), "speed" if field == "WS_mph_S_WVT" else "gust")
+            other_key = (ds.get("station_id"), "gust" if field == "WS_mph_S_WVT" else "speed")
+            for point_ts, value in zip(ts[start:].tolist(), values[start:].tolist()):
+                if value != value:
+                    continue
+                self._update(datastream_id, check, state, point_ts, value)
+                if field in ("WS_mph_S_WVT", "WS_mph_Max"):
+                    self._check_pair(datastream_id, field, pair_key, other_key, point_ts, value)
+            self._prune(datastream_id)
+
+    def _update(self, datastream_id, check, state, ts, value):
+        """Fold one point into the stream's rolling window and flatline run"""
+        window = state["window"]
+        if state["prev_ts"] is not None and ts - state["prev_ts"] > WINDOW_POINTS * FIVE_MIN_MS:
+            # Points either side of a long gap don't make one window or one run
+            window.clear()
+            state["sum"] = state["sumsq"] = 0.0
+            state["run_value"] = None
+        state["prev_ts"] = ts
+        window.append((ts, value))
+        state["sum"] += value
+        state["sumsq"] += value * value
+        if len(window) > WINDOW_POINTS:
+            _, old = window.popleft()
+            state["sum"] -= old
+            state["sumsq"] -= old * old
+
+        if value != state["run_value"]:
+            state["run_value"], state["run_start"] = value, ts
+        elif ts - state["run_start"] >= check["flatline_ms"]:
+            self._flag(datastream_id, state["run_start"], ts, f"{check['label']} stuck at {value:g}")
+
+        if check["min_std"] is not None and len(window) == WINDOW_POINTS:
+            mean = state["sum"] / WINDOW_POINTS
+            variance = max(state["sumsq"] / WINDOW_POINTS - mean * mean, 0.0)
+            if variance < check["min_std"] ** 2:
+                self._flag(datastream_id, window[0][0], ts, f"{check['label']} barely changing")
+
+    def _check_pair(self, datastream_id, field, pair_key, other_key, ts, value):
+        """Flag a gust below the average speed logged at the same time"""
+        mine = self._pairs.setdefault(pair_key, {"points": {}, "order": deque(), "ids": set()})
+        mine["ids"].add(datastream_id)
+        mine["points"][ts] = value
+        mine["order"].append(ts)
+        if len(mine["order"]) > PAIR_POINTS:
+            mine["points"].pop(mine["order"].popleft(), None)
+        other = self._pairs.get(other_key)
+        if other is None or ts not in other["points"]:
+            return
+        speed, gust = (value, other["points"][ts]) if field == "WS_mph_S_WVT" else (other["points"][ts], value)
+        if gust < speed - GUST_TOLERANCE_MPH:
+            for ds_id in mine["ids"] | other["ids"]:
+                self._flag(ds_id, ts, ts, "gust below average speed")
+
+    def _flag(self, datastream_id, start, end, reason):
+        intervals = self._intervals.setdefault(datastream_id, [])
+        if intervals and start <= intervals[-1]["end"] + MERGE_MS and end >= intervals[-1]["start"] - MERGE_MS:
+            last = intervals[-1]
+            last["start"], last["end"] = min(last["start"], start), max(last["end"], end)
+            if reason not in last["reasons"]:
+                last["reasons"].append(reason)
+        else:
+            intervals.append({"start": start, "end": end, "reasons": [reason]})
+
+    def _prune(self, datastream_id):
+        intervals = self._intervals.get(datastream_id)
+        cutoff = self._last_ts[datastream_id] - RETENTION_MS
+        while intervals and intervals[0]["end"] < cutoff:
+            intervals.pop(0)
+
+    def intervals(self, datastream_ids, start_ts, end_ts):
+        """Suspect intervals of any of the datastreams overlapping [start_ts, end_ts], oldest first"""
+        with self._lock:
+            found = [dict(interval, datastream_id=ds_id, reasons=list(interval["reasons"]))
+                     for ds_id in datastream_ids for interval in self._intervals.get(ds_id, ())
+                     if interval["end"] >= start_ts and interval["start"] <= end_ts]
+        return sorted(found, key=lambda interval: interval["start"])
+
+    def suspect_mask(self, datastream_ids, ts):
+        """Boolean mask of the timestamps inside any of the datastreams' suspect intervals"""
+        ts = np.asarray(ts, dtype=np.int64)
+        mask = np.zeros(ts.size, dtype=bool)
+        if not ts.size:
+            return mask
+        for interval in self.intervals(datastream_ids, int(ts[0]), int(ts[-1])):
+            lo = np.searchsorted(ts, interval["start"], side="left")
+            hi = np.searchsorted(ts, interval["end"], side="right")
+            mask[lo:hi] = True
+        return mask
+
+    def suspect_at(self, datastream_ids, ts):
+        """Reasons the datastreams were suspect at ts, or an empty list.
+        A reading newer than anything checked yet is judged by the newest checked point."""
+        reasons = []
+        for ds_id in datastream_ids:
+            checked_ts = min(ts, self._last_ts.get(ds_id, ts))
+            for interval in self.intervals([ds_id], checked_ts, checked_ts):
+                reasons += [reason for reason in interval["reasons"] if reason not in reasons]
+        return reasons
+
+_health = SensorHealth()
+on_points(_health.ingest)
+
+def get_sensor_health():
+    """Return the shared sensor-health tracker"""
+    return _health
+
+def wind_datastream_ids(datastreams):
+    """Ids of the Five_Min wind speed, gust and direction streams, whose faults taint each other's readings"""
+    return [ds.get("id") for ds in datastreams
+            if ds.get("metadata", {}).get("table") == "Five_Min" and ds.get("metadata", {}).get("field") in WIND_FIELDS]
+
+def sensor_ids(datastreams, table_field):
+    """Ids of the streams whose faults taint a (table, field)'s readings: every wind stream for a wind field, else its own"""
+    if table_field[0] == "Five_Min" and table_field[1] in WIND_FIELDS:
+        return wind_datastream_ids(datastreams)
+    return [ds.get("id") for ds in datastreams
+            if (ds.get("metadata", {}).get("table"), ds.get("metadata", {}).get("field")) == table_field]
+
+def suspect_masks(series, datastreams):
+    """{(table, field): mask} of the points of each (ts, values) series logged while its sensors looked faulty.
+    Series that couldn't be fetched (None) get no mask."""
+    return {table_field: _health.suspect_mask(sensor_ids(datastreams, table_field), pair[0])
+            for table_field, pair in series.items() if pair is not None}
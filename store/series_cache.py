@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from store.ingest import fetch_range, publish_points
+from store.ring import shared_window
+
+SERIES_TTL_S = 300
+RETENTION_MS = 72 * 60 * 60 * 1000
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+class CompactSeries:
+    """Datapoints held as delta-encoded timestamps and float32 values in read-only buffers"""
+
+    __slots__ = ("base_ts", "deltas", "values")
+
+    def __init__(self, ts, values):
+        ts = np.asarray(ts, dtype=np.int64)
+        self.base_ts = int(ts[0]) if ts.size else 0
+        deltas = np.diff(ts, prepend=self.base_ts)
+        # int32 covers gaps of up to ~24 days between consecutive points
+        fits_int32 = not deltas.size or deltas.max() <= np.iinfo(np.int32).max
+        self.deltas = deltas.astype(np.int32 if fits_int32 else np.int64)
+        self.values = np.array(values, dtype=np.float32)
+        self.deltas.setflags(write=False)
+        self.values.setflags(write=False)
+
+    def __len__(self):
+        return self.values.size
+
+    @property
+    def nbytes(self):
+        return self.deltas.nbytes + self.values.nbytes
+
+    def timestamps(self):
+        return self.base_ts + np.cumsum(self.deltas, dtype=np.int64)
+
+    def window(self, start_ts, end_ts):
+        """(ts, values) for [start_ts, end_ts]; values is a read-only view, not a copy"""
+        ts = self.timestamps()
+        lo = np.searchsorted(ts, start_ts, side="left")
+        hi = np.searchsorted(ts, end_ts, side="right")
+        return ts[lo:hi], self.values[lo:hi]
+
+    def extended(self, new_ts, new_values, keep_from_ts):
+        """New series with points appended and anything before keep_from_ts dropped; self is untouched"""
+        ts = self.timestamps()
+        keep = ts >= keep_from_ts
+        new_ts = np.asarray(new_ts, dtype=np.int64)
+        newer = new_ts > (ts[-1] if ts.size else np.iinfo(np.int64).min)
+        return CompactSeries(np.concatenate([ts[keep], new_ts[newer]]),
+                             np.concatenate([self.values[keep], np.asarray(new_values, dtype=np.float32)[newer]]))
+
+class SeriesCache:
+    """Process-wide LRU of compact series, bounded by a memory budget rather than entry count"""
+
+    def __init__(self, memory_budget_bytes):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def fetch_lock(self, key):
+        """Lock held while one session refreshes a key, so concurrent sessions reuse its fetch"""
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key, series, covered_from, fetched_at):
+        entry = {"series": series, "covered_from": covered_from, "fetched_at": fetched_at}
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous["series"].nbytes
+            self._entries[key] = entry
+            self._bytes += series.nbytes
+            while self._bytes > self.memory_budget_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["series"].nbytes
+                self._evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "points": sum(len(e["series"]) for e in self._entries.values()),
+                "bytes": self._bytes,
+                "budget_bytes": self.memory_budget_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions
+            }
+
+_cache = SeriesCache(DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024)
+
+def get_series_cache():
+    """Return the shared series cache"""
+    return _cache
+
+def configure_series_cache(memory_budget_mb):
+    """Resize the shared cache's memory budget"""
+    _cache.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+    return _cache
+
+def _fetch(base_url, token, organization_id, datastream_id, start_ts, end_ts):
+    """Fetch a range as (ts, values), or None if the upstream request failed"""
+    ts_parts, value_parts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.float64)]
+    for page in fetch_range(base_url, token, organization_id, datastream_id, start_ts, end_ts):
+        if page is None:
+            return None
+        ts_parts.append(page[0])
+        value_parts.append(page[1])
+    ts, values = np.concatenate(ts_parts), np.concatenate(value_parts)
+    publish_points(datastream_id, ts, values)
+    return ts, values
+
+def get_series(base_url, token, organization_id, datastream_id, start_epoch, end_epoch):
+    """(ts, values) arrays for a recent window, served from the shared cache and topped up incrementally.
+    Returns None if the upstream request failed and nothing usable is cached."""
+    shared = shared_window(datastream_id, start_epoch, end_epoch)
+    if shared is not None:
+        publish_points(datastream_id, *shared)
+        return shared
+
+    key = (base_url, organization_id, datastream_id)
+    cache = get_series_cache()
+
+    entry = cache.get(key)
+    if entry is not None and entry["covered_from"] <= start_epoch and time.time() - entry["fetched_at"] < SERIES_TTL_S:
+        return entry["series"].window(start_epoch, end_epoch)
+
+    with cache.fetch_lock(key):
+        entry = cache.get(key)
+        now = time.time()
+        if entry is not None and entry["covered_from"] <= start_epoch:
+            if now - entry["fetched_at"] >= SERIES_TTL_S:
+                series = entry["series"]
+                last_ts = int(series.timestamps()[-1]) if len(series) else entry["covered_from"] - 1
+                fetched = _fetch(base_url, token, organization_id, datastream_id, last_ts + 1, end_epoch)
+                if fetched is not None:
+                    keep_from = max(entry["covered_from"], end_epoch - RETENTION_MS)
+                    entry = cache.put(key, series.extended(*fetched, keep_from), keep_from, now)
+        else:
+            fetched = _fetch(base_url, token, organization_id, datastream_id, start_epoch, end_epoch)
+            if fetched is None:
+                return None
+            entry = cache.put(key, CompactSeries(*fetched), start_epoch, now)
+        return entry["series"].window(start_epoch, end_epoch)
+
+def peek_series(base_url, organization_id, datastream_id, start_epoch, end_epoch):
+    """Cached (ts, values) for a window the cache or the shared ring already covers, without fetching; None otherwise"""
+    shared = shared_window(datastream_id, start_epoch, end_epoch)
+    if shared is not None:
+        return shared
+    entry = get_series_cache().get((base_url, organization_id, datastream_id))
+    if entry is None or entry["covered_from"] > start_epoch:
+        return None
+    return entry["series"].window(start_epoch, end_epoch)
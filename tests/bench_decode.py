@@ -0,0 +1,55 @@
+"""Microbenchmark for decoding brief datapoint responses into (ts, values) arrays.
+
+    python -m tests.bench_decode
+    python -m tests.bench_decode --points 15000 --repeat 50
+
+Compares the previous path (the standard library parser behind response.json(), then a generator per column),
+orjson with the same per-point conversion when it's installed, and api.campbell_client.decode_datapoints,
+on synthetic compact 5-minute payloads.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from api.campbell_client import decode_datapoints, orjson, points_to_arrays
+
+def synthetic_payload(points, seed=0):
+    """A compact brief payload like the API's, with realistic values and a few nulls"""
+    rng = np.random.default_rng(seed)
+    ts = 1760000000000 + np.arange(points, dtype=np.int64) * 5 * 60 * 1000
+    values = np.round(15 + 10 * np.sin(np.arange(points) / 36) + rng.normal(0, 2, points), 3)
+    data = [{"ts": int(t), "value": None if rng.random() < 0.01 else float(v)} for t, v in zip(ts, values)]
+    return json.dumps({"data": data}, separators=(",", ":")).encode()
+
+def _time(decode, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decode(content)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=15000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    content = synthetic_payload(args.points)
+    decoders = {"json, per point": lambda c: points_to_arrays(json.loads(c)["data"])}
+    if orjson is not None:
+        decoders["orjson, per point"] = lambda c: points_to_arrays(orjson.loads(c)["data"])
+    decoders["decode_datapoints"] = decode_datapoints
+
+    expected = decoders["json, per point"](content)
+    print(f"{args.points:,} points, {len(content) / 1024:.0f} KiB, best of {args.repeat}")
+    baseline = None
+    for name, decode in decoders.items():
+        ts, values = decode(content)
+        assert np.array_equal(ts, expected[0]) and np.array_equal(values, expected[1], equal_nan=True), name
+        seconds = _time(decode, content, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:>17}: {seconds * 1000:7.2f} ms  {args.points / seconds / 1e6:6.2f} M points/s  {baseline / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
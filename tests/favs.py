@@ -1,88 +1,210 @@
-import requests
+"""Fetch favorite measurements from Campbell Cloud without the dashboard.
+
+    python -m tests.favs
+    python -m tests.favs --field Five_Min:WS_mph_Max --field Hourly:BattV_Min --format json
+    python -m tests.favs --hours 24 --format csv --output winds.csv
+    python -m tests.favs --start 2025-10-01 --end 2025-10-08 --format ndjson
+
+Uses the app's pooled, token-managed client and request budget, and reads credentials from the same
+CAMPBELL_* settings as the app (environment variables first, then .streamlit/secrets.toml).
+Without a range it prints the latest value of each favorite; with one, every point in the range.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
 from datetime import datetime
+from zoneinfo import ZoneInfo
+import requests
+import streamlit as st
+from streamlit import config as st_config
+from streamlit.logger import set_log_level
+from api.campbell_client import get_access_token, get_datastreams
+from api.fanout import fan_out, fetch_latest_values
+from api.throttle import UpstreamUnavailable, configure_budget
+from store.ingest import fetch_range
 
-# Configuration
-BASE_URL = "https://us-west-2.campbell-cloud.com"
-USERNAME = ""
-PASSWORD = ""
-ORGANIZATION_ID = ""
-
-def get_access_token():
-    url = f"{BASE_URL}/api/v1/tokens"
-    payload = {
-        "username": USERNAME,
-        "password": PASSWORD,
-        "client_id": "cloud",
-        "grant_type": "password"
-    }
-    
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
-    return response.json()["access_token"]
-
-def get_datastreams(token):
-    url = f"{BASE_URL}/api/v1/organizations/{ORGANIZATION_ID}/datastreams"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()
-
-def get_latest_datapoint(token, datastream_id):
-    url = f"{BASE_URL}/api/v1/organizations/{ORGANIZATION_ID}/datastreams/{datastream_id}/datapoints/last"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"brief": "true"}
-    
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    return None
+FAVORITES = {
+    "Five_Min": ["WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT", "AirTF_Avg", "RH"],
+    "Twelve_Hours": ["BattV_Min", "PTemp_C_Max"],
+    "Twenty_Four_Hours": ["WS_mph_Max", "WS_mph_Avg", "WindDir_D1_WVT"]
+}
+FORMATS = ("text", "json", "csv", "ndjson")
+COLUMNS = ["station_id", "table", "field", "ts", "time", "value"]
+HOUR_MS = 60 * 60 * 1000
+# History is fetched in windows of this size, all in parallel
+WINDOW_HOURS = 72
+STATION_TZ = ZoneInfo("America/Denver")
 
-def main():
-    print("=== Campbell Cloud - SM Favorite Measurements ===\n")
-    
-    # Authenticate
-    token = get_access_token()
-    
-    # Get datastreams
-    datastreams = get_datastreams(token)
-    
-    # Define favorite measurements
-    favorites = {
-        "Five_Min": ["WS_mph_S_WVT", "WS_mph_Max", "WindDir_D1_WVT", "AirTF_Avg", "RH"],
-        "Twelve_Hours": ["BattV_Min", "PTemp_C_Max"],
-        "Twenty_Four_Hours": ["WS_mph_Max", "WS_mph_Avg", "WindDir_D1_WVT"]
+def _setting(name, default=None):
+    """A setting from the environment, falling back to Streamlit secrets"""
+    if os.environ.get(name):
+        return os.environ[name]
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        return default
+
+def load_cli_config(args):
+    """The subset of the app's config the CLI needs, with command-line overrides"""
+    config = {
+        "BASE_URL": args.base_url or _setting("CAMPBELL_BASE_URL"),
+        "USERNAME": _setting("CAMPBELL_USERNAME"),
+        "PASSWORD": _setting("CAMPBELL_PASSWORD"),
+        "ORGANIZATION_ID": args.organization or _setting("CAMPBELL_ORGANIZATION_ID"),
+        "STATION_ID": args.station if args.station is not None else _setting("CAMPBELL_STATION_ID", ""),
+        "MAX_CONCURRENT_REQUESTS": int(_setting("MAX_CONCURRENT_REQUESTS", 8)),
+        "MAX_REQUESTS_PER_SECOND": float(_setting("MAX_REQUESTS_PER_SECOND", 10))
     }
-    
-    # Collect favorite data
-    favorite_data = []
-    
+    missing = [name for name in ("BASE_URL", "USERNAME", "PASSWORD", "ORGANIZATION_ID") if not config[name]]
+    if missing:
+        raise SystemExit(f"Missing settings: {', '.join('CAMPBELL_' + name for name in missing)}")
+    return config
+
+def parse_fields(specs):
+    """{table: [fields]} from TABLE:FIELD specs, or the default favorites if there are none"""
+    if not specs:
+        return FAVORITES
+    favorites = {}
+    for spec in specs:
+        table, sep, field = spec.partition(":")
+        if not sep or not table or not field:
+            raise argparse.ArgumentTypeError(f"Expected TABLE:FIELD, got {spec!r}")
+        favorites.setdefault(table, []).append(field)
+    return favorites
+
+def _epoch_ms(value):
+    """Epoch ms from an ISO date or datetime; naive values are read as local time"""
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+def match_favorites(datastreams, favorites, station_id=""):
+    """Datastreams for the favorites, in favorites order"""
+    by_key = {}
     for ds in datastreams:
+        if station_id and ds.get("station_id") != station_id:
+            continue
         metadata = ds.get("metadata", {})
-        table_name = metadata.get("table", "")
-        field_name = metadata.get("field", "")
-        
-        if table_name in favorites and field_name in favorites[table_name]:
-            latest = get_latest_datapoint(token, ds.get("id"))
-            if latest and latest.get("data"):
-                favorite_data.append({
-                    "field": field_name,
-                    "table": table_name,
-                    "latest": latest["data"][0]
-                })
-    
-    # Display favorites
-    if favorite_data:
-        for item in favorite_data:
-            timestamp = datetime.fromtimestamp(item["latest"]["ts"] / 1000)
-            print(f"{item['field']} ({item['table']})")
-            print(f"  Value: {item['latest']['value']}")
-            print(f"  Time: {timestamp}")
-            print()
+        by_key.setdefault((metadata.get("table", ""), metadata.get("field", "")), []).append(ds)
+    return [ds for table, fields in favorites.items() for field in fields for ds in by_key.get((table, field), [])]
+
+def _row(ds, ts, value):
+    metadata = ds.get("metadata", {})
+    return {"station_id": ds.get("station_id", ""), "table": metadata.get("table", ""),
+            "field": metadata.get("field", ""), "ts": int(ts), "value": value}
+
+def _with_times(rows):
+    for row in rows:
+        row["time"] = datetime.fromtimestamp(row["ts"] / 1000, STATION_TZ).isoformat()
+    return rows
+
+def latest_rows(config, token, matched):
+    """One row per datastream with its latest value, fetched concurrently"""
+    latest = fetch_latest_values(config["BASE_URL"], token, config["ORGANIZATION_ID"], [ds["id"] for ds in matched])
+    rows = []
+    for ds in matched:
+        points = (latest.get(ds["id"]) or {}).get("data") or []
+        if points:
+            rows.append(_row(ds, points[0]["ts"], points[0]["value"]))
+    return _with_times(rows)
+
+def _fetch_window(config, token, datastream_id, start_ts, end_ts):
+    """(ts, values) pages for one API window; None if a page failed or was deferred"""
+    pages = list(fetch_range(config["BASE_URL"], token, config["ORGANIZATION_ID"], datastream_id, start_ts, end_ts))
+    return None if None in pages else pages
+
+def history_rows(config, token, matched, start_ts, end_ts):
+    """Rows for every point in [start_ts, end_ts]; each datastream's range is split into API windows fetched concurrently.
+    Returns (rows, number of windows that failed)."""
+    window = WINDOW_HOURS * HOUR_MS
+    chunks = [(ds, lo, min(lo + window - 1, end_ts)) for ds in matched for lo in range(start_ts, end_ts + 1, window)]
+    results = fan_out(
+        (lambda ds=ds, lo=lo, hi=hi: _fetch_window(config, token, ds["id"], lo, hi)) for ds, lo, hi in chunks
+    )
+    rows = []
+    for (ds, _, _), pages in zip(chunks, results):
+        for ts, values in pages or []:
+            rows.extend(_row(ds, t, None if v != v else v) for t, v in zip(ts.tolist(), values.tolist()))
+    return _with_times(rows), sum(pages is None for pages in results)
+
+def _text_value(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+def write_rows(rows, fmt, out):
+    """Write rows as text, a JSON array, CSV, or newline-delimited JSON"""
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+    elif fmt == "ndjson":
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+    elif fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    elif not rows:
+        out.write("No favorite measurements found.\n")
+    else:
+        width = max(len(f"{row['field']} ({row['table']})") for row in rows)
+        for row in rows:
+            out.write(f"{row['field'] + ' (' + row['table'] + ')':<{width}}  {_text_value(row['value']):>10}  {row['time']}\n")
+
+def main():
+    # Bare mode warns on every cached call; nothing here needs a script run context.
+    # Parse the config first so reading secrets later doesn't reset the level.
+    st_config.get_config_options()
+    set_log_level("error")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--field", action="append", metavar="TABLE:FIELD",
+                        help="Measurement to fetch; repeat for several (default: the built-in favorites)")
+    parser.add_argument("--format", choices=FORMATS, default="text")
+    parser.add_argument("--output", help="Write here instead of stdout")
+    parser.add_argument("--hours", type=float, help="Fetch every point from the last N hours instead of the latest value")
+    parser.add_argument("--start", type=_epoch_ms, help="Start of a history range (ISO date or datetime)")
+    parser.add_argument("--end", type=_epoch_ms, help="End of a history range (default: now)")
+    parser.add_argument("--station", help="Only this station's datastreams (default: CAMPBELL_STATION_ID)")
+    parser.add_argument("--base-url", help="Override CAMPBELL_BASE_URL")
+    parser.add_argument("--organization", help="Override CAMPBELL_ORGANIZATION_ID")
+    parser.add_argument("--timing", action="store_true", help="Report row count and elapsed time on stderr")
+    args = parser.parse_args()
+    try:
+        favorites = parse_fields(args.field)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    config = load_cli_config(args)
+    configure_budget(config["MAX_CONCURRENT_REQUESTS"], config["MAX_REQUESTS_PER_SECOND"])
+    try:
+        token = get_access_token(config["BASE_URL"], config["USERNAME"], config["PASSWORD"])
+        datastreams = get_datastreams(config["BASE_URL"], token, config["ORGANIZATION_ID"])["data"]
+    except UpstreamUnavailable as e:
+        raise SystemExit(f"Campbell Cloud is unavailable: {e}")
+    except requests.exceptions.RequestException as e:
+        raise SystemExit(f"Could not reach Campbell Cloud: {e}")
+    matched = match_favorites(datastreams, favorites, config["STATION_ID"])
+
+    failed = 0
+    if args.hours is None and args.start is None:
+        rows = latest_rows(config, token, matched)
+    else:
+        end_ts = args.end or int(time.time() * 1000)
+        start_ts = args.start if args.start is not None else end_ts - int(args.hours * HOUR_MS)
+        if start_ts > end_ts:
+            parser.error("--start is after --end")
+        rows, failed = history_rows(config, token, matched, start_ts, end_ts)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            write_rows(rows, args.format, out)
     else:
-        print("No favorite measurements found.")
-    
-    input("\nPress Enter to exit...")
+        write_rows(rows, args.format, sys.stdout)
+    if failed:
+        print(f"Warning: {failed} request window(s) were deferred or failed; output is incomplete", file=sys.stderr)
+    if args.timing:
+        print(f"{len(matched)} datastreams, {len(rows)} rows in {time.perf_counter() - started:.3f}s", file=sys.stderr)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Concurrent-session load test for app.py against a replayed Campbell Cloud stand-in.
+
+    python -m tests.loadtest --levels 1,5,10,20 --duration 60 --interval 10
+
+Starts `streamlit run app.py` on a free port, backed by api.replay, opens N websocket sessions per level
+that rerun on a jittered interval (auto-refresh) and sometimes change a chart's time range, and reports
+rerun latency percentiles, upstream request counts, server CPU and RSS, and viewers-per-core capacity.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import numpy as np
+from websockets.asyncio.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from api.replay import ReplaySource, load_recording, serve_replay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORDING = os.path.join(REPO_ROOT, "tests", "2025-10-14T19-44_export.csv")
+APP_PASSWORD = "loadtest"
+RANGE_WIDGET_KEYS = ("wind_time_range", "temp_time_range")
+BROWSER_COMPONENT_KEY = "browser_engine"
+BROWSER_INFO = json.dumps({"isMobile": False, "isTablet": False, "isDesktop": True})
+RERUN_TIMEOUT_S = 120
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_streamlit(port, upstream_url, work_dir):
+    """Launch the dashboard against the stand-in and wait until it's healthy"""
+    secrets_path = os.path.join(work_dir, "secrets.toml")
+    with open(secrets_path, "w") as f:
+        f.write(f'CAMPBELL_BASE_URL = "{upstream_url}"\n'
+                'CAMPBELL_USERNAME = "loadtest"\nCAMPBELL_PASSWORD = "loadtest"\nCAMPBELL_ORGANIZATION_ID = "loadtest"\n'
+                f'APP_PASSWORD = "{APP_PASSWORD}"\nDATA_DIR = "{os.path.join(work_dir, "data")}"\n')
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false", "--secrets.files", secrets_path],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.25)
+    process.kill()
+    raise RuntimeError("Streamlit server did not become healthy")
+
+class ProcessSampler(threading.Thread):
+    """Samples a process's CPU seconds and RSS from /proc once per interval"""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._ticks = os.sysconf("SC_CLK_TCK")
+
+    def read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / self._ticks
+        with open(f"/proc/{self.pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return time.time(), cpu_s, rss_kb / 1024
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(self.read())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+class SimulatedSession:
+    """One browser tab: a websocket session that reruns the script and answers the browser-detection component"""
+
+    def __init__(self, websocket, query_string):
+        self.websocket = websocket
+        self.query_string = query_string
+        self.widgets = {}
+        self.states = {}
+
+    def _rerun_message(self):
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.page_script_hash = ""
+        for state in self.states.values():
+            message.rerun_script.widget_states.widgets.append(state)
+        return message.SerializeToString()
+
+    def _state(self, widget_id):
+        state = self.states.setdefault(widget_id, WidgetState())
+        state.id = widget_id
+        return state
+
+    async def rerun(self):
+        """Rerun the script and return the seconds until it finished"""
+        started = time.perf_counter()
+        await self.websocket.send(self._rerun_message())
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT_S))
+            kind = message.WhichOneof("type")
+            if kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                element_kind = element.WhichOneof("type")
+                if element_kind == "radio":
+                    key = next((k for k in RANGE_WIDGET_KEYS if element.radio.id.endswith(k)), None)
+                    if key:
+                        self.widgets[key] = (element.radio.id, list(element.radio.options))
+                elif element_kind == "component_instance" and element.component_instance.id.endswith(BROWSER_COMPONENT_KEY) \
+                        and element.component_instance.id not in self.states:
+                    # Answer like a desktop browser would, which restarts the run
+                    self._state(element.component_instance.id).json_value = BROWSER_INFO
+                    await self.websocket.send(self._rerun_message())
+            elif kind == "script_finished" and message.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                return time.perf_counter() - started
+
+    def change_range(self):
+        """Pick a different time range on one of the charts, mostly the live windows"""
+        if not self.widgets:
+            return
+        widget_id, options = self.widgets[random.choice(list(self.widgets))]
+        index = random.randrange(min(3, len(options))) if random.random() < 0.8 else random.randrange(len(options))
+        self._state(widget_id).int_value = index
+
+async def _run_session(url, query_string, stop_at, interval, widget_change_rate, results):
+    async with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=RERUN_TIMEOUT_S) as websocket:
+        session = SimulatedSession(websocket, query_string)
+        try:
+            results["initial"].append(await session.rerun())
+            while time.time() < stop_at:
+                await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+                if time.time() >= stop_at:
+                    break
+                if random.random() < widget_change_rate:
+                    session.change_range()
+                results["reruns"].append(await session.rerun())
+        except (asyncio.TimeoutError, OSError) as error:
+            results["errors"].append(repr(error))
+
+async def _run_level(url, query_string, sessions, duration, interval, widget_change_rate, ramp_s):
+    results = {"initial": [], "reruns": [], "errors": []}
+    stop_at = time.time() + duration
+    tasks = []
+    for _ in range(sessions):
+        tasks.append(asyncio.create_task(_run_session(url, query_string, stop_at, interval, widget_change_rate, results)))
+        await asyncio.sleep(ramp_s / max(sessions, 1))
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+def _percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": max(values)}
+
+def run_load_test(levels, duration, interval, widget_change_rate, recording, speed, viewer_interval, slo_s, ramp_s):
+    """Run each concurrency level in turn against a fresh server and return one report per level"""
+    source = ReplaySource(load_recording(recording), speed)
+    upstream = serve_replay(source)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+    port = _free_port()
+    query_string = "auth=" + hashlib.sha256(APP_PASSWORD.encode()).hexdigest()[:16]
+
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as work_dir:
+        process = start_streamlit(port, upstream_url, work_dir)
+        sampler = ProcessSampler(process.pid)
+        sampler.start()
+        try:
+            for sessions in levels:
+                requests_before = source.requests
+                _, cpu_before, _ = sampler.read()
+                started = time.time()
+                results = asyncio.run(_run_level(f"ws://127.0.0.1:{port}/_stcore/stream", query_string, sessions,
+                                                 duration, interval, widget_change_rate, ramp_s))
+                wall = time.time() - started
+                _, cpu_after, rss_mb = sampler.read()
+                level_samples = [s for s in sampler.samples if s[0] >= started]
+                runs = len(results["initial"]) + len(results["reruns"])
+                cpu_s = cpu_after - cpu_before
+                cpu_per_rerun = cpu_s / runs if runs else None
+                reports.append({
+                    "sessions": sessions,
+                    "wall_s": wall,
+                    "reruns": len(results["reruns"]),
+                    "errors": len(results["errors"]),
+                    "initial_load_s": _percentiles(results["initial"]),
+                    "rerun_s": _percentiles(results["reruns"]),
+                    "upstream_requests": source.requests - requests_before,
+                    "cpu_cores": cpu_s / wall,
+                    "cpu_s_per_rerun": cpu_per_rerun,
+                    "rss_mb": rss_mb,
+                    "rss_mb_peak": max([s[2] for s in level_samples] + [rss_mb]),
+                    # A real viewer reruns once per auto-refresh interval
+                    "viewers_per_core": viewer_interval / cpu_per_rerun if cpu_per_rerun else None
+                })
+        finally:
+            sampler.stop()
+            process.terminate()
+            process.wait(timeout=30)
+            upstream.shutdown()
+
+    within_slo = [r["sessions"] for r in reports if r["rerun_s"]["p95"] is not None and r["rerun_s"]["p95"] <= slo_s]
+    return {"levels": reports, "max_sessions_within_slo": max(within_slo) if within_slo else None,
+            "cpu_samples": [{"t": t, "cpu_s": cpu, "rss_mb": rss} for t, cpu, rss in sampler.samples]}
+
+def _format_s(value):
+    return "-" if value is None else f"{value:.2f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test app.py with concurrent simulated sessions")
+    parser.add_argument("--levels", default="1,5,10,20", help="Comma-separated session counts to run in turn")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds per level")
+    parser.add_argument("--interval", type=float, default=10, help="Mean seconds between reruns per session")
+    parser.add_argument("--widget-change-rate", type=float, default=0.3, help="Share of reruns that change a time range")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING)
+    parser.add_argument("--speed", type=float, default=60, help="Replay speed of the stand-in's data")
+    parser.add_argument("--viewer-interval", type=float, default=300, help="Seconds between reruns for a real viewer")
+    parser.add_argument("--slo", type=float, default=2.0, help="p95 rerun latency target in seconds")
+    parser.add_argument("--ramp", type=float, default=5, help="Seconds over which each level's sessions connect")
+    parser.add_argument("--output", help="Write the full report, including CPU/RSS samples, as JSON")
+    args = parser.parse_args()
+
+    report = run_load_test([int(n) for n in args.levels.split(",")], args.duration, args.interval,
+                           args.widget_change_rate, args.recording, args.speed, args.viewer_interval, args.slo, args.ramp)
+
+    print(f"{'sessions':>8} {'reruns':>7} {'err':>4} {'p50':>6} {'p95':>6} {'p99':>6} {'init p95':>8} "
+          f"{'upstream':>8} {'cores':>6} {'cpu/run':>8} {'rss MB':>7} {'viewers/core':>12}")
+    for level in report["levels"]:
+        print(f"{level['sessions']:>8} {level['reruns']:>7} {level['errors']:>4} "
+              f"{_format_s(level['rerun_s']['p50']):>6} {_format_s(level['rerun_s']['p95']):>6} "
+              f"{_format_s(level['rerun_s']['p99']):>6} {_format_s(level['initial_load_s']['p95']):>8} "
+              f"{level['upstream_requests']:>8} {level['cpu_cores']:>6.2f} {_format_s(level['cpu_s_per_rerun']):>8} "
+              f"{level['rss_mb_peak']:>7.0f} {level['viewers_per_core'] or 0:>12.0f}")
+    print(f"Largest level with p95 rerun <= {args.slo:g}s: {report['max_sessions_within_slo']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
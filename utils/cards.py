@@ -0,0 +1,109 @@
+import numpy as np
+
+HOUR_MS = 60 * 60 * 1000
+
+# Metric cards in display order, shared by the dashboard grid and the kiosk JSON.
+# stat "latest" is a field's newest reading, "max"/"min" the extreme over the trailing window_ms of its series,
+# and "derived" the newest value of a derived series. kiosk is the JSON section the value goes in, if any;
+# card=False keeps a value out of the dashboard grid. colors are the gradient stops and the text color.
+CARD_SPECS = [
+    {"key": "wind_speed_mph", "label": "Wind Speed", "stat": "latest", "field": ("Five_Min", "WS_mph_S_WVT"),
+     "format": "speed", "colors": ("#475569", "#334155", "#cbd5e1"), "kiosk": "current"},
+    {"key": "wind_gust_mph", "label": "Gust", "stat": "latest", "field": ("Five_Min", "WS_mph_Max"),
+     "format": "speed", "colors": ("#0369a1", "#075985", "#bae6fd"), "kiosk": "current"},
+    {"key": "wind_direction_deg", "label": "Wind Direction", "stat": "latest", "field": ("Five_Min", "WindDir_D1_WVT"),
+     "format": "direction", "colors": ("#1e40af", "#1e3a8a", "#93c5fd"), "kiosk": "current"},
+    {"key": "vector_wind", "label": "1-Hour Vector Wind", "stat": "derived", "derived": "vector_wind_speed",
+     "direction": "vector_wind_dir", "format": "speed", "colors": ("#0f766e", "#115e59", "#99f6e4")},
+    {"key": "gust_1h", "label": "1-Hour Peak Gust", "stat": "max", "window_ms": HOUR_MS, "field": ("Five_Min", "WS_mph_Max"),
+     "direction": ("Five_Min", "WindDir_D1_WVT"), "format": "speed", "colors": ("#facc15", "#eab308", "#422006"),
+     "kiosk": "extremes"},
+    {"key": "gust_24h", "label": "24-Hour Peak Gust", "stat": "max", "window_ms": 24 * HOUR_MS,
+     "field": ("Five_Min", "WS_mph_Max"), "direction": ("Five_Min", "WindDir_D1_WVT"), "format": "speed",
+     "colors": ("#ea580c", "#c2410c", "#fed7aa"), "kiosk": "extremes"},
+    {"key": "gust_72h", "label": "72-Hour Peak Gust", "stat": "max", "window_ms": 72 * HOUR_MS,
+     "field": ("Five_Min", "WS_mph_Max"), "direction": ("Five_Min", "WindDir_D1_WVT"), "format": "speed",
+     "colors": ("#dc2626", "#991b1b", "#fecaca"), "kiosk": "extremes"},
+    {"key": "humidity_pct", "label": "Humidity", "stat": "latest", "field": ("Five_Min", "RH"),
+     "format": "percent", "colors": ("#0891b2", "#0e7490", "#a5f3fc"), "kiosk": "current"},
+    {"key": "temperature_f", "label": "Temperature", "stat": "latest", "field": ("Five_Min", "AirTF_Avg"),
+     "format": "temperature", "colors": ("#7c3aed", "#6d28d9", "#e9d5ff"), "kiosk": "current"},
+    {"key": "wind_chill", "label": "Wind Chill", "stat": "derived", "derived": "wind_chill",
+     "format": "temperature", "colors": ("#4f46e5", "#4338ca", "#c7d2fe")},
+    {"key": "dew_point", "label": "Dew Point", "stat": "derived", "derived": "dew_point",
+     "format": "temperature", "colors": ("#0d9488", "#0f766e", "#ccfbf1")},
+    {"key": "temperature_low_24h", "label": "24-Hour Low", "stat": "min", "window_ms": 24 * HOUR_MS,
+     "field": ("Five_Min", "AirTF_Avg"), "format": "temperature", "colors": ("#0ea5e9", "#0284c7", "#e0f2fe"),
+     "kiosk": "extremes"},
+    {"key": "temperature_high_24h", "label": "24-Hour High", "stat": "max", "window_ms": 24 * HOUR_MS,
+     "field": ("Five_Min", "AirTF_Avg"), "format": "temperature", "colors": ("#ec4899", "#db2777", "#fce7f3"),
+     "kiosk": "extremes"},
+    {"key": "battery_v", "label": "Battery", "stat": "latest", "field": ("Hourly", "BattV_Min"),
+     "format": "voltage", "kiosk": "current", "card": False}
+]
+CARDS_BY_KEY = {spec["key"]: spec for spec in CARD_SPECS}
+
+def card_fields(specs, stats=("latest", "max", "min")):
+    """(table, field) pairs the specs with the given stats read, including peak directions"""
+    fields = []
+    for spec in specs:
+        if spec["stat"] in stats:
+            for table_field in (spec["field"], spec.get("direction") if spec["stat"] != "derived" else None):
+                if table_field and table_field not in fields:
+                    fields.append(table_field)
+    return fields
+
+def latest_point(series):
+    """{"value", "ts"} of a series' newest finite point, or None"""
+    if series is None:
+        return None
+    finite = np.flatnonzero(np.isfinite(series[1]))
+    if not finite.size:
+        return None
+    return {"value": float(series[1][finite[-1]]), "ts": int(series[0][finite[-1]])}
+
+def _extreme(series, start_ts, pick):
+    if series is None:
+        return None
+    ts, values = series
+    lo = np.searchsorted(ts, start_ts)
+    if not np.isfinite(values[lo:]).any():
+        return None
+    i = lo + int(pick(values[lo:]))
+    return {"value": float(values[i]), "ts": int(ts[i])}
+
+def _direction_at(direction, ts):
+    """Direction logged at exactly ts, or None"""
+    if direction is None or not direction[0].size:
+        return None
+    j = min(np.searchsorted(direction[0], ts), direction[0].size - 1)
+    return float(direction[1][j]) if direction[0][j] == ts else None
+
+def evaluate_cards(specs, now, latest=None, series=None, derived=None, suspect=None):
+    """{key: {"value", "ts"[, "direction"]}} for every spec whose inputs are available.
+    latest maps (table, field) to a {"value", "ts"} reading, series (table, field) to (ts, values),
+    and derived a derived series name to (ts, values). suspect maps (table, field) to a mask over its series
+    of readings logged while the sensor looked faulty, which don't count toward maxima and minima."""
+    latest, series, derived, suspect = latest or {}, series or {}, derived or {}, suspect or {}
+    series = {table_field: (pair[0], np.where(suspect[table_field], np.nan, pair[1]))
+              if table_field in suspect and suspect[table_field].any() else pair
+              for table_field, pair in series.items() if pair is not None}
+    values = {}
+    for spec in specs:
+        if spec["stat"] == "latest":
+            point = latest.get(spec["field"])
+        elif spec["stat"] == "derived":
+            point = latest_point(derived.get(spec["derived"]))
+            if point and spec.get("direction"):
+                direction = latest_point(derived.get(spec["direction"]))
+                if direction is None:
+                    point = None
+                else:
+                    point["direction"] = direction["value"]
+        else:
+            point = _extreme(series.get(spec["field"]), now - spec["window_ms"], np.nanargmax if spec["stat"] == "max" else np.nanargmin)
+            if point and spec.get("direction"):
+                point["direction"] = _direction_at(series.get(spec["direction"]), point["ts"])
+        if point is not None:
+            values[spec["key"]] = point
+    return values
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+import plotly.graph_objects as go
+import plotly.io as pio
+
+WEBGL_POINT_THRESHOLD = 1000
+MAX_CACHED_FIGURES = 64
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+
+def data_version(*series):
+    """Build a cheap version key from one or more (ts, values) series"""
+    version = []
+    for ts, values in series:
+        if len(ts):
+            # The last value catches rollup buckets that are still filling in
+            version.append((len(ts), int(ts[0]), int(ts[-1]), float(values[-1])))
+        else:
+            version.append((0, None, None, None))
+    return tuple(version)
+
+def scatter_trace(point_count, **kwargs):
+    """Return a Scatter trace, switching to WebGL above the point threshold"""
+    if point_count <= WEBGL_POINT_THRESHOLD:
+        return go.Scatter(**kwargs)
+    line = dict(kwargs.get("line") or {})
+    if line.get("shape") == "spline":
+        # Scattergl has no spline support, straight segments are indistinguishable at this density
+        line["shape"] = "linear"
+        kwargs["line"] = line
+    return go.Scattergl(**kwargs)
+
+def get_cached_figure(component, version, window, mode, build_figure):
+    """Return the cached figure entry for this render, building it only on a miss"""
+    key = (component, version, window, mode)
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+            return entry
+
+    entry = {"figure": build_figure()}
+
+    with _lock:
+        _figures[key] = entry
+        _figures.move_to_end(key)
+        while len(_figures) > MAX_CACHED_FIGURES:
+            _figures.popitem(last=False)
+    return entry
+
+def figure_spec(entry):
+    """The entry's figure as Plotly JSON, encoded on first use and kept with the entry.
+    Only the streaming chart sends it; st.plotly_chart encodes the figure itself."""
+    spec = entry.get("spec")
+    if spec is None:
+        spec = entry["spec"] = pio.to_json(entry["figure"], validate=False)
+    return spec
+
+def figure_cache_stats():
+    """Return the number of cached figures"""
+    with _lock:
+        return {"entries": len(_figures), "max_entries": MAX_CACHED_FIGURES}
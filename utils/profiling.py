@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+SAMPLE_INTERVAL_S = 0.005
+MAX_PROFILE_S = 120
+PROFILE_SUFFIX = ".speedscope.json"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Locals that identify the datastream a frame is working on
+DATASTREAM_LOCALS = ("datastream_id", "derived_ds", "ds")
+
+# Pool thread ident -> (thread, script run context it's working for), filled by the fan-out executors
+_pool_threads = {}
+_pool_lock = threading.Lock()
+
+def profile_dir(config):
+    return os.path.join(config["DATA_DIR"], "profiles")
+
+def tag_pool_thread(ctx):
+    """Mark the calling pool thread as working for a script run, so a profile of that run samples it too"""
+    thread = threading.current_thread()
+    with _pool_lock:
+        for ident in [ident for ident, (t, _) in _pool_threads.items() if not t.is_alive()]:
+            del _pool_threads[ident]
+        _pool_threads[thread.ident] = (thread, ctx)
+
+def _datastream_key(frame):
+    """The datastream id or dict a repo frame is working on, if any"""
+    code = frame.f_code
+    if not code.co_filename.startswith(REPO_ROOT) or not any(name in code.co_varnames for name in DATASTREAM_LOCALS):
+        return None
+    local_vars = frame.f_locals
+    for name in DATASTREAM_LOCALS:
+        value = local_vars.get(name)
+        if isinstance(value, str):
+            return value
+        if isinstance(value, dict) and value.get("id"):
+            return value["id"]
+    return None
+
+class RerunProfiler(threading.Thread):
+    """Samples a script thread's stack, and those of the pool threads fetching and building for it, until its rerun
+    ends, then writes a speedscope file with one profile per thread"""
+
+    def __init__(self, root_frame, out_dir, keep, label):
+        super().__init__(daemon=True, name="rerun-profiler")
+        self.root_frame = root_frame
+        self.thread_id = threading.get_ident()
+        self.ctx = get_script_run_ctx(suppress_warning=True)
+        self.out_dir = out_dir
+        self.keep = keep
+        self.label = label
+        self.frames = {}
+        # Thread ident -> {"name", "start", "samples", "weights"}, the script thread first
+        self.threads = {}
+
+    def _frame_index(self, key):
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def _stack(self, root, frames):
+        """Frame indexes for a root frame key and frames outermost first, with a column per datastream"""
+        stack = [self._frame_index(root)]
+        current_ds = None
+        for frame in frames:
+            code = frame.f_code
+            stack.append(self._frame_index((code.co_name, code.co_filename, code.co_firstlineno)))
+            ds_key = _datastream_key(frame)
+            if ds_key and ds_key != current_ds:
+                # Below the function that picked the datastream, so each one gets its own column
+                stack.append(self._frame_index(("datastream", ds_key, 0)))
+                current_ds = ds_key
+        return stack
+
+    def _script_stack(self, frame):
+        """Return the stack below the script's root frame (root first), or None once the rerun has ended"""
+        frames = []
+        while frame is not None and frame is not self.root_frame:
+            frames.append(frame)
+            frame = frame.f_back
+        if frame is None:
+            return None
+        return self._stack(("app.py", self.root_frame.f_code.co_filename, 0), reversed(frames))
+
+    def _pool_stack(self, thread, frame):
+        """A pool thread's stack from its outermost repo frame; just the thread while it waits for work"""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        first = next((i for i, f in enumerate(frames) if f.f_code.co_filename.startswith(REPO_ROOT)), len(frames))
+        return self._stack(("thread", thread.name, 0), frames[first:])
+
+    def _pool_threads(self):
+        with _pool_lock:
+            return [thread for thread, ctx in _pool_threads.values()
+                    if self.ctx is not None and ctx is self.ctx and thread.is_alive()]
+
+    def _record(self, ident, name, stack, at, weight):
+        profile = self.threads.setdefault(ident, {"name": name, "start": at, "samples": [], "weights": []})
+        profile["samples"].append(stack)
+        profile["weights"].append(weight)
+
+    def run(self):
+        started = last = time.perf_counter()
+        while last - started < MAX_PROFILE_S:
+            time.sleep(SAMPLE_INTERVAL_S)
+            current = sys._current_frames()
+            stack = self._script_stack(current.get(self.thread_id))
+            now = time.perf_counter()
+            if stack is None:
+                break
+            self._record(self.thread_id, self.label or "Script", stack, last - started, now - last)
+            for thread in self._pool_threads():
+                frame = current.get(thread.ident)
+                if frame is not None:
+                    self._record(thread.ident, thread.name, self._pool_stack(thread, frame), last - started, now - last)
+            last = now
+        script_globals = self.root_frame.f_globals
+        self.root_frame = None
+        self.save(last - started, script_globals)
+
+    def _frame_names(self, script_globals):
+        """Speedscope frames, with datastream ids replaced by the script's own field labels"""
+        labels = {}
+        for ds in script_globals.get("datastreams") or []:
+            if isinstance(ds, dict):
+                metadata = ds.get("metadata", {})
+                labels[ds.get("id")] = f"{metadata.get('field', ds.get('id'))} ({metadata.get('table', '')})"
+        frames = []
+        for name, filename, line in self.frames:
+            if name == "datastream":
+                frames.append({"name": f"datastream: {labels.get(filename, filename)}"})
+            elif name == "thread":
+                frames.append({"name": f"thread: {filename}"})
+            else:
+                frames.append({"name": name, "file": os.path.relpath(filename, REPO_ROOT), "line": line})
+        return frames
+
+    def save(self, duration_s, script_globals):
+        os.makedirs(self.out_dir, exist_ok=True)
+        station = script_globals.get("station")
+        name = " • ".join(part for part in (self.label, station if isinstance(station, str) else None) if part)
+        profile = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "campbell-cloud-app",
+            "shared": {"frames": self._frame_names(script_globals)},
+            "profiles": [{
+                "type": "sampled",
+                "name": thread["name"],
+                "unit": "seconds",
+                "startValue": thread["start"],
+                "endValue": thread["start"] + sum(thread["weights"]),
+                "samples": thread["samples"],
+                "weights": thread["weights"]
+            } for thread in self.threads.values()]
+        }
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.out_dir, f"{stamp}-{duration_s * 1000:.0f}ms{PROFILE_SUFFIX}")
+        with open(path + ".tmp", "w") as f:
+            json.dump(profile, f)
+        os.replace(path + ".tmp", path)
+        for old in list_profiles(self.out_dir)[self.keep:]:
+            os.remove(os.path.join(self.out_dir, old))
+
+def start_rerun_profile(config, label=""):
+    """Profile the rest of the calling script's run in a background sampler; call from the top of app.py"""
+    profiler = RerunProfiler(sys._getframe(1), profile_dir(config), config["PROFILE_KEEP"], label)
+    profiler.start()
+    return profiler
+
+def list_profiles(out_dir):
+    """Saved profile file names, newest first"""
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted((name for name in os.listdir(out_dir) if name.endswith(PROFILE_SUFFIX)), reverse=True)
@@ -0,0 +1,58 @@
+import streamlit as st
+
+UNIT_SYSTEMS = {
+    "imperial": "Imperial (mph, °F)",
+    "metric": "Metric (km/h, °C)"
+}
+# Display unit per quantity and system; the station logs the imperial ones
+QUANTITY_UNITS = {
+    "speed": {"imperial": "mph", "metric": "km/h"},
+    "temperature": {"imperial": "°F", "metric": "°C"}
+}
+UNIT_ALIASES = {
+    "mi/h": "mph", "mi/hr": "mph", "miles per hour": "mph",
+    "kph": "km/h", "km/hr": "km/h", "kilometers per hour": "km/h",
+    "meters per second": "m/s", "knots": "kn", "kt": "kn",
+    "f": "°F", "degf": "°F", "deg f": "°F", "fahrenheit": "°F",
+    "c": "°C", "degc": "°C", "deg c": "°C", "celsius": "°C"
+}
+# (from, to) -> (scale, offset). The measurement library only converts between integer unit ids one pair per
+# request, so the few units the app displays are converted from this table instead.
+BUILTIN_CONVERSIONS = {
+    ("mph", "km/h"): (1.609344, 0.0),
+    ("mph", "m/s"): (0.44704, 0.0),
+    ("mph", "kn"): (0.868976, 0.0),
+    ("°F", "°C"): (5 / 9, -160 / 9)
+}
+
+def canonical_unit(unit):
+    unit = str(unit or "").strip()
+    return UNIT_ALIASES.get(unit.lower(), unit)
+
+def build_registry(conversions):
+    """Conversion registry from (from, to) -> (scale, offset) pairs, with inverses filled in"""
+    registry = dict(conversions)
+    for (source, target), (scale, offset) in list(registry.items()):
+        registry.setdefault((target, source), (1 / scale, -offset / scale))
+    return registry
+
+_registry = build_registry(BUILTIN_CONVERSIONS)
+
+def convert(values, from_unit, to_unit):
+    """Vectorized linear conversion; works on numpy arrays and scalars, and is a no-op for equal units"""
+    from_unit, to_unit = canonical_unit(from_unit), canonical_unit(to_unit)
+    if from_unit == to_unit:
+        return values
+    scale, offset = _registry[(from_unit, to_unit)]
+    return values * scale + offset
+
+def unit_system():
+    return st.session_state.get("unit_system", "imperial")
+
+def unit_for(quantity, system=None):
+    """Display unit for a quantity in the given unit system, or the session's"""
+    return QUANTITY_UNITS[quantity][system or unit_system()]
+
+def to_display(values, quantity, system=None):
+    """Convert station (imperial) values of a quantity to the given unit system, or the session's"""
+    return convert(values, QUANTITY_UNITS[quantity]["imperial"], unit_for(quantity, system))